@@ -22,6 +22,7 @@ class AnomalyDetectionAgent:
     def _create_agent(self) -> Agent:
         # Import NASA monitoring tools
         from ..tools.nasa_api import nasa_solar_activity_tool, nasa_asteroid_tool
+        from ..tools.blackboard_tool import blackboard_tool
         
         return Agent(
             role=self.config.get('role', 'Anomaly Detection Agent'),
@@ -29,7 +30,7 @@ class AnomalyDetectionAgent:
             backstory=self.config.get('backstory', 'Expert in anomaly detection with NASA monitoring tools'),
             verbose=True,
             allow_delegation=False,
-            tools=[nasa_solar_activity_tool, nasa_asteroid_tool],
+            tools=[nasa_solar_activity_tool, nasa_asteroid_tool, blackboard_tool],
             max_iter=3,
             memory=True
         )
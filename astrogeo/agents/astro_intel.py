@@ -1,9 +1,10 @@
 from crewai import Agent
 import yaml
-import requests
 import os
 from loguru import logger
 
+from ..monitoring.http_instrumentation import http_session
+
 class AstroIntelAgent:
     def __init__(self, config_path: str = "config/agents.yaml"):
         self.config = self._load_agent_config(config_path)
@@ -25,7 +26,7 @@ class AstroIntelAgent:
     def get_nasa_apod(self):
         """Get NASA's Astronomy Picture of the Day with intelligent processing"""
         try:
-            r = requests.get(
+            r = http_session.get(
                 "https://api.nasa.gov/planetary/apod",
                 params={"api_key": self.nasa_api_key},
                 timeout=10
@@ -59,7 +60,7 @@ class AstroIntelAgent:
     def get_solar_activity(self):
         """Get solar activity with intelligent interpretation"""
         try:
-            r = requests.get(
+            r = http_session.get(
                 "https://api.nasa.gov/DONKI/FLR",
                 params={"api_key": self.nasa_api_key},
                 timeout=10
@@ -92,7 +93,7 @@ class AstroIntelAgent:
     def get_asteroid_data(self):
         """Get asteroid data with risk assessment"""
         try:
-            r = requests.get(
+            r = http_session.get(
                 "https://api.nasa.gov/neo/rest/v1/feed",
                 params={"api_key": self.nasa_api_key},
                 timeout=10
@@ -31,6 +31,7 @@ class IntelligentGeospatialAgent:
         """Create intelligent agent with advanced tools"""
         from ..tools.weather_api import intelligent_weather_tool, intelligent_air_quality_tool
         from ..tools.bhuvan_api import bhuvan_intelligence_tool
+        from ..tools.blackboard_tool import blackboard_tool
         
         return Agent(
             role=self.config.get('role'),
@@ -41,7 +42,8 @@ class IntelligentGeospatialAgent:
             tools=[
                 intelligent_weather_tool,
                 intelligent_air_quality_tool,
-                bhuvan_intelligence_tool
+                bhuvan_intelligence_tool,
+                blackboard_tool
             ],
             max_execution_time=self.config.get('max_execution_time', 180),
             temperature=self.config.get('temperature', 0.7),
@@ -23,6 +23,7 @@ class VisualIntelAgent:
         # Import NASA visual tools
         from ..tools.nasa_api import nasa_mars_rover_tool, nasa_apod_tool
         from ..tools.dall_e_tool import dall_e_tool
+        from ..tools.blackboard_tool import blackboard_tool
         
         return Agent(
             role=self.config.get('role', 'Visual Intelligence Agent'),
@@ -30,7 +31,7 @@ class VisualIntelAgent:
             backstory=self.config.get('backstory', 'Expert in visual analysis with NASA imagery access'),
             verbose=True,
             allow_delegation=False,
-            tools=[nasa_mars_rover_tool, nasa_apod_tool, dall_e_tool],
+            tools=[nasa_mars_rover_tool, nasa_apod_tool, dall_e_tool, blackboard_tool],
             max_iter=3,
             memory=True
         )
@@ -1,14 +1,37 @@
-from fastapi import FastAPI, Depends, HTTPException, status, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, status, BackgroundTasks, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+import asyncio
+import contextlib
 import os
 from loguru import logger
 
-from ..security.auth import authenticate_user, create_access_token, get_current_active_user, get_password_hash
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..security.rate_limit import RateLimitMiddleware
+from ..security.auth import (authenticate_user, create_access_token, get_current_active_user, get_current_admin_user,
+                             get_password_hash_async, oauth2_scheme, revoke_token, verify_password_async)
+from ..db.session import db_manager, get_async_session
+from ..db.async_repository import AsyncUserRepository, AsyncQueryLogRepository
+from ..db.repository import ApiUsageRepository
+from ..monitoring.http_instrumentation import configure_api_usage_sink
+from ..monitoring.metrics import metrics
+from ..monitoring.profiler import create_profiling_router
+from ..monitoring.tracing import tracer
+from ..cache.answer_cache import answer_cache, normalize_query
+from ..cache.embedding_cache import embedding_cache
+from ..cache.llm_cache import llm_cache
+from ..jobs.manager import job_manager
+from ..routing.keyword_router import keyword_router
+from .streaming import SSE_HEADERS, crew_callbacks, emit_progress, sse_events
 from ..crew import AstroGeoCrew
+from ..embeddings.service import create_encoder, load_embedding_service_settings
+from ..crew_pool import CrewPool
+from ..crew_dag import crew_settings, dedupe_inputs, run_crew
 from ..utils.vector_store import VectorStoreManager
 from ..utils.config_loader import ConfigLoader
 
@@ -18,11 +41,30 @@ class QueryRequest(BaseModel):
     query_type: str = "astronomy"
     include_context: bool = True
 
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest]
+    max_concurrency: Optional[int] = None
+
 class QueryResponse(BaseModel):
     result: str
     processing_time: float
     timestamp: datetime
     context: Optional[str] = None
+    cached: bool = False
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    query: str
+    query_type: Optional[str] = None
+    partial_output: List[str] = []
+    result: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
 
 class UserCreate(BaseModel):
     username: str
@@ -41,7 +83,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# CORS middleware
+# Per-IP/per-user limits and admission control for crew-backed routes
+app.add_middleware(RateLimitMiddleware)
+
+# CORS middleware, added last so it wraps the limiter and 429s carry CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Configure appropriately for production
@@ -50,6 +95,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Admin-only CPU and allocation profiling of the serving worker
+app.include_router(create_profiling_router(get_current_admin_user))
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Trace each request and report its stage breakdown in a Server-Timing header"""
+    with tracer.span(f"{request.method} {request.url.path}", path=request.url.path) as span:
+        response = await call_next(request)
+        if span is not None:
+            span.set_attribute("status", response.status_code)
+            trace = tracer.current_trace()
+            response.headers["Server-Timing"] = trace.server_timing()
+            response.headers["X-Trace-Id"] = trace.trace_id
+    return response
+
 # Global instances
 config_loader = ConfigLoader()
 crew_instance = None
@@ -65,24 +125,71 @@ async def startup_event():
         vector_store = VectorStoreManager(rag_config)
         vector_store.initialize_vector_store()
         
-        # Initialize crew
-        crew_instance = AstroGeoCrew()
+        # Build agents, tools and tasks once; requests get isolated copies
+        crew_instance = CrewPool(lambda: AstroGeoCrew().crew()).warm()
         
         logger.info("AstroGeo API initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize API: {e}")
+    
+    try:
+        # One model (or the shared embedding service) for every cache lookup; loading it blocks, so off the loop
+        encoder = await asyncio.to_thread(create_encoder, load_embedding_model)
+        embedding_cache.set_embedder(encoder)
+        answer_cache.set_embedder(embedding_cache.encode)
+    except Exception as e:
+        logger.warning(f"Answer cache running without near-hit matching: {e}")
+    
+    metrics.start_metrics_server()
+    
+    try:
+        await db_manager.create_all()
+        configure_api_usage_sink(record_api_usage)
+    except Exception as e:
+        logger.error(f"Failed to initialize database: {e}")
+    
+    try:
+        # Seed the answer cache from recent answers still inside their TTL
+        async with db_manager.async_session() as db:
+            query_logs = AsyncQueryLogRepository(db)
+            columns = ["query_text", "query_type", "result_summary", "result_status", "created_at"]
+            warmed = 0
+            for query_type in answer_cache.ttls:
+                page = await query_logs.get_query_logs_by_type(query_type, limit=200, columns=columns)
+                warmed += await asyncio.to_thread(answer_cache.warm, page)
+        logger.info(f"Answer cache warmed with {warmed} entries")
+    except Exception as e:
+        logger.error(f"Failed to warm answer cache: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled database connections and the job pool"""
+    job_manager.shutdown()
+    await db_manager.dispose()
 
 @app.post("/auth/register", response_model=Dict[str, str])
-async def register(user_data: UserCreate):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_session)):
     """Register a new user"""
     try:
-        # In production, save to database
-        hashed_password = get_password_hash(user_data.password)
+        users = AsyncUserRepository(db)
+        if await users.get_user_by_username(user_data.username) or await users.get_user_by_email(user_data.email):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username or email already registered"
+            )
         
-        # Mock user creation (implement database save in production)
-        logger.info(f"User registration attempt: {user_data.username}")
+        hashed_password = await get_password_hash_async(user_data.password)
+        await users.create_user({
+            "username": user_data.username,
+            "email": user_data.email,
+            "full_name": user_data.full_name,
+            "hashed_password": hashed_password
+        })
+        logger.info(f"User registered: {user_data.username}")
         
         return {"message": "User created successfully", "username": user_data.username}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -90,14 +197,29 @@ async def register(user_data: UserCreate):
         )
 
 @app.post("/auth/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(),
+                db: AsyncSession = Depends(get_async_session)):
     """Authenticate user and return access token"""
     try:
-        # Mock authentication (implement database check in production)
-        if form_data.username == "demo" and form_data.password == "demo123":
+        users = AsyncUserRepository(db)
+        user = await users.get_user_by_username(form_data.username)
+        is_admin = False
+        if user is None:
+            # Demo account kept for environments without registered users
+            authenticated = bool(authenticate_user(form_data.username, form_data.password))
+        elif not user.is_active:
+            # Deactivated accounts never fall through to the demo check
+            authenticated = False
+        else:
+            authenticated = await verify_password_async(form_data.password, user.hashed_password)
+            is_admin = bool(user.is_admin)
+            if authenticated:
+                await users.update_last_login(user.id)
+        
+        if authenticated:
             access_token_expires = timedelta(minutes=30)
             access_token = create_access_token(
-                data={"sub": form_data.username}, 
+                data={"sub": form_data.username, "admin": is_admin}, 
                 expires_delta=access_token_expires
             )
             return {"access_token": access_token, "token_type": "bearer"}
@@ -115,6 +237,14 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
             detail=f"Login failed: {str(e)}"
         )
 
+@app.post("/auth/logout", response_model=Dict[str, str])
+async def logout(token: str = Depends(oauth2_scheme),
+                 current_user: Dict = Depends(get_current_active_user)):
+    """Revoke the caller's access token"""
+    revoke_token(token)
+    logger.info(f"User logged out: {current_user['username']}")
+    return {"message": "Logged out"}
+
 @app.post("/query", response_model=QueryResponse)
 async def process_query(
     request: QueryRequest,
@@ -125,34 +255,27 @@ async def process_query(
     start_time = datetime.now()
     
     try:
-        context = ""
-        if request.include_context and vector_store:
-            search_results = vector_store.similarity_search(request.query, k=3)
-            context = "\n".join([result['document'] for result in search_results])
-        
-        # Prepare inputs for CrewAI
-        inputs = {
-            'topic': request.query,
-            'query_type': request.query_type,
-            'context': context,
-            'data_categories': request.query_type,
-            'time_range': 'recent',
-            'celestial_objects': request.query,
-            'geographic_region': 'global',
-            'image_category': 'space',
-            'monitoring_date': 'today',
-            'research_topic': request.query,
-            'dataset_category': 'space_data',
-            'prediction_target': 'space_weather',
-            'visualization_subject': request.query,
-            'research_objective': request.query,
-            'monitoring_parameters': 'anomalies'
-        }
+        with tracer.span("answer_cache"):
+            cached = await lookup_cached_answer(request.query, request.query_type)
+        if cached:
+            return QueryResponse(
+                result=cached.answer,
+                processing_time=(datetime.now() - start_time).total_seconds(),
+                timestamp=datetime.now(),
+                context=cached.metadata.get("context") if request.include_context else None,
+                cached=True
+            )
         
-        # Execute CrewAI crew
+        context = await asyncio.to_thread(retrieve_context, request)
+        inputs = build_crew_inputs(request, context)
+        
+        # Execute CrewAI crew off the event loop so other requests keep flowing
         if crew_instance:
-            result = crew_instance.crew().kickoff(inputs=inputs)
+            with tracer.span("crew.kickoff", query_type=request.query_type), metrics.time_agent("crew"):
+                result = await asyncio.to_thread(kickoff_crew, inputs)
             result_text = str(result)
+            await asyncio.to_thread(answer_cache.put, request.query, result_text, request.query_type,
+                                    metadata={"context": context})
         else:
             result_text = "CrewAI not initialized"
         
@@ -164,7 +287,8 @@ async def process_query(
             current_user.get("username", "unknown"), 
             request.query, 
             request.query_type, 
-            processing_time
+            processing_time,
+            result_text
         )
         
         return QueryResponse(
@@ -181,6 +305,160 @@ async def process_query(
             detail=f"Query processing failed: {str(e)}"
         )
 
+@app.post("/query/stream")
+async def stream_query(
+    request: QueryRequest,
+    current_user: Dict = Depends(get_current_active_user)
+):
+    """Process a query, streaming routing, context, tool results and task outputs as server-sent events"""
+    username = current_user.get("username", "unknown")
+    
+    async def produce():
+        start_time = datetime.now()
+        cached = await lookup_cached_answer(request.query, request.query_type)
+        if cached:
+            emit_progress("answer", result=cached.answer, cached=True,
+                          processing_time=(datetime.now() - start_time).total_seconds())
+            return
+        
+        route = keyword_router.route(request.query, 'crew_tasks')
+        emit_progress("routing", query_type=request.query_type, task=route.top, confidence=route.confidence,
+                      intents=route.labels, handler="crew" if crew_instance else None)
+        context = await asyncio.to_thread(retrieve_context, request)
+        if request.include_context:
+            emit_progress("context", context=context)
+        
+        if not crew_instance:
+            emit_progress("answer", result="CrewAI not initialized", cached=False)
+            return
+        
+        with tracer.span("crew.kickoff", query_type=request.query_type), metrics.time_agent("crew"):
+            result_text = str(await asyncio.to_thread(kickoff_crew, build_crew_inputs(request, context)))
+        await asyncio.to_thread(answer_cache.put, request.query, result_text, request.query_type,
+                                metadata={"context": context})
+        
+        processing_time = (datetime.now() - start_time).total_seconds()
+        emit_progress("answer", result=result_text, cached=False, processing_time=processing_time)
+        await log_query_usage(username, request.query, request.query_type, processing_time, result_text)
+    
+    return StreamingResponse(sse_events(produce), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.post("/query/batch")
+async def batch_query(
+    request: BatchQueryRequest,
+    http_request: Request,
+    current_user: Dict = Depends(get_current_active_user)
+):
+    """Run many queries through the crew concurrently, streaming each answer as it finishes
+
+    Identical queries run once and their result event lists every position
+    they held. Each crew run is paced against the caller's rate limits at the
+    /query cost and takes a slot from the same admission pool as /query.
+    """
+    max_items = int(crew_settings.get('batch_max_items', 500))
+    if len(request.queries) > max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch may hold at most {max_items} queries"
+        )
+    
+    username = current_user.get("username", "unknown")
+    limiter = getattr(http_request.state, "rate_limiter", None)
+    item_cost = int(limiter.route_costs.get("/query", 1)) if limiter else 0
+    default_concurrency = int(crew_settings.get('batch_max_concurrency', 4))
+    concurrency = max(1, min(request.max_concurrency or default_concurrency, default_concurrency))
+    _, groups = dedupe_inputs([
+        {'query': normalize_query(q.query), 'query_type': q.query_type, 'include_context': q.include_context}
+        for q in request.queries
+    ])
+    
+    async def answer(indices: List[int]):
+        query = request.queries[indices[0]]
+        start_time = datetime.now()
+        cached = await lookup_cached_answer(query.query, query.query_type)
+        if cached:
+            emit_progress("result", indices=indices, query=query.query, result=cached.answer, cached=True,
+                          processing_time=(datetime.now() - start_time).total_seconds())
+            return
+        
+        if limiter:
+            await limiter.pace(http_request, item_cost)
+        context = await asyncio.to_thread(retrieve_context, query)
+        if not crew_instance:
+            result_text = "CrewAI not initialized"
+        else:
+            admission = limiter.admission.slot(patient=True) if limiter and limiter.enabled else contextlib.nullcontext()
+            async with admission:
+                with tracer.span("crew.kickoff", query_type=query.query_type, batch=True), metrics.time_agent("crew"):
+                    inputs = build_crew_inputs(query, context)
+                    result_text = str(await asyncio.to_thread(kickoff_crew, inputs, False))
+            await asyncio.to_thread(answer_cache.put, query.query, result_text, query.query_type,
+                                    metadata={"context": context})
+        
+        processing_time = (datetime.now() - start_time).total_seconds()
+        emit_progress("result", indices=indices, query=query.query, result=result_text, cached=False,
+                      processing_time=processing_time, context=context if query.include_context else None)
+        await log_query_usage(username, query.query, query.query_type, processing_time, result_text)
+    
+    async def produce():
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run(indices: List[int]):
+            async with semaphore:
+                try:
+                    await answer(indices)
+                except Exception as e:
+                    logger.error(f"Batch query failed: {e}")
+                    emit_progress("item_error", indices=indices, query=request.queries[indices[0]].query, detail=str(e))
+        
+        emit_progress("batch", total=len(request.queries), distinct=len(groups), concurrency=concurrency)
+        await asyncio.gather(*(run(indices) for indices in groups))
+    
+    return StreamingResponse(sse_events(produce), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@app.post("/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    request: QueryRequest,
+    current_user: Dict = Depends(get_current_active_user)
+):
+    """Queue a query for a crew run in the job pool and return its id for polling"""
+    try:
+        context = await asyncio.to_thread(retrieve_context, request)
+        username = current_user.get("username", "unknown")
+        
+        job = await job_manager.submit(request.query, request.query_type, build_crew_inputs(request, context),
+                                       username=username,
+                                       on_success=job_completion_hook(username, request.query, request.query_type, context))
+        return job_response(job)
+    except Exception as e:
+        logger.error(f"Job submission failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Job submission failed: {str(e)}"
+        )
+
+@app.post("/jobs/{job_id}/retry", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def retry_job(job_id: str, current_user: Dict = Depends(get_current_active_user)):
+    """Requeue a failed job; it resumes after the last task its earlier attempt finished"""
+    job = await job_manager.get(job_id)
+    if job is None or (job.username != current_user.get("username") and not current_user.get("is_admin")):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    
+    context = (job.inputs or {}).get("context", "")
+    retried = await job_manager.retry(job_id, on_success=job_completion_hook(job.username, job.query_text,
+                                                                             job.query_type, context))
+    if retried is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}, only failed jobs can be retried")
+    return job_response(retried)
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, current_user: Dict = Depends(get_current_active_user)):
+    """Report a job's status, task outputs so far and final result"""
+    job = await job_manager.get(job_id)
+    if job is None or (job.username != current_user.get("username") and not current_user.get("is_admin")):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job_response(job)
+
 @app.get("/metrics")
 async def get_metrics(current_user: Dict = Depends(get_current_active_user)):
     """Get system metrics"""
@@ -190,7 +468,9 @@ async def get_metrics(current_user: Dict = Depends(get_current_active_user)):
             "vector_db_status": "connected" if vector_store else "disconnected",
             "crew_status": "initialized" if crew_instance else "not_initialized",
             "active_agents": 12 if crew_instance else 0,
-            "api_endpoints": len(app.routes)
+            "api_endpoints": len(app.routes),
+            "answer_cache": answer_cache.stats(),
+            "llm_cache": llm_cache.stats()
         }
         
         if vector_store:
@@ -215,10 +495,130 @@ async def health_check():
         "version": "1.0.0"
     }
 
-async def log_query_usage(username: str, query: str, query_type: str, processing_time: float):
+def retrieve_context(request: QueryRequest) -> str:
+    """Fetch vector store context for a query when requested"""
+    if not (request.include_context and vector_store):
+        return ""
+    with tracer.span("vector.search"):
+        search_results = vector_store.similarity_search(request.query, k=3)
+    emit_progress("documents", query=request.query, documents=search_results)
+    return "\n".join([result['document'] for result in search_results])
+
+def build_crew_inputs(request: QueryRequest, context: str) -> Dict[str, Any]:
+    """Prepare inputs for CrewAI"""
+    return {
+        'topic': request.query,
+        'query_type': request.query_type,
+        'context': context,
+        'data_categories': request.query_type,
+        'time_range': 'recent',
+        'celestial_objects': request.query,
+        'geographic_region': 'global',
+        'image_category': 'space',
+        'monitoring_date': 'today',
+        'research_topic': request.query,
+        'dataset_category': 'space_data',
+        'prediction_target': 'space_weather',
+        'visualization_subject': request.query,
+        'research_objective': request.query,
+        'monitoring_parameters': 'anomalies'
+    }
+
+def kickoff_crew(inputs: Dict[str, Any], forward_progress: bool = True):
+    """Build the crew and run it, forwarding tool results and task outputs to a streaming client"""
+    crew = crew_instance.acquire()
+    if forward_progress:
+        for name, callback in crew_callbacks().items():
+            setattr(crew, name, callback)
+    return run_crew(crew, inputs)
+
+def job_completion_hook(username: str, query: str, query_type: str, context: str):
+    """on_success hook for a queued job: cache the answer and log usage once it completes"""
+    async def on_success(job_id: str, result_text: str):
+        await asyncio.to_thread(answer_cache.put, query, result_text, query_type, metadata={"context": context})
+        job = await job_manager.get(job_id)
+        processing_time = 0.0
+        if job and job.started_at and job.finished_at:
+            processing_time = (job.finished_at - job.started_at).total_seconds()
+        await log_query_usage(username, query, query_type, processing_time, result_text)
+    return on_success
+
+def job_response(job) -> JobResponse:
+    """Convert a QueryJob row to its API representation"""
+    return JobResponse(
+        job_id=job.id,
+        status=job.status,
+        query=job.query_text,
+        query_type=job.query_type,
+        partial_output=job.partial_output or [],
+        result=job.result,
+        error=job.error_message,
+        attempts=job.attempts or 0,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        expires_at=job.expires_at
+    )
+
+def record_api_usage(usage_data: Dict[str, Any]):
+    """Persist a sampled provider call (runs on the recorder's background thread)"""
+    with db_manager.session() as db:
+        ApiUsageRepository(db).create_api_usage(usage_data)
+
+def load_embedding_model():
+    """Encode function of the sentence-transformer named in rag.yaml"""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(load_embedding_service_settings()['model_name']).encode
+
+async def lookup_cached_answer(query: str, query_type: str):
+    """Answer from this worker's cache, else from recent answers in the query log
+
+    Lookups embed the query, which is CPU-bound, so they run off the event loop.
+    """
+    cached = await asyncio.to_thread(answer_cache.get, query, query_type)
+    if not cached:
+        cached = await find_cached_answer_in_history(query, query_type)
+    return cached
+
+async def find_cached_answer_in_history(query: str, query_type: str):
+    """Look for a reusable answer among similar past queries via the full-text index
+
+    Catches answers produced by other workers or evicted from this worker's
+    memory without scanning query_logs. Skipped when the same query was
+    looked up moments ago; rows already in memory were covered by the
+    in-memory lookup, so only new ones are embedded and rechecked.
+    """
+    if answer_cache.history_checked(query, query_type):
+        return None
+    try:
+        since = datetime.utcnow() - timedelta(seconds=answer_cache.ttl_for(query_type))
+        async with db_manager.async_session() as db:
+            similar = await AsyncQueryLogRepository(db).find_similar_queries(
+                query, since=since, query_type=query_type, limit=5)
+        answer_cache.mark_history_checked(query, query_type)
+        new_logs = [log for log, _ in similar if not answer_cache.contains(log.query_text, log.query_type or "")]
+        if not new_logs:
+            return None
+        await asyncio.to_thread(answer_cache.warm, new_logs)
+        return await asyncio.to_thread(answer_cache.get, query, query_type)
+    except Exception as e:
+        logger.error(f"Answer history lookup failed: {e}")
+        return None
+
+async def log_query_usage(username: str, query: str, query_type: str, processing_time: float,
+                          result_summary: Optional[str] = None):
     """Background task to log query usage"""
     try:
-        # In production, save to database
+        async with db_manager.async_session() as db:
+            user = await AsyncUserRepository(db).get_user_by_username(username)
+            await AsyncQueryLogRepository(db).create_query_log({
+                "user_id": user.id if user else None,
+                "query_text": query,
+                "query_type": query_type,
+                "processing_time_seconds": processing_time,
+                "result_status": "success",
+                "result_summary": result_summary
+            })
         logger.info(f"Query logged - User: {username}, Type: {query_type}, Time: {processing_time}s")
     except Exception as e:
         logger.error(f"Failed to log query usage: {e}")
@@ -0,0 +1,122 @@
+import asyncio
+import contextvars
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from loguru import logger
+
+# Seconds of silence after which an SSE comment is sent so proxies keep the connection open
+HEARTBEAT_SECONDS = 15
+_DONE = object()
+
+class ProgressStream:
+    """Collect progress events from any thread or task into one asyncio queue"""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop or asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Any]" = asyncio.Queue()
+
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        item = {'event': event, 'data': data, 'timestamp': datetime.utcnow().isoformat() + 'Z'}
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.queue.put_nowait(item)
+        else:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, _DONE)
+
+_current_stream: contextvars.ContextVar[Optional[ProgressStream]] = contextvars.ContextVar(
+    'astrogeo_progress_stream', default=None)
+
+def emit_progress(event: str, **data) -> None:
+    """Send a progress event to the client streaming this request, if any
+
+    Safe to call from tools, agents and worker threads; it is a no-op for
+    requests that are not being streamed.
+    """
+    stream = _current_stream.get()
+    if stream is not None:
+        stream.emit(event, data)
+
+def crew_callbacks() -> Dict[str, Callable]:
+    """step_callback/task_callback for a Crew that forward tool results and task outputs to the stream"""
+    stream = _current_stream.get()
+    if stream is None:
+        return {}
+
+    def on_step(step):
+        result = getattr(step, 'result', None)
+        if result is not None:
+            stream.emit('tool_result', {
+                'tool': getattr(step, 'tool', None),
+                'tool_input': getattr(step, 'tool_input', None),
+                'result': str(result),
+            })
+
+    def on_task(output):
+        stream.emit('task_output', {
+            'task': getattr(output, 'description', None),
+            'agent': getattr(output, 'agent', None),
+            'output': str(getattr(output, 'raw', output)),
+        })
+
+    return {'step_callback': on_step, 'task_callback': on_task}
+
+async def stream_progress(producer: Callable[[], Awaitable[Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """Run producer with a progress stream bound and yield its events as they arrive
+
+    Yields {'event': 'heartbeat'} during long silences. A producer exception
+    becomes an 'error' event; every stream ends with a 'done' event.
+    """
+    stream = ProgressStream()
+
+    async def run():
+        token = _current_stream.set(stream)
+        try:
+            await producer()
+        except Exception as e:
+            logger.error(f"Streamed request failed: {e}")
+            stream.emit('error', {'detail': str(e)})
+        finally:
+            _current_stream.reset(token)
+            stream.close()
+
+    task = asyncio.create_task(run())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(stream.queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield {'event': 'heartbeat'}
+                continue
+            if item is _DONE:
+                break
+            yield item
+        yield {'event': 'done', 'data': {}}
+    finally:
+        # Client went away: stop waiting on work nobody will read
+        if not task.done():
+            task.cancel()
+
+def sse_format(item: Dict[str, Any]) -> str:
+    """Encode one progress event as a server-sent event"""
+    if item['event'] == 'heartbeat':
+        return ": keep-alive\n\n"
+    payload = dict(item.get('data', {}))
+    if 'timestamp' in item:
+        payload['timestamp'] = item['timestamp']
+    return f"event: {item['event']}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+async def sse_events(producer: Callable[[], Awaitable[Any]]) -> AsyncIterator[str]:
+    """Server-sent-event body for a StreamingResponse"""
+    async for item in stream_progress(producer):
+        yield sse_format(item)
+
+# Headers that stop proxies from buffering the event stream
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
@@ -2,8 +2,12 @@
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import sys
+from pathlib import Path
 sys.path.append('.')
 from main import process_query
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from astrogeo.cache.answer_cache import answer_cache
+from astrogeo.routing.keyword_router import keyword_router
 
 app = FastAPI()
 
@@ -18,9 +22,15 @@ app.add_middleware(
 @app.post("/api/chat")
 async def chat(request: dict):
     query = request.get("message", "")
+    # Cached under the routed agent's type, so live-data answers keep their short TTLs
+    query_type = keyword_router.route(query, 'agents').top or "general_space"
+    cached = answer_cache.get(query, query_type)
+    if cached:
+        return {"response": cached.answer, "cached": True}
     try:
         # Use your actual multi-agent system
         result = process_query(query, use_apis=True, analysis_depth="detailed")
+        answer_cache.put(query, str(result), query_type)
         return {"response": result}
     except Exception as e:
         return {"response": f"Error processing query: {str(e)}"}
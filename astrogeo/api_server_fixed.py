@@ -2,12 +2,17 @@
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import sys
+from pathlib import Path
 import os
 
 # Add the source path
 sys.path.append('.')
 sys.path.append('./src')
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from astrogeo.cache.answer_cache import answer_cache
+from astrogeo.routing.keyword_router import keyword_router
+
 app = FastAPI()
 
 app.add_middleware(
@@ -40,9 +45,15 @@ except Exception as e:
 @app.post("/api/chat")
 async def chat(request: dict):
     query = request.get("message", "")
+    # Cached under the routed agent's type, so live-data answers keep their short TTLs
+    query_type = keyword_router.route(query, 'agents').top or "general_space"
+    cached = answer_cache.get(query, query_type)
+    if cached:
+        return {"response": cached.answer, "cached": True}
     try:
         if callable(process_func):
             result = process_func(query, use_apis=True, analysis_depth="detailed")
+            answer_cache.put(query, str(result), query_type)
         else:
             result = f"Your AstroGeo AI system received: {query}"
         return {"response": str(result)}
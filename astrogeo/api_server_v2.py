@@ -1,14 +1,27 @@
-﻿from fastapi import FastAPI
+﻿from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+import asyncio
 import uvicorn
 import sys
+from pathlib import Path
 import os
 
 sys.path.append('.')
 sys.path.append('./src')
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from astrogeo.monitoring.profiler import create_profiling_router
+from astrogeo.security.auth import require_admin_token
+from astrogeo.security.rate_limit import RateLimitMiddleware
+from astrogeo.api.streaming import SSE_HEADERS, emit_progress, sse_events, stream_progress
+
 app = FastAPI()
 
+# Per-IP limits and admission control for /api/chat
+app.add_middleware(RateLimitMiddleware)
+
+# Added last so it wraps the limiter and 429s carry CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -17,34 +30,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Admin-only profiling, enabled by setting ASTROGEO_ADMIN_TOKEN
+app.include_router(create_profiling_router(require_admin_token))
+
 # Import and setup your system
 try:
-    import main
-    # Create the intelligent routing system
-    if hasattr(main, 'create_intelligent_routing_system'):
-        routing_system = main.create_intelligent_routing_system()
-        print("✅ Multi-agent system loaded successfully")
-    else:
-        routing_system = None
-        print("⚠️ Using fallback system")
+    # The multi-agent router, whose routing, document search and provider calls stream as progress events
+    from multi_agent_astrogeo import create_intelligent_routing_system
+    routing_system = create_intelligent_routing_system()
+    print("✅ Multi-agent system loaded successfully")
 except Exception as e:
     print(f"Import error: {e}")
     routing_system = None
 
-@app.post("/api/chat")
-async def chat(request: dict):
-    query = request.get("message", "")
+async def answer_chat(query):
+    """Answer a chat message, emitting progress events when the caller is streaming"""
     try:
         if routing_system and callable(routing_system):
-            # Call the routing system with just the query
-            result = routing_system(query)
+            # The system emits routing, document and provider call events itself, and caches
+            # its answers per agent under each agent's TTL
+            # Call the routing system with just the query, off the event loop
+            result = await asyncio.to_thread(routing_system, query)
         else:
             # Fallback intelligent response
+            emit_progress("routing", handler="fallback")
             result = generate_intelligent_response(query)
-        
-        return {"response": str(result)}
     except Exception as e:
-        return {"response": generate_intelligent_response(query)}
+        result = generate_intelligent_response(query)
+    
+    emit_progress("answer", response=str(result), cached=False)
+    return {"response": str(result)}
+
+@app.post("/api/chat")
+async def chat(request: dict):
+    return await answer_chat(request.get("message", ""))
+
+@app.post("/api/chat/stream")
+async def chat_stream(request: dict):
+    """Stream routing and the answer for a chat message as server-sent events"""
+    query = request.get("message", "")
+    return StreamingResponse(sse_events(lambda: answer_chat(query)), media_type="text/event-stream",
+                             headers=SSE_HEADERS)
+
+@app.websocket("/ws/chat")
+async def chat_websocket(websocket: WebSocket):
+    """Chat over a WebSocket: send {"message": ...}, receive progress events then {"event": "done"}"""
+    await websocket.accept()
+    try:
+        while True:
+            request = await websocket.receive_json()
+            query = request.get("message", "")
+            async for item in stream_progress(lambda: answer_chat(query)):
+                if item["event"] != "heartbeat":
+                    await websocket.send_json(item)
+    except WebSocketDisconnect:
+        pass
 
 def generate_intelligent_response(query):
     query_lower = query.lower()
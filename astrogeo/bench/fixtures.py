@@ -0,0 +1,73 @@
+import json
+import threading
+import time
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from ..monitoring.http_instrumentation import InstrumentedAdapter
+
+DEFAULT_FIXTURES_PATH = "bench/fixtures/tool_responses.json"
+
+def load_fixtures(path: str = DEFAULT_FIXTURES_PATH) -> Dict[str, Dict[str, Any]]:
+    """Recorded provider responses keyed by host + path (query strings are ignored)"""
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+class _FixtureTransport(HTTPAdapter):
+    """Answers requests from recorded fixtures instead of the network"""
+
+    def __init__(self, fixtures: Dict[str, Dict[str, Any]], simulate_latency: bool = True, **kwargs):
+        self.fixtures = fixtures
+        self.simulate_latency = simulate_latency
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.missing = 0
+        self.tool_seconds = 0.0
+        super().__init__(**kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        parts = urlsplit(request.url)
+        fixture = self.fixtures.get(f"{parts.hostname}{parts.path}")
+        latency = (fixture or {}).get('latency_ms', 0) / 1000 if self.simulate_latency else 0.0
+        if latency:
+            time.sleep(latency)
+        with self._lock:
+            self.calls += 1
+            self.missing += int(fixture is None)
+            self.tool_seconds += latency
+
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        if fixture is None:
+            response.status_code = 404
+            response.reason = "No fixture"
+            response._content = json.dumps({'error': f"no fixture for {parts.hostname}{parts.path}"}).encode()
+        else:
+            response.status_code = int(fixture.get('status', 200))
+            response.reason = "OK" if response.status_code < 400 else "Fixture error"
+            body = fixture['json'] if 'json' in fixture else fixture.get('text', '')
+            response._content = (json.dumps(body) if 'json' in fixture else str(body)).encode('utf-8')
+        response.headers = CaseInsensitiveDict({'Content-Type': 'application/json',
+                                                **(fixture or {}).get('headers', {})})
+        response.encoding = 'utf-8'
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'http_calls': self.calls, 'missing_fixtures': self.missing, 'tool_seconds': self.tool_seconds}
+
+class FixtureAdapter(InstrumentedAdapter, _FixtureTransport):
+    """Instrumented adapter whose transport is the fixture file, so tool code and metrics run unchanged"""
+
+def install_fixtures(session: requests.Session, fixtures: Dict[str, Dict[str, Any]],
+                     simulate_latency: bool = True) -> FixtureAdapter:
+    """Route every request on the session through recorded fixtures; returns the adapter for its stats"""
+    adapter = FixtureAdapter(fixtures=fixtures, simulate_latency=simulate_latency)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return adapter
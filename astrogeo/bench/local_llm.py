@@ -0,0 +1,142 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from ..cache.llm_cache import completion_key
+
+try:
+    from crewai import BaseLLM
+except ImportError:
+    # Older crewai (or none installed): agents then receive the object as-is
+    BaseLLM = object
+
+LOCAL_MODEL_NAME = "local/astrogeo-standin"
+
+# crewai renders each tool into the ReAct system prompt as "Tool Name: <name>"
+TOOL_NAME_PATTERN = re.compile(r"^Tool Name: (.+?)\s*$", re.MULTILINE)
+
+def as_messages(messages) -> List[Dict[str, Any]]:
+    return [{'role': 'user', 'content': messages}] if isinstance(messages, str) else messages
+
+class LocalLLM(BaseLLM):
+    """Offline, deterministic LLM for benchmarking crew orchestration
+
+    Replays completions recorded with record_completions() when the prompt
+    matches one, and otherwise writes a scripted ReAct trace: one Action per
+    available tool (up to tool_steps), then a Final Answer. Latency is
+    simulated as first_token_latency + tokens * token_latency and summed in
+    model_seconds, so a benchmark can subtract it from wall time.
+    """
+
+    def __init__(self, replay_path: Optional[str] = None, token_latency: float = 0.0,
+                 first_token_latency: float = 0.0, tool_steps: int = 2, model: str = LOCAL_MODEL_NAME):
+        if BaseLLM is not object:
+            super().__init__(model=model, temperature=0.0)
+        self.model = model
+        self.temperature = 0.0
+        self.token_latency = token_latency
+        self.first_token_latency = first_token_latency
+        self.tool_steps = tool_steps
+        self.replay: Dict[str, str] = self._load_replay(replay_path) if replay_path else {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.replayed = 0
+        self.model_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "LocalLLM":
+        """Configure from ASTROGEO_LOCAL_LLM_* environment variables"""
+        return cls(
+            replay_path=os.getenv("ASTROGEO_LOCAL_LLM_REPLAY") or None,
+            token_latency=float(os.getenv("ASTROGEO_LOCAL_LLM_TOKEN_LATENCY", "0")),
+            first_token_latency=float(os.getenv("ASTROGEO_LOCAL_LLM_FIRST_TOKEN_LATENCY", "0")),
+            tool_steps=int(os.getenv("ASTROGEO_LOCAL_LLM_TOOL_STEPS", "2")),
+        )
+
+    @staticmethod
+    def _load_replay(path: str) -> Dict[str, str]:
+        replay = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    if line.strip():
+                        record = json.loads(line)
+                        replay[record['key']] = record['response']
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Local LLM running without recorded completions: {e}")
+        return replay
+
+    def _key(self, messages, tools) -> str:
+        # Recordings are keyed by the recorded model's prompt, never by this stand-in's name
+        return completion_key("recorded", messages, {}, tools)
+
+    def call(self, messages, tools: Optional[List[Dict[str, Any]]] = None, callbacks=None,
+             available_functions=None, **kwargs) -> str:
+        messages = as_messages(messages)
+        response = self.replay.get(self._key(messages, tools))
+        replayed = response is not None
+        if response is None:
+            response = self.scripted_response(messages)
+
+        latency = self.first_token_latency + len(response.split()) * self.token_latency
+        if latency:
+            time.sleep(latency)
+        with self._lock:
+            self.calls += 1
+            self.replayed += int(replayed)
+            self.model_seconds += latency
+        return response
+
+    def scripted_response(self, messages: List[Dict[str, Any]]) -> str:
+        """Next step of a ReAct trace, decided by the tools offered and observations so far"""
+        prompt = "\n".join(str(message.get('content', '')) for message in messages)
+        tools = list(dict.fromkeys(TOOL_NAME_PATTERN.findall(prompt)))
+        # Observations are appended to the assistant turns; the prompt's format instructions mention one too
+        step = sum(str(m.get('content', '')).count("Observation:") for m in messages if m.get('role') == 'assistant')
+
+        if tools and step < self.tool_steps:
+            tool = tools[step % len(tools)]
+            return (f"Thought: I should gather data with {tool} before answering.\n"
+                    f"Action: {tool}\n"
+                    f"Action Input: {{}}")
+
+        task = next((str(m.get('content', '')) for m in reversed(messages) if m.get('role') == 'user'), prompt)
+        return ("Thought: I now know the final answer\n"
+                f"Final Answer: Deterministic benchmark answer after {step} observations. "
+                f"Task digest: {' '.join(task.split()[:40])}")
+
+    def supports_function_calling(self) -> bool:
+        # ReAct text only, like the hosted model this stands in for
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return True
+
+    def get_context_window_size(self) -> int:
+        return 8192
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'calls': self.calls, 'replayed': self.replayed, 'model_seconds': self.model_seconds}
+
+def record_completions(llm, path: str):
+    """Append every completion the LLM returns to a JSONL file LocalLLM can replay"""
+    inner = llm.call
+    lock = threading.Lock()
+
+    def call(messages, tools=None, *args, **kwargs):
+        response = inner(messages, tools, *args, **kwargs)
+        if isinstance(response, str):
+            record = {'key': completion_key("recorded", as_messages(messages), {}, tools),
+                      'model': str(getattr(llm, 'model', '')), 'response': response}
+            with lock, open(path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(record) + "\n")
+        return response
+
+    object.__setattr__(llm, 'call', call)
+    return llm
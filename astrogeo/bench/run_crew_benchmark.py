@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""Benchmark AstroGeoCrew offline against the local LLM stand-in and recorded tool fixtures
+
+Run from the astrogeo directory so config/ resolves:
+
+    python bench/run_crew_benchmark.py --iterations 5 --token-latency 0.02 --output bench/results.json
+
+Model and provider latency are simulated and measured separately, so
+framework_overhead_seconds is the time spent in our own code and crewai.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+DEFAULT_INPUTS = {
+    'query_topic': 'Perseid meteor shower visibility over India',
+    'celestial_objects': 'Perseid meteor shower',
+    'geographic_region': 'Karnataka, India',
+    'data_categories': 'astronomy',
+    'image_category': 'meteor photography',
+    'monitoring_date': '2024-08-12',
+    'research_topic': 'meteor shower observation conditions',
+    'dataset_category': 'space_data',
+    'prediction_target': 'space_weather',
+    'visualization_subject': 'Perseid radiant',
+    'research_objective': 'Perseid meteor shower visibility over India',
+    'monitoring_parameters': 'anomalies',
+    'time_range': 'current',
+}
+
+def _task_label(output, index: int) -> str:
+    name = getattr(output, 'name', None)
+    if name:
+        return name
+    description = str(getattr(output, 'description', '') or '')
+    return description[:40] or f"task_{index}"
+
+def run_iteration(llm, adapter, inputs: Dict[str, Any], settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Build and run the crew once, returning timings and call counts"""
+    from astrogeo.cache.llm_cache import bypass
+    from astrogeo.cache.tool_memo import tool_memo
+    from astrogeo.crew import AstroGeoCrew
+    from astrogeo.crew_dag import run_crew
+
+    llm_before, http_before = llm.stats(), adapter.stats()
+
+    build_start = time.perf_counter()
+    crew = AstroGeoCrew().crew()
+    build_seconds = time.perf_counter() - build_start
+
+    completed: List[tuple] = []
+    crew.task_callback = lambda output: completed.append((output, time.perf_counter()))
+
+    start = time.perf_counter()
+    # Benchmarks measure every completion, so the completion cache stays out of the way
+    with bypass(), tool_memo.run_scope() as run:
+        result = run_crew(crew, inputs, settings)
+    wall_seconds = time.perf_counter() - start
+
+    task_seconds = dict(getattr(result, 'task_durations', {}) or {})
+    if not task_seconds:
+        # Sequential runs: each task spans from the previous completion to its own
+        previous = start
+        for index, (output, finished) in enumerate(completed):
+            task_seconds[_task_label(output, index)] = finished - previous
+            previous = finished
+
+    llm_after, http_after = llm.stats(), adapter.stats()
+    model_seconds = llm_after['model_seconds'] - llm_before['model_seconds']
+    tool_seconds = http_after['tool_seconds'] - http_before['tool_seconds']
+    busy_seconds = sum(task_seconds.values()) or wall_seconds
+    return {
+        'build_seconds': build_seconds,
+        'wall_seconds': wall_seconds,
+        'task_seconds': task_seconds,
+        'llm_calls': llm_after['calls'] - llm_before['calls'],
+        'llm_replayed': llm_after['replayed'] - llm_before['replayed'],
+        'model_seconds': model_seconds,
+        'tool_calls': run.hits + run.misses,
+        'tool_calls_memoized': run.hits,
+        'http_calls': http_after['http_calls'] - http_before['http_calls'],
+        'missing_fixtures': http_after['missing_fixtures'] - http_before['missing_fixtures'],
+        'tool_seconds': tool_seconds,
+        'framework_overhead_seconds': max(0.0, busy_seconds - model_seconds - tool_seconds),
+    }
+
+def summarize(iterations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median and spread of each timing across iterations"""
+    def spread(values: List[float]) -> Dict[str, float]:
+        return {'median': statistics.median(values), 'min': min(values), 'max': max(values)}
+
+    tasks = sorted({name for it in iterations for name in it['task_seconds']})
+    return {
+        'iterations': len(iterations),
+        'wall_seconds': spread([it['wall_seconds'] for it in iterations]),
+        'build_seconds': spread([it['build_seconds'] for it in iterations]),
+        'model_seconds': spread([it['model_seconds'] for it in iterations]),
+        'tool_seconds': spread([it['tool_seconds'] for it in iterations]),
+        'framework_overhead_seconds': spread([it['framework_overhead_seconds'] for it in iterations]),
+        'task_seconds': {name: spread([it['task_seconds'][name] for it in iterations if name in it['task_seconds']])
+                         for name in tasks},
+        'llm_calls': spread([it['llm_calls'] for it in iterations]),
+        'tool_calls': spread([it['tool_calls'] for it in iterations]),
+        'tool_calls_memoized': spread([it['tool_calls_memoized'] for it in iterations]),
+        'http_calls': spread([it['http_calls'] for it in iterations]),
+    }
+
+def run_benchmark(iterations: int = 3, execution_mode: Optional[str] = None, fixtures_path: Optional[str] = None,
+                  simulate_tool_latency: bool = True, inputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Run the crew `iterations` times offline and summarise; the LLM is configured by ASTROGEO_LOCAL_LLM_*"""
+    # Must be set before astrogeo.crew is imported, since hf_llm is built at import time
+    os.environ['ASTROGEO_LLM_BACKEND'] = 'local'
+    from astrogeo import crew as crew_module
+    from astrogeo.bench.fixtures import DEFAULT_FIXTURES_PATH, install_fixtures, load_fixtures
+    from astrogeo.crew_dag import crew_settings
+    from astrogeo.monitoring.http_instrumentation import http_session
+
+    adapter = install_fixtures(http_session, load_fixtures(fixtures_path or DEFAULT_FIXTURES_PATH),
+                               simulate_latency=simulate_tool_latency)
+    settings = dict(crew_settings, execution_mode=execution_mode or crew_settings.get('execution_mode'))
+    results = [run_iteration(crew_module.hf_llm, adapter, inputs or DEFAULT_INPUTS, settings)
+               for _ in range(iterations)]
+    return {
+        'execution_mode': settings['execution_mode'],
+        'llm': {'token_latency': crew_module.hf_llm.token_latency,
+                'first_token_latency': crew_module.hf_llm.first_token_latency,
+                'replay_entries': len(crew_module.hf_llm.replay)},
+        'summary': summarize(results),
+        'runs': results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--execution-mode', choices=['dag', 'sequential'])
+    parser.add_argument('--token-latency', type=float, default=0.0, help="simulated seconds per output token")
+    parser.add_argument('--first-token-latency', type=float, default=0.0, help="simulated seconds before the first token")
+    parser.add_argument('--tool-steps', type=int, default=2, help="scripted tool actions per task before answering")
+    parser.add_argument('--replay', help="JSONL of completions recorded with record_completions()")
+    parser.add_argument('--fixtures', help="recorded provider responses (default bench/fixtures/tool_responses.json)")
+    parser.add_argument('--no-tool-latency', action='store_true', help="answer fixtures instantly")
+    parser.add_argument('--output', help="write the full report as JSON here")
+    args = parser.parse_args()
+
+    os.environ['ASTROGEO_LOCAL_LLM_TOKEN_LATENCY'] = str(args.token_latency)
+    os.environ['ASTROGEO_LOCAL_LLM_FIRST_TOKEN_LATENCY'] = str(args.first_token_latency)
+    os.environ['ASTROGEO_LOCAL_LLM_TOOL_STEPS'] = str(args.tool_steps)
+    if args.replay:
+        os.environ['ASTROGEO_LOCAL_LLM_REPLAY'] = args.replay
+
+    report = run_benchmark(args.iterations, args.execution_mode, args.fixtures, not args.no_tool_latency)
+    summary = report['summary']
+    print(f"AstroGeoCrew benchmark ({report['execution_mode']}, {summary['iterations']} iterations, medians)")
+    for key in ('wall_seconds', 'build_seconds', 'model_seconds', 'tool_seconds', 'framework_overhead_seconds'):
+        print(f"  {key:<28} {summary[key]['median']:.3f}")
+    for key in ('llm_calls', 'tool_calls', 'tool_calls_memoized', 'http_calls'):
+        print(f"  {key:<28} {summary[key]['median']:g}")
+    for name, spread in summary['task_seconds'].items():
+        print(f"  task {name:<23} {spread['median']:.3f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, default=str)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""Benchmark query embedding throughput under concurrency, direct versus micro-batched
+
+Run from the astrogeo directory:
+
+    python bench/run_embedding_benchmark.py --concurrency 16 --requests 512
+
+Each of `concurrency` threads encodes single queries, as concurrent app
+requests do. Without sentence-transformers installed, or with --simulate,
+the model is replaced by a stand-in costing a fixed overhead per call plus
+a smaller cost per text, one call at a time since encodes contend for the
+same cores. That is the shape of CPU encoding that batching exploits.
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+def simulated_encoder(call_ms: float, text_ms: float) -> Callable[[List[str]], np.ndarray]:
+    cores = threading.Lock()
+
+    def encode(texts: List[str]) -> np.ndarray:
+        with cores:
+            time.sleep((call_ms + text_ms * len(texts)) / 1000)
+        return np.zeros((len(texts), 384), dtype=np.float32)
+    return encode
+
+def measure(encode: Callable[[List[str]], Any], queries: List[str], concurrency: int) -> Dict[str, float]:
+    """Queries per second and per-request latency with `concurrency` callers"""
+    latencies = []
+
+    def one(query: str) -> None:
+        start = time.perf_counter()
+        encode([query])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, queries))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'queries_per_second': len(queries) / elapsed,
+        'median_ms': statistics.median(latencies),
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+def run_benchmark(encode_fn: Callable[[List[str]], Any], requests: int = 256, concurrency: int = 16,
+                  max_batch_size: int = 32, max_wait_ms: float = 5.0) -> Dict[str, Any]:
+    from astrogeo.embeddings.service import MicroBatcher
+
+    queries = [f"What is happening with solar activity, question {i}?" for i in range(requests)]
+    batcher = MicroBatcher(encode_fn, max_batch_size, max_wait_ms)
+    try:
+        report = {
+            'direct': measure(encode_fn, queries, concurrency),
+            'batched': measure(batcher.encode, queries, concurrency),
+        }
+        report['batched']['mean_batch_size'] = batcher.stats()['mean_batch_size']
+    finally:
+        batcher.shutdown()
+    report['speedup'] = report['batched']['queries_per_second'] / report['direct']['queries_per_second']
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=256)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--simulate', action='store_true', help="use the stand-in model even if one is installed")
+    parser.add_argument('--call-ms', type=float, default=8.0, help="stand-in cost per encode call")
+    parser.add_argument('--text-ms', type=float, default=0.5, help="stand-in cost per text")
+    args = parser.parse_args()
+
+    encode_fn = None
+    if not args.simulate:
+        try:
+            from sentence_transformers import SentenceTransformer
+            from astrogeo.embeddings.service import load_embedding_service_settings
+            encode_fn = SentenceTransformer(load_embedding_service_settings()['model_name']).encode
+        except ImportError:
+            print("sentence-transformers not installed, using the stand-in model")
+    encode_fn = encode_fn or simulated_encoder(args.call_ms, args.text_ms)
+
+    report = run_benchmark(encode_fn, args.requests, args.concurrency, args.max_batch_size, args.max_wait_ms)
+    print(f"Embedding benchmark ({args.requests} queries, {args.concurrency} concurrent callers)")
+    for name in ('direct', 'batched'):
+        result = report[name]
+        print(f"  {name:<8} {result['queries_per_second']:8.1f} q/s  median {result['median_ms']:.1f} ms"
+              f"  p95 {result['p95_ms']:.1f} ms")
+    print(f"  mean batch {report['batched']['mean_batch_size']:.1f}, speedup {report['speedup']:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+"""Benchmark query routing latency and accuracy against a labelled query corpus
+
+Run from the astrogeo directory so config/ resolves:
+
+    python bench/run_routing_benchmark.py --repeat 200 --output bench/routing_results.json
+
+Each corpus line gives a profile, a query, the acceptable top intents
+(`expected`, null meaning no intent) and optionally `also`, further intents
+a multi-intent router should report. The compiled router is compared with
+two baselines that test the same rules with one substring check per
+keyword: stopping at the first matching intent, as the routers it replaced
+did, and scoring every intent, as the compiled router does. With
+--semantic the embedding router (fitted on the example queries in
+routing.yaml) is measured too; it needs the sentence-transformers model.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+DEFAULT_CORPUS_PATH = "bench/fixtures/routing_queries.jsonl"
+
+def load_corpus(path: str = DEFAULT_CORPUS_PATH) -> List[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def naive_route(router, query: str, profile: str) -> Optional[str]:
+    """First intent whose rules hold, checked one keyword at a time with `in`"""
+    query_lower = query.lower()
+    for intent in router.profiles[profile]:
+        if any(keyword in query_lower for keyword in intent.excludes):
+            continue
+        if not all(any(keyword in query_lower for keyword in group) for group in intent.requires):
+            continue
+        if intent.requires or any(keyword in query_lower for keyword in intent.keywords):
+            return intent.name
+    return router.fallbacks[profile][0]
+
+def naive_scores(router, query: str, profile: str) -> Dict[str, float]:
+    """Score every intent of the profile with one substring check per keyword"""
+    query_lower = query.lower()
+    scores = {}
+    for intent in router.profiles[profile]:
+        if any(keyword in query_lower for keyword in intent.excludes):
+            continue
+        groups = [sum(w for keyword, w in group.items() if keyword in query_lower) for group in intent.requires]
+        if not all(groups):
+            continue
+        score = sum(groups) + sum(w for keyword, w in intent.keywords.items() if keyword in query_lower)
+        if score > 0:
+            scores[intent.name] = score
+    return scores
+
+def time_per_query(route: Callable[[str, str], Any], corpus: List[Dict[str, Any]], repeat: int) -> Dict[str, float]:
+    """Microseconds per routed query: median, p95 and p99 over repeat passes of the corpus"""
+    samples = []
+    for _ in range(repeat):
+        for item in corpus:
+            start = time.perf_counter()
+            route(item['query'], item['profile'])
+            samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        'median_us': statistics.median(samples),
+        'p95_us': samples[int(len(samples) * 0.95) - 1],
+        'p99_us': samples[int(len(samples) * 0.99) - 1],
+    }
+
+def accuracy(predict: Callable[[Dict[str, Any]], Optional[str]], corpus: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Top-1 accuracy overall and per profile, with the misses"""
+    per_profile: Dict[str, List[bool]] = {}
+    misses = []
+    for item in corpus:
+        predicted = predict(item)
+        correct = predicted in item['expected']
+        per_profile.setdefault(item['profile'], []).append(correct)
+        if not correct:
+            misses.append({'profile': item['profile'], 'query': item['query'],
+                           'expected': item['expected'], 'predicted': predicted})
+    total = [c for results in per_profile.values() for c in results]
+    return {
+        'top1': sum(total) / len(total) if total else 0.0,
+        'per_profile': {name: sum(results) / len(results) for name, results in per_profile.items()},
+        'misses': misses,
+    }
+
+def multi_intent_recall(router, corpus: List[Dict[str, Any]]) -> float:
+    """Share of the `also` intents a router reports alongside its top intent"""
+    wanted = found = 0
+    for item in corpus:
+        also = item.get('also') or []
+        if also:
+            labels = router.route(item['query'], item['profile']).labels
+            wanted += len(also)
+            found += sum(1 for name in also if name in labels)
+    return found / wanted if wanted else 1.0
+
+def run_benchmark(corpus_path: str = DEFAULT_CORPUS_PATH, repeat: int = 100,
+                  rules_path: str = "config/routing.yaml",
+                  embed_fn: Optional[Callable[[List[str]], Any]] = None) -> Dict[str, Any]:
+    from astrogeo.routing.keyword_router import KeywordRouter, load_routing_rules
+    from astrogeo.cache.embedding_cache import EmbeddingCache
+    from astrogeo.routing.semantic_router import SemanticRouter, load_semantic_settings
+
+    build_start = time.perf_counter()
+    # No scan cache, so repeated passes measure the automaton rather than cache hits
+    router = KeywordRouter(load_routing_rules(rules_path), scan_cache_size=0)
+    build_ms = (time.perf_counter() - build_start) * 1000
+    corpus = load_corpus(corpus_path)
+
+    report = {
+        'queries': len(corpus),
+        'build_ms': build_ms,
+        'compiled': {
+            'latency': time_per_query(lambda q, p: router.route(q, p), corpus, repeat),
+            'accuracy': accuracy(lambda item: router.route(item['query'], item['profile']).top, corpus),
+            'multi_intent_recall': multi_intent_recall(router, corpus),
+        },
+        'naive_all_intents': {
+            'latency': time_per_query(lambda q, p: naive_scores(router, q, p), corpus, repeat),
+        },
+        'naive_first_match': {
+            'latency': time_per_query(lambda q, p: naive_route(router, q, p), corpus, repeat),
+            'accuracy': accuracy(lambda item: naive_route(router, item['query'], item['profile']), corpus),
+        },
+    }
+
+    if embed_fn is not None:
+        embeddings = EmbeddingCache(embed_fn, {'enable_cache': True, 'max_cache_size': len(corpus) * 2})
+        # Measured even while routing.yaml leaves it disabled, since this is how it is validated
+        settings = dict(load_semantic_settings(rules_path), centroid_path=None, enabled=True)
+        semantic = SemanticRouter(embeddings.encode, settings, fallback=router)
+        for profile in router.profiles:
+            semantic.fit(profile)
+        # Embed the corpus once, so latency is classification only, as when retrieval has embedded the query
+        for item in corpus:
+            semantic.embed(item['query'])
+        report['semantic'] = {
+            'latency': time_per_query(lambda q, p: semantic.route(q, p), corpus, repeat),
+            'accuracy': accuracy(lambda item: semantic.route(item['query'], item['profile']).top, corpus),
+            'multi_intent_recall': multi_intent_recall(semantic, corpus),
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS_PATH)
+    parser.add_argument('--rules', default="config/routing.yaml")
+    parser.add_argument('--repeat', type=int, default=100, help="passes over the corpus for latency")
+    parser.add_argument('--semantic', action='store_true', help="also benchmark the embedding router")
+    parser.add_argument('--output', help="write the full report as JSON here")
+    args = parser.parse_args()
+
+    embed_fn = None
+    if args.semantic:
+        from sentence_transformers import SentenceTransformer
+        from astrogeo.routing.semantic_router import load_semantic_settings
+        embed_fn = SentenceTransformer(load_semantic_settings(args.rules)['model_name']).encode
+    report = run_benchmark(args.corpus, args.repeat, args.rules, embed_fn)
+    print(f"Routing benchmark ({report['queries']} labelled queries, rules compiled in {report['build_ms']:.1f} ms)")
+    for name in ('compiled', 'naive_all_intents', 'naive_first_match', 'semantic'):
+        if name not in report:
+            continue
+        result = report[name]
+        latency = result['latency']
+        top1 = f"top-1 {result['accuracy']['top1']:.1%}" if 'accuracy' in result else "top-1    -  "
+        print(f"  {name:<18} {top1}  median {latency['median_us']:.1f} us  p99 {latency['p99_us']:.1f} us")
+        for profile, score in result.get('accuracy', {}).get('per_profile', {}).items():
+            print(f"    {profile:<16} {score:.1%}")
+    for name in ('compiled', 'semantic'):
+        if name in report:
+            print(f"  {name} multi-intent recall {report[name]['multi_intent_recall']:.1%}")
+    for miss in report['compiled']['accuracy']['misses']:
+        print(f"  miss [{miss['profile']}] {miss['query']!r}: {miss['predicted']} (expected {miss['expected']})")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
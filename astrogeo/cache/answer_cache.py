@@ -0,0 +1,261 @@
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import yaml
+from loguru import logger
+
+EMBEDDING_MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+
+DEFAULT_ANSWER_CACHE_SETTINGS = {
+    'enabled': True,
+    'max_entries': 2000,
+    'similarity_threshold': 0.92,
+    'default_ttl_seconds': 21600,
+    'ttl_seconds': {},
+    # How long a query-log lookup that found nothing new stands for the same query
+    'history_recheck_seconds': 30,
+}
+
+def load_answer_cache_settings(config_path: str = "config/settings.yaml") -> Dict[str, Any]:
+    """Load the answer_cache section of settings.yaml merged over defaults"""
+    settings = dict(DEFAULT_ANSWER_CACHE_SETTINGS)
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            settings.update(config.get('answer_cache', {}) or {})
+    except Exception as e:
+        logger.warning(f"Using default answer cache settings: {e}")
+    return settings
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different phrasings share a key
+
+    "What is Bhuvan?" and "  what is  bhuvan" both become "what is bhuvan".
+    """
+    text = unicodedata.normalize('NFKC', query).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def query_hash(normalized_query: str, query_type: str = "", variant: str = "") -> str:
+    """Stable hash for exact-match lookups"""
+    key = f"{query_type}\x1f{variant}\x1f{normalized_query}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+@dataclass
+class CachedAnswer:
+    """A cached answer and the query it was produced for"""
+    query: str
+    normalized_query: str
+    answer: str
+    query_type: str
+    variant: str
+    created_at: float
+    expires_at: float
+    embedding: Optional[np.ndarray] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    similarity: float = 1.0
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.created_at
+
+class AnswerCache:
+    """Answer cache with exact hash hits and near hits by embedding similarity"""
+
+    def __init__(self, embed_fn: Optional[Callable[[List[str]], Any]] = None,
+                 settings: Optional[Dict[str, Any]] = None):
+        self.settings = settings or load_answer_cache_settings()
+        self.enabled = bool(self.settings.get('enabled', True))
+        self.max_entries = int(self.settings.get('max_entries', 2000))
+        self.similarity_threshold = float(self.settings.get('similarity_threshold', 0.92))
+        self.default_ttl = float(self.settings.get('default_ttl_seconds', 21600))
+        self.ttls = dict(self.settings.get('ttl_seconds', {}) or {})
+        self.history_recheck = float(self.settings.get('history_recheck_seconds', 30))
+
+        self._embed_fn = embed_fn
+        self._embedder_failed = False
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._history_checked: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def set_embedder(self, embed_fn: Callable[[List[str]], Any]) -> None:
+        """Reuse an already loaded embedding model's encode function"""
+        self._embed_fn = embed_fn
+        self._embedder_failed = False
+
+    def ttl_for(self, query_type: Optional[str]) -> float:
+        """TTL in seconds for a query type"""
+        return float(self.ttls.get(query_type or "", self.default_ttl))
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Unit-length float32 embedding, or None if no model is available"""
+        if self._embed_fn is None and not self._embedder_failed:
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._embed_fn = SentenceTransformer(EMBEDDING_MODEL_NAME).encode
+            except Exception as e:
+                logger.warning(f"Answer cache running without near-hit matching: {e}")
+                self._embedder_failed = True
+        if self._embed_fn is None:
+            return None
+
+        try:
+            vector = np.asarray(self._embed_fn([text]), dtype=np.float32).reshape(-1)
+        except Exception as e:
+            logger.error(f"Answer cache embedding failed: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _evict_expired(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, query: str, query_type: str = "", variant: str = "") -> Optional[CachedAnswer]:
+        """Look up a fresh answer for the query, exact match first then nearest neighbour"""
+        if not self.enabled or not query or not query.strip():
+            return None
+
+        normalized = normalize_query(query)
+        key = query_hash(normalized, query_type, variant)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                entry.similarity = 1.0
+                return entry
+
+            candidates = [(k, e) for k, e in self._entries.items()
+                          if e.query_type == query_type and e.variant == variant
+                          and e.expires_at > now and e.embedding is not None]
+
+        if candidates:
+            embedding = self._embed(normalized)
+            if embedding is not None:
+                matrix = np.stack([e.embedding for _, e in candidates])
+                scores = matrix @ embedding
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    best_key, entry = candidates[best]
+                    with self._lock:
+                        if best_key in self._entries:
+                            self._entries.move_to_end(best_key)
+                        self.near_hits += 1
+                    entry.similarity = float(scores[best])
+                    return entry
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def contains(self, query: str, query_type: str = "", variant: str = "") -> bool:
+        """Whether a fresh answer is stored under exactly this query; no embedding, no counters"""
+        key = query_hash(normalize_query(query or ""), query_type, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry.expires_at > time.time()
+
+    def history_checked(self, query: str, query_type: str = "") -> bool:
+        """Whether the query log was searched for this query within history_recheck_seconds"""
+        key = query_hash(normalize_query(query or ""), query_type)
+        with self._lock:
+            checked_at = self._history_checked.get(key)
+            return checked_at is not None and time.time() - checked_at < self.history_recheck
+
+    def mark_history_checked(self, query: str, query_type: str = "") -> None:
+        key = query_hash(normalize_query(query or ""), query_type)
+        with self._lock:
+            self._history_checked[key] = time.time()
+            self._history_checked.move_to_end(key)
+            while len(self._history_checked) > self.max_entries:
+                self._history_checked.popitem(last=False)
+
+    def put(self, query: str, answer: str, query_type: str = "", variant: str = "",
+            metadata: Optional[Dict[str, Any]] = None, created_at: Optional[float] = None) -> Optional[CachedAnswer]:
+        """Store an answer for the query under its type's TTL"""
+        if not self.enabled or not query or not query.strip() or not answer:
+            return None
+
+        normalized = normalize_query(query)
+        created_at = created_at or time.time()
+        entry = CachedAnswer(
+            query=query,
+            normalized_query=normalized,
+            answer=answer,
+            query_type=query_type,
+            variant=variant,
+            created_at=created_at,
+            expires_at=created_at + self.ttl_for(query_type),
+            embedding=self._embed(normalized),
+            metadata=metadata or {},
+        )
+        if entry.expires_at <= time.time():
+            return None
+
+        key = query_hash(normalized, query_type, variant)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._evict_expired(time.time())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def warm(self, query_logs: Iterable[Any]) -> int:
+        """Seed the cache from past QueryLog rows that still fall inside their TTL"""
+        loaded = 0
+        for log in query_logs:
+            if not getattr(log, 'result_summary', None):
+                continue
+            if getattr(log, 'result_status', 'success') not in (None, 'success'):
+                continue
+            created_at = getattr(log, 'created_at', None)
+            if isinstance(created_at, datetime):
+                if created_at.tzinfo is None:
+                    created_at = created_at.replace(tzinfo=timezone.utc)
+                created_at = created_at.timestamp()
+            if self.put(log.query_text, log.result_summary, log.query_type or "",
+                        created_at=created_at):
+                loaded += 1
+        return loaded
+
+    def invalidate(self, query_type: Optional[str] = None) -> None:
+        """Drop every entry, or only those of one query type"""
+        with self._lock:
+            self._history_checked.clear()
+            if query_type is None:
+                self._entries.clear()
+            else:
+                for key in [k for k, e in self._entries.items() if e.query_type == query_type]:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the metrics endpoints"""
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'near_hits': self.near_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            }
+
+# Global answer cache shared by the API servers and Gradio apps
+answer_cache = AnswerCache()
@@ -0,0 +1,207 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import yaml
+from loguru import logger
+
+DEFAULT_EMBEDDING_CACHE_SETTINGS = {
+    'enable_cache': True,
+    'max_cache_size': 1000,
+    'cache_embeddings': False,
+    'cache_directory': './data/cache/',
+    'embedding_disk_max_entries': 100000,
+    'model_name': 'sentence-transformers/all-MiniLM-L6-v2',
+}
+
+def load_embedding_cache_settings(config_path: str = "config/rag.yaml") -> Dict[str, Any]:
+    """Load the cache section of rag.yaml, plus the embedding model name, merged over defaults"""
+    settings = dict(DEFAULT_EMBEDDING_CACHE_SETTINGS)
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            settings.update(config.get('cache', {}) or {})
+            model_name = (config.get('embedding', {}) or {}).get('model_name')
+            if model_name:
+                settings['model_name'] = model_name
+    except Exception as e:
+        logger.warning(f"Using default embedding cache settings: {e}")
+    return settings
+
+def normalize_text(text: str) -> str:
+    """Collapse differences the (uncased) MiniLM tokenizer ignores: case, Unicode form and spacing"""
+    return re.sub(r"\s+", " ", unicodedata.normalize('NFKC', text).lower()).strip()
+
+def embedding_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\x1f{normalize_text(text)}".encode('utf-8')).hexdigest()
+
+class EmbeddingCache:
+    """Memoize text embeddings in a bounded in-memory LRU with an optional SQLite tier
+
+    Every vector search, the answer cache and the semantic router embed the
+    same query during one request, and users repeat queries across requests;
+    with the model on CPU each encode is the main cost of a search. The
+    cache wraps the loaded model's encode function: texts already seen come
+    back as stored float32 vectors and only the rest are encoded, in one
+    batch. With rag.yaml `cache.cache_embeddings` the vectors are also
+    written to disk, so they survive restarts and are shared by every
+    process on the host.
+    """
+
+    def __init__(self, embed_fn: Optional[Callable[[List[str]], Any]] = None,
+                 settings: Optional[Dict[str, Any]] = None):
+        self.settings = settings or load_embedding_cache_settings()
+        self.enabled = bool(self.settings.get('enable_cache', True))
+        self.max_entries = int(self.settings.get('max_cache_size', 1000))
+        self.model_name = str(self.settings.get('model_name'))
+        self.disk_enabled = bool(self.settings.get('cache_embeddings', False))
+        directory = self.settings.get('cache_directory') or './data/cache/'
+        self.path = directory if directory == ':memory:' else os.path.join(directory, 'embeddings.sqlite')
+        self.disk_max_entries = int(self.settings.get('embedding_disk_max_entries', 100000))
+
+        self._embed_fn = embed_fn
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def set_embedder(self, embed_fn: Callable[[List[str]], Any]) -> None:
+        """Wrap an already loaded embedding model's encode function"""
+        with self._lock:
+            self._embed_fn = embed_fn
+            self._entries.clear()
+
+    @property
+    def ready(self) -> bool:
+        return self._embed_fn is not None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so each process opens its own
+        if self._conn is None or self._pid != os.getpid():
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        if not self.disk_enabled or not keys:
+            return {}
+        try:
+            with self._lock:
+                conn = self._connection()
+                placeholders = ",".join("?" * len(keys))
+                rows = conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                                    list(keys)).fetchall()
+                if rows:
+                    conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                     [(time.time(), key) for key, _ in rows])
+                    conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Embedding cache read failed: {e}")
+            return {}
+        return {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+
+    def _disk_put(self, vectors: Dict[str, np.ndarray]) -> None:
+        if not self.disk_enabled or not vectors:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                                 [(key, vector.tobytes(), now) for key, vector in vectors.items()])
+                # Least recently used vectors go once the table outgrows its bound
+                conn.execute("""DELETE FROM embeddings WHERE key IN (
+                    SELECT key FROM embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)""",
+                             (self.disk_max_entries,))
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Embedding cache write failed: {e}")
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings of texts as a float32 matrix, encoding only those not cached, in one batch
+
+        A drop-in for SentenceTransformer.encode(list_of_texts).
+        """
+        if self._embed_fn is None:
+            raise RuntimeError("No embedding model loaded")
+        texts = list(texts)
+        if not self.enabled:
+            return np.asarray(self._embed_fn(texts), dtype=np.float32).reshape(len(texts), -1)
+
+        keys = [embedding_key(self.model_name, text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+        memory_hits = len(found)
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        from_disk = self._disk_get(missing)
+        found.update(from_disk)
+
+        to_encode = [(key, text) for key, text in dict(zip(keys, texts)).items() if key not in found]
+        encoded: Dict[str, np.ndarray] = {}
+        if to_encode:
+            vectors = np.asarray(self._embed_fn([text for _, text in to_encode]), dtype=np.float32)
+            vectors = vectors.reshape(len(to_encode), -1)
+            encoded = {key: vectors[i].copy() for i, (key, _) in enumerate(to_encode)}
+            found.update(encoded)
+            self._disk_put(encoded)
+
+        with self._lock:
+            for key, vector in {**from_disk, **encoded}.items():
+                self._remember(key, vector)
+            self.hits += memory_hits
+            self.disk_hits += len(from_disk)
+            self.misses += len(encoded)
+        return np.stack([found[key] for key in keys])
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embedding of one text as a float32 vector"""
+        return self.encode([text])[0]
+
+    def clear(self) -> None:
+        """Drop the in-memory tier; the disk tier is kept"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+# Global cache shared by every search path; apps hand it their model with set_embedder
+embedding_cache = EmbeddingCache()
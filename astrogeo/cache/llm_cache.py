@@ -0,0 +1,249 @@
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import yaml
+from loguru import logger
+
+from ..monitoring.metrics import metrics
+
+DEFAULT_LLM_CACHE_SETTINGS = {
+    'enabled': True,
+    'path': './data/llm_cache.sqlite',
+    'max_size_mb': 512,
+    'ttl_seconds': 0,
+    'skip_tasks': [],
+}
+
+# LLM attributes that change the completion for the same prompt
+DECODING_PARAMS = (
+    'temperature', 'top_p', 'n', 'stop', 'max_tokens', 'max_completion_tokens', 'presence_penalty',
+    'frequency_penalty', 'logit_bias', 'response_format', 'seed', 'reasoning_effort',
+)
+
+_current_task: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('astrogeo_llm_task', default=None)
+_bypass: contextvars.ContextVar[bool] = contextvars.ContextVar('astrogeo_llm_cache_bypass', default=False)
+
+def load_llm_cache_settings(config_path: str = "config/settings.yaml") -> Dict[str, Any]:
+    """Load the llm_cache section of settings.yaml merged over defaults"""
+    settings = dict(DEFAULT_LLM_CACHE_SETTINGS)
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            settings.update(config.get('llm_cache', {}) or {})
+    except Exception as e:
+        logger.warning(f"Using default LLM cache settings: {e}")
+    return settings
+
+def model_name(llm) -> str:
+    return str(getattr(llm, 'model', None) or getattr(llm, 'model_name', None) or type(llm).__name__)
+
+def completion_key(model: str, messages: Any, params: Dict[str, Any], tools: Any = None) -> str:
+    """Hash of everything that determines a completion: model, full prompt, decoding parameters and tools"""
+    payload = json.dumps({'model': model, 'messages': messages, 'params': params, 'tools': tools},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+@contextmanager
+def task_scope(task_name: Optional[str]) -> Iterator[None]:
+    """Attribute LLM calls in this block to a task, so per-task opt-outs apply"""
+    token = _current_task.set(task_name)
+    try:
+        yield
+    finally:
+        _current_task.reset(token)
+
+def current_task() -> Optional[str]:
+    """Name of the task LLM and tool calls are currently attributed to, if known"""
+    return _current_task.get()
+
+@contextmanager
+def bypass() -> Iterator[None]:
+    """Neither read nor write the completion cache for LLM calls in this block"""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+class LLMCompletionCache:
+    """SQLite-backed completion store with size-bounded LRU eviction
+
+    The database lives on disk so completions survive restarts and are
+    shared by every worker and job process on the host (WAL mode lets them
+    read while one writes).
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self.settings = settings or load_llm_cache_settings()
+        self.enabled = bool(self.settings.get('enabled', True))
+        self.path = self.settings.get('path', DEFAULT_LLM_CACHE_SETTINGS['path'])
+        self.max_bytes = int(float(self.settings.get('max_size_mb', 512)) * 1024 * 1024)
+        self.ttl = float(self.settings.get('ttl_seconds', 0) or 0)
+        self.skip_tasks = set(self.settings.get('skip_tasks', []) or [])
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so each process opens its own
+        if self._conn is None or self._pid != os.getpid():
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_last_used ON completions(last_used)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def skips(self, task_name: Optional[str]) -> bool:
+        """True if caching is off, bypassed, or the task opted out"""
+        return not self.enabled or _bypass.get() or (task_name is not None and task_name in self.skip_tasks)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute("SELECT response, created_at FROM completions WHERE key = ?", (key,)).fetchone()
+                if row and self.ttl and row[1] + self.ttl <= now:
+                    conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                    conn.commit()
+                    row = None
+                if row:
+                    conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (now, key))
+                    conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"LLM cache read failed: {e}")
+            return None
+        return row[0] if row else None
+
+    def put(self, key: str, model: str, response: str) -> None:
+        size = len(key) + len(response.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute("INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, model, response, size, now, now))
+                self._evict(conn)
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"LLM cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries down to 90% so eviction is not repeated on every write
+        target = total - int(self.max_bytes * 0.9)
+        freed, doomed = 0, []
+        for key, size in conn.execute("SELECT key, size FROM completions ORDER BY last_used"):
+            doomed.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM completions WHERE key = ?", doomed)
+        logger.info(f"LLM cache evicted {len(doomed)} completions ({freed} bytes)")
+
+    def record(self, model: str, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.track_llm_cache(model, hit)
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM completions")
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and on-disk size for the metrics endpoints"""
+        with self._lock:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'size_bytes': size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+class CachedLLM:
+    """Replacement for an LLM instance's call() that serves repeated completions from the cache
+
+    Installed on the instance rather than subclassing, so it works for
+    crewai's LLM and any custom LLM an agent is given, and survives
+    Crew.copy(), which shares LLM objects between copies.
+    """
+
+    def __init__(self, llm, cache: "LLMCompletionCache"):
+        self.llm = llm
+        self.cache = cache
+        self.inner = llm.call
+
+    def params(self) -> Dict[str, Any]:
+        return {name: getattr(self.llm, name) for name in DECODING_PARAMS if getattr(self.llm, name, None) is not None}
+
+    def __call__(self, messages, tools: Optional[List[Dict[str, Any]]] = None, *args, **kwargs):
+        from_task = kwargs.get('from_task')
+        task_name = getattr(from_task, 'name', None) or _current_task.get()
+        available_functions = kwargs.get('available_functions') or (args[1] if len(args) > 1 else None)
+        # Calls that execute functions have side effects a cached answer would skip
+        if self.cache.skips(task_name) or available_functions:
+            return self.inner(messages, tools, *args, **kwargs)
+
+        model = model_name(self.llm)
+        key = completion_key(model, messages, self.params(), tools)
+        cached = self.cache.get(key)
+        self.cache.record(model, cached is not None)
+        if cached is not None:
+            return cached
+
+        response = self.inner(messages, tools, *args, **kwargs)
+        if isinstance(response, str) and response:
+            self.cache.put(key, model, response)
+        return response
+
+def enable_llm_cache(llm, cache: Optional[LLMCompletionCache] = None):
+    """Route an LLM's completions through the cache; returns the same LLM object"""
+    if llm is None or isinstance(llm, str) or not callable(getattr(llm, 'call', None)):
+        return llm
+    if isinstance(llm.call, CachedLLM):
+        return llm
+    object.__setattr__(llm, 'call', CachedLLM(llm, cache or llm_cache))
+    return llm
+
+def enable_crew_llm_cache(crew, cache: Optional[LLMCompletionCache] = None):
+    """Cache completions for every agent in a crew, including agents on crewai's default LLM"""
+    for agent in getattr(crew, 'agents', []) or []:
+        enable_llm_cache(getattr(agent, 'llm', None), cache)
+        enable_llm_cache(getattr(agent, 'function_calling_llm', None), cache)
+    enable_llm_cache(getattr(crew, 'manager_llm', None), cache)
+    return crew
+
+# Global completion cache; the SQLite file is shared across processes
+llm_cache = LLMCompletionCache()
@@ -0,0 +1,207 @@
+import contextvars
+import hashlib
+import inspect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+from loguru import logger
+
+from .llm_cache import current_task
+
+DEFAULT_TOOL_MEMO_SETTINGS = {
+    'enabled': True,
+    # Cross-run reuse, in seconds per tool name; tools not listed are only memoized within a run
+    'ttl_seconds': {},
+    'max_entries': 1000,
+}
+
+def load_tool_memo_settings(config_path: str = "config/settings.yaml") -> Dict[str, Any]:
+    """Load the tool_memo section of settings.yaml merged over defaults"""
+    settings = dict(DEFAULT_TOOL_MEMO_SETTINGS)
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            settings.update(config.get('tool_memo', {}) or {})
+    except Exception as e:
+        logger.warning(f"Using default tool memo settings: {e}")
+    return settings
+
+class ToolFailure(str):
+    """A tool's error message: shown to the agent like any result, but never memoized
+
+    Tools report provider errors as text rather than raising, so the memo
+    cannot tell them apart from data; returning ToolFailure(message) keeps
+    a transient failure out of the run memo, the cross-run cache, the
+    blackboard and task checkpoints, and the next identical call retries.
+    """
+
+def tool_call_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    """Key for a tool call: its name plus canonical JSON of its bound arguments"""
+    payload = json.dumps({'tool': tool_name, 'args': arguments}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+@dataclass
+class BlackboardEntry:
+    """One tool result recorded during a run"""
+    tool: str
+    arguments: Dict[str, Any]
+    result: Any
+    task: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+class RunMemo:
+    """Tool results and blackboard for one crew run, shared by all its tasks and threads"""
+
+    def __init__(self):
+        self._results: Dict[str, Any] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.entries: List[BlackboardEntry] = []
+        self.notes: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def key_lock(self, key: str) -> threading.Lock:
+        # Concurrent identical calls from parallel tasks wait for the first instead of duplicating it
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def lookup(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                return True, self._results[key]
+            self.misses += 1
+            return False, None
+
+    def store(self, key: str, entry: BlackboardEntry) -> None:
+        with self._lock:
+            self._results[key] = entry.result
+            self.entries.append(entry)
+
+    def post(self, name: str, value: Any) -> None:
+        """Publish a value for later tasks in this run"""
+        with self._lock:
+            self.notes[name] = value
+
+    def read(self, tool: Optional[str] = None) -> List[BlackboardEntry]:
+        """Tool results recorded so far, optionally for one tool, oldest first"""
+        with self._lock:
+            return [entry for entry in self.entries if tool is None or entry.tool == tool]
+
+    def summary(self, max_chars: int = 2000) -> str:
+        """Plain-text digest of the blackboard for an agent to read"""
+        lines = [f"{name}: {value}" for name, value in self.notes.items()]
+        for entry in self.read():
+            args = json.dumps(entry.arguments, sort_keys=True, default=str)
+            lines.append(f"[{entry.tool} {args}] {str(entry.result)[:max_chars]}")
+        return "\n".join(lines) or "Nothing has been fetched in this run yet."
+
+class ToolMemo:
+    """Memoizes tool calls within a crew run, and across runs for tools given a TTL"""
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self.settings = settings or load_tool_memo_settings()
+        self.enabled = bool(self.settings.get('enabled', True))
+        self.ttls: Dict[str, float] = dict(self.settings.get('ttl_seconds', {}) or {})
+        self.max_entries = int(self.settings.get('max_entries', 1000))
+        self._shared: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._run: contextvars.ContextVar[Optional[RunMemo]] = contextvars.ContextVar(
+            'astrogeo_tool_run_memo', default=None)
+
+    @contextmanager
+    def run_scope(self) -> Iterator[RunMemo]:
+        """Bind a fresh run memo for the duration of one crew run (nested scopes reuse the outer run)"""
+        current = self._run.get()
+        if current is not None:
+            yield current
+            return
+        memo = RunMemo()
+        token = self._run.set(memo)
+        try:
+            yield memo
+        finally:
+            self._run.reset(token)
+            if memo.hits or memo.misses:
+                logger.info(f"Tool memo: {memo.hits} repeated tool calls served, {memo.misses} executed")
+
+    def current(self) -> Optional[RunMemo]:
+        return self._run.get()
+
+    def _shared_get(self, tool_name: str, key: str) -> Tuple[bool, Any]:
+        if not self.ttls.get(tool_name):
+            return False, None
+        with self._lock:
+            cached = self._shared.get(key)
+            if cached and cached[0] > time.time():
+                return True, cached[1]
+            self._shared.pop(key, None)
+        return False, None
+
+    def _shared_put(self, tool_name: str, key: str, result: Any) -> None:
+        ttl = float(self.ttls.get(tool_name) or 0)
+        if not ttl:
+            return
+        with self._lock:
+            self._shared[key] = (time.time() + ttl, result)
+            if len(self._shared) > self.max_entries:
+                now = time.time()
+                for stale in [k for k, (expires, _) in self._shared.items() if expires <= now]:
+                    del self._shared[stale]
+                while len(self._shared) > self.max_entries:
+                    self._shared.pop(next(iter(self._shared)))
+
+    def call(self, tool_name: str, arguments: Dict[str, Any], run: Callable[[], Any]) -> Any:
+        """Return a memoized result for this call, or run it and record the result"""
+        memo = self._run.get()
+        if not self.enabled or (memo is None and not self.ttls.get(tool_name)):
+            return run()
+
+        key = tool_call_key(tool_name, arguments)
+        if memo is None:
+            found, result = self._shared_get(tool_name, key)
+            if not found:
+                result = run()
+                if not isinstance(result, ToolFailure):
+                    self._shared_put(tool_name, key, result)
+            return result
+
+        with memo.key_lock(key):
+            found, result = memo.lookup(key)
+            if found:
+                return result
+            found, result = self._shared_get(tool_name, key)
+            if not found:
+                result = run()
+                if isinstance(result, ToolFailure):
+                    return result
+                self._shared_put(tool_name, key, result)
+            memo.store(key, BlackboardEntry(tool_name, arguments, result, task=current_task()))
+            return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._shared.clear()
+
+# Global tool memo; runs are scoped per crew kickoff
+tool_memo = ToolMemo()
+
+def memoized_tool(run_method: Callable) -> Callable:
+    """Decorate a BaseTool._run so identical calls within a crew run execute once"""
+    signature = inspect.signature(run_method)
+
+    @wraps(run_method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = {name: value for name, value in bound.arguments.items() if name != 'self'}
+        tool_name = getattr(self, 'name', type(self).__name__)
+        return tool_memo.call(tool_name, arguments, lambda: run_method(self, *args, **kwargs))
+    return wrapper
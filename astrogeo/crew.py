@@ -2,24 +2,61 @@ from crewai import Agent, Crew, Process, Task, LLM
 from crewai.project import CrewBase, agent, crew, task
 import os
 
-# Hugging Face model configuration
-hf_llm = LLM(
-    model="microsoft/DialoGPT-large",
-    api_key=os.getenv("HF_API_TOKEN", "hf_your_token_here"),
-    base_url="https://api-inference.huggingface.co/models/microsoft/DialoGPT-large"
-)
+from .bench.local_llm import LocalLLM
+from .cache.llm_cache import enable_crew_llm_cache
+from .crew_dag import run_batch
+from .crew_pool import CrewPool
+from .tools.blackboard_tool import blackboard_tool
+from .tools.bhuvan_api import bhuvan_api_tool
+from .tools.esa_api import esa_api_tool
+from .tools.isro_api import isro_api_tool
+from .tools.nasa_api import (nasa_apod_tool, nasa_asteroid_tool, nasa_mars_rover_tool,
+                             nasa_solar_activity_tool)
+from .tools.weather_api import intelligent_air_quality_tool, intelligent_weather_tool
+
+# ASTROGEO_LLM_BACKEND=local swaps in the offline stand-in used for benchmarks
+if os.getenv("ASTROGEO_LLM_BACKEND") == "local":
+    hf_llm = LocalLLM.from_env()
+else:
+    # Hugging Face model configuration
+    hf_llm = LLM(
+        model="microsoft/DialoGPT-large",
+        api_key=os.getenv("HF_API_TOKEN", "hf_your_token_here"),
+        base_url="https://api-inference.huggingface.co/models/microsoft/DialoGPT-large"
+    )
+
+NASA_TOOLS = [nasa_apod_tool, nasa_asteroid_tool, nasa_solar_activity_tool, nasa_mars_rover_tool]
+EARTH_TOOLS = [intelligent_weather_tool, intelligent_air_quality_tool, bhuvan_api_tool, isro_api_tool, esa_api_tool]
+
+# Placeholders used by the crew's task descriptions; callers override what they know
+DEFAULT_INPUTS = {
+    'data_categories': 'astronomy and earth observation',
+    'time_range': 'current',
+    'celestial_objects': 'the objects in the query',
+    'geographic_region': 'global',
+    'dataset_category': 'space_data',
+}
+
+def crew_inputs(query: str, **values) -> dict:
+    """Inputs for AstroGeoCrew: defaults for every task placeholder, the query, then values"""
+    return {**DEFAULT_INPUTS, 'topic': query, 'celestial_objects': query, **values}
 
 @CrewBase
 class AstroGeoCrew():
-    """AstroGeo AI crew using Hugging Face"""
+    """AstroGeo AI crew using Hugging Face
+
+    Data harvesting runs first; the astronomical and geospatial analyses
+    both depend on it (depends_on in tasks.yaml, context here) and run
+    concurrently in dag mode; quality validation reviews all three.
+    """
 
     agents_config = 'config/agents.yaml'
     tasks_config = 'config/tasks.yaml'
 
-    @agent
-    def astronomical_agent(self) -> Agent:
+    def _agent(self, name: str, tools) -> Agent:
         return Agent(
-            config=self.agents_config['astronomical_agent'],
+            config=self.agents_config[name],
+            tools=tools,
             verbose=True,
             llm=hf_llm,  # YOUR MODEL!
             max_execution_time=60,
@@ -27,36 +64,65 @@ class AstroGeoCrew():
         )
 
     @agent
-    def geospatial_agent(self) -> Agent:
-        return Agent(
-            config=self.agents_config['geospatial_agent'],
-            verbose=True,
-            llm=hf_llm,  # YOUR MODEL!
-            max_execution_time=60,
-            max_retry_limit=3
-        )
+    def data_harvesting_agent(self) -> Agent:
+        return self._agent('data_harvesting_agent', NASA_TOOLS + EARTH_TOOLS)
 
     @agent
-    def weather_agent(self) -> Agent:
-        return Agent(
-            config=self.agents_config['weather_agent'],
-            verbose=True,
-            llm=hf_llm,  # YOUR MODEL!
-            max_execution_time=60,
-            max_retry_limit=3
+    def astronomical_intelligence_agent(self) -> Agent:
+        return self._agent('astronomical_intelligence_agent', [blackboard_tool] + NASA_TOOLS)
+
+    @agent
+    def geospatial_analytics_agent(self) -> Agent:
+        return self._agent('geospatial_analytics_agent', [blackboard_tool] + EARTH_TOOLS)
+
+    @agent
+    def quality_assurance_agent(self) -> Agent:
+        return self._agent('quality_assurance_agent', [blackboard_tool])
+
+    @task
+    def data_harvesting_task(self) -> Task:
+        return Task(
+            config=self.tasks_config['data_harvesting_task'],
+            agent=self.data_harvesting_agent(),
         )
 
     @task
-    def astrogeo_analysis_task(self) -> Task:
+    def astronomical_analysis_task(self) -> Task:
         return Task(
-            config=self.tasks_config['astrogeo_analysis_task'],
+            config=self.tasks_config['astronomical_analysis_task'],
+            agent=self.astronomical_intelligence_agent(),
+            context=[self.data_harvesting_task()],
         )
 
+    @task
+    def geospatial_analysis_task(self) -> Task:
+        return Task(
+            config=self.tasks_config['geospatial_analysis_task'],
+            agent=self.geospatial_analytics_agent(),
+            context=[self.data_harvesting_task()],
+        )
+
+    @task
+    def quality_validation_task(self) -> Task:
+        return Task(
+            config=self.tasks_config['quality_validation_task'],
+            agent=self.quality_assurance_agent(),
+            context=[self.data_harvesting_task(), self.astronomical_analysis_task(),
+                     self.geospatial_analysis_task()],
+        )
+
+    def kickoff_batch(self, inputs_list, max_workers=None):
+        """Run the crew over many inputs concurrently, yielding a BatchItem as each finishes"""
+        # Built once, then copied per run so concurrent runs never share task state
+        pool = CrewPool(self.crew).warm()
+        return run_batch(pool.acquire, inputs_list, max_workers)
+
     @crew
     def crew(self) -> Crew:
-        return Crew(
+        # Repeated prompts (same model, prompt and decoding parameters) are served from disk
+        return enable_crew_llm_cache(Crew(
             agents=self.agents,
             tasks=self.tasks,
             process=Process.sequential,
             verbose=True,
-        )
+        ))
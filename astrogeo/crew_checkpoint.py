@@ -0,0 +1,73 @@
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from .cache.tool_memo import BlackboardEntry, RunMemo, tool_call_key
+from .db.repository import CheckpointRepository
+from .db.session import DatabaseManager, db_manager
+
+@dataclass
+class TaskRecord:
+    """A task's persisted output and the tool calls it made"""
+    output: str
+    position: int = 0
+    tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+
+def _json_safe(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=str))
+
+class RunCheckpoint:
+    """Completed tasks of one crew run, persisted as they finish so a retry resumes where it stopped
+
+    Checkpoints are only reused for the same inputs; a run retried with
+    different inputs starts over. Writes are best-effort: a failed save is
+    logged and the run continues, it just resumes from an earlier task.
+    """
+
+    def __init__(self, run_id: str, database: Optional[DatabaseManager] = None):
+        self.run_id = run_id
+        self.database = database or db_manager
+
+    def completed(self, inputs: Optional[Dict[str, Any]] = None) -> Dict[str, TaskRecord]:
+        """Tasks already finished in an earlier attempt, by task name"""
+        with self.database.session() as db:
+            rows = CheckpointRepository(db).get_checkpoints(self.run_id)
+            records = {row.task_name: TaskRecord(row.output, row.position or 0, list(row.tool_calls or []))
+                       for row in rows
+                       if inputs is None or row.inputs is None or row.inputs == _json_safe(inputs)}
+        if len(records) < len(rows):
+            logger.info(f"Run {self.run_id} inputs changed since its checkpoints; starting over")
+            return {}
+        return records
+
+    def restore_tool_calls(self, records: Dict[str, TaskRecord], memo: Optional[RunMemo]) -> None:
+        """Replay the tool calls of completed tasks into the run memo, so later tasks reuse them"""
+        if memo is None:
+            return
+        for name, record in records.items():
+            for call in record.tool_calls:
+                key = tool_call_key(call['tool'], call['arguments'])
+                memo.store(key, BlackboardEntry(call['tool'], call['arguments'], call['result'], task=name))
+
+    def save(self, task_name: str, position: int, output: str, inputs: Optional[Dict[str, Any]] = None,
+             tool_calls: Optional[List[BlackboardEntry]] = None) -> None:
+        """Persist one completed task"""
+        calls = [{'tool': entry.tool, 'arguments': entry.arguments, 'result': entry.result}
+                 for entry in tool_calls or []]
+        try:
+            with self.database.session() as db:
+                CheckpointRepository(db).save_checkpoint(self.run_id, task_name, position, output,
+                                                         tool_calls=_json_safe(calls),
+                                                         inputs=_json_safe(inputs) if inputs is not None else None)
+        except Exception as e:
+            logger.error(f"Failed to checkpoint {task_name} of run {self.run_id}: {e}")
+
+    def clear(self) -> None:
+        """Drop the run's checkpoints once it has finished"""
+        try:
+            with self.database.session() as db:
+                CheckpointRepository(db).delete_checkpoints(self.run_id)
+        except Exception as e:
+            logger.error(f"Failed to clear checkpoints of run {self.run_id}: {e}")
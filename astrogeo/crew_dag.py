@@ -0,0 +1,305 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import yaml
+from loguru import logger
+
+from .cache import llm_cache as completion_cache
+from .cache.tool_memo import tool_memo
+from .monitoring.tracing import tracer
+
+DEFAULT_CREW_SETTINGS = {
+    'execution_mode': 'sequential',
+    'max_parallel_tasks': 3,
+    'batch_max_concurrency': 4,
+    'batch_max_items': 500,
+}
+
+_dependency_cache: Dict[str, Any] = {}
+
+def load_crew_settings(config_path: str = "config/settings.yaml") -> Dict[str, Any]:
+    """Load the crew_ai section of settings.yaml merged over defaults"""
+    settings = dict(DEFAULT_CREW_SETTINGS)
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            settings.update(config.get('crew_ai', {}) or {})
+    except Exception as e:
+        logger.warning(f"Using default crew settings: {e}")
+    return settings
+
+def load_task_dependencies(config_path: str = "config/tasks.yaml") -> Dict[str, List[str]]:
+    """Read depends_on lists from tasks.yaml, re-parsing only when the file changes"""
+    try:
+        mtime = os.path.getmtime(config_path)
+    except OSError:
+        return {}
+    cached = _dependency_cache.get(config_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+    except Exception as e:
+        logger.warning(f"Could not read task dependencies: {e}")
+        return {}
+    dependencies = {name: list(task.get('depends_on', []) or [])
+                    for name, task in config.items() if isinstance(task, dict)}
+    _dependency_cache[config_path] = (mtime, dependencies)
+    return dependencies
+
+def task_name(task, index: int) -> str:
+    """Name CrewBase gives a task (its factory method), or its position"""
+    return getattr(task, 'name', None) or f"task_{index}"
+
+def build_task_graph(tasks: List[Any], declared: Dict[str, List[str]], chain: bool = False) -> Dict[int, Set[int]]:
+    """Map each task index to the indices it depends on
+
+    Dependencies come from depends_on in tasks.yaml and from a task's own
+    context list; tasks with neither are independent. With chain=True a
+    task without a context list depends on every earlier task, as in a
+    sequential crew.
+    """
+    index_by_name = {task_name(task, i): i for i, task in enumerate(tasks)}
+    index_by_id = {id(task): i for i, task in enumerate(tasks)}
+    graph: Dict[int, Set[int]] = {}
+    for i, task in enumerate(tasks):
+        deps = {index_by_name[name] for name in declared.get(task_name(task, i), []) if name in index_by_name}
+        context = getattr(task, 'context', None)
+        if isinstance(context, list):
+            deps.update(index_by_id[id(dep)] for dep in context if id(dep) in index_by_id)
+        elif chain:
+            deps.update(range(i))
+        deps.discard(i)
+        graph[i] = deps
+
+    # Kahn's algorithm purely to reject cycles before anything runs
+    remaining = {i: set(deps) for i, deps in graph.items()}
+    while remaining:
+        ready = [i for i, deps in remaining.items() if not deps]
+        if not ready:
+            cycle = ", ".join(task_name(tasks[i], i) for i in sorted(remaining))
+            raise ValueError(f"Task dependencies form a cycle: {cycle}")
+        for i in ready:
+            del remaining[i]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return graph
+
+def prepare_crew(crew, inputs: Optional[Dict[str, Any]] = None) -> None:
+    """The setup kickoff() does before running tasks, through crewai's public Task and Agent API
+
+    Fills {placeholders} in task and agent texts, and gives agents without a
+    step_callback the crew's, so tool steps reach streaming clients.
+    """
+    tasks = list(crew.tasks)
+    agents = {id(agent): agent for agent in list(getattr(crew, 'agents', None) or [])
+              + [getattr(task, 'agent', None) for task in tasks] if agent is not None}
+    if inputs:
+        for task in tasks:
+            # Renamed in newer crewai releases
+            interpolate = getattr(task, 'interpolate_inputs_and_add_conversation_history', None) or \
+                getattr(task, 'interpolate_inputs', None)
+            if interpolate is not None:
+                interpolate(inputs)
+        for agent in agents.values():
+            if hasattr(agent, 'interpolate_inputs'):
+                agent.interpolate_inputs(inputs)
+    step_callback = getattr(crew, 'step_callback', None)
+    if step_callback is not None:
+        for agent in agents.values():
+            if hasattr(agent, 'step_callback') and agent.step_callback is None:
+                agent.step_callback = step_callback
+
+def execute_crewai_task(task, context: Optional[str]):
+    """Run one crewai Task on its own agent with upstream outputs as context"""
+    return task.execute_sync(agent=task.agent, context=context)
+
+@dataclass
+class DagResult:
+    """Crew output assembled from a DAG run; str() gives the final report"""
+    raw: str
+    tasks_output: List[Any] = field(default_factory=list)
+    task_durations: Dict[str, float] = field(default_factory=dict)
+    resumed: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return self.raw
+
+class DagExecutor:
+    """Run a crew's tasks as a dependency graph on a bounded thread pool
+
+    Independent tasks run concurrently; a dependent task starts once all of
+    its upstream tasks finish and receives their outputs as context. Tasks
+    sharing an agent never overlap, since crewai agents keep per-run state.
+    The final report lists the outputs of tasks nothing depends on, in the
+    order the crew declares them, so it does not depend on finishing order.
+
+    chain=True runs the tasks one at a time in declared order with sequential
+    crew semantics. Given a RunCheckpoint, each finished task is persisted and
+    tasks an earlier attempt already finished are not run again.
+    """
+
+    def __init__(self, max_workers: int = 3, run_task: Callable[[Any, Optional[str]], Any] = execute_crewai_task,
+                 tasks_config_path: str = "config/tasks.yaml", chain: bool = False):
+        self.max_workers = 1 if chain else max_workers
+        self.run_task = run_task
+        self.tasks_config_path = tasks_config_path
+        self.chain = chain
+
+    def run(self, crew, inputs: Optional[Dict[str, Any]] = None, checkpoint=None) -> DagResult:
+        tasks = list(crew.tasks)
+        declared = {} if self.chain else load_task_dependencies(self.tasks_config_path)
+        graph = build_task_graph(tasks, declared, chain=self.chain)
+        prepare_crew(crew, inputs)
+
+        agent_locks: Dict[int, threading.Lock] = {}
+        for task in tasks:
+            agent_locks.setdefault(id(getattr(task, 'agent', None)), threading.Lock())
+
+        outputs: Dict[int, Any] = {}
+        durations: Dict[str, float] = {}
+        task_callback = getattr(crew, 'task_callback', None)
+
+        resumed: List[str] = []
+        if checkpoint is not None:
+            records = checkpoint.completed(inputs)
+            for i, task in enumerate(tasks):
+                if task_name(task, i) in records:
+                    outputs[i] = records[task_name(task, i)].output
+                    resumed.append(task_name(task, i))
+            checkpoint.restore_tool_calls(records, tool_memo.current())
+            if resumed:
+                logger.info(f"Resuming run {checkpoint.run_id}: {len(resumed)} of {len(tasks)} tasks already done")
+                if task_callback is not None:
+                    # Progress starts afresh on a retry, so report restored outputs as finished tasks
+                    for name in resumed:
+                        task_callback(records[name].output)
+
+        def run_one(i: int):
+            task = tasks[i]
+            deps = sorted(graph[i])
+            context = "\n\n".join(f"## {task_name(tasks[d], d)}\n{self._text(outputs[d])}" for d in deps) or None
+            with agent_locks[id(getattr(task, 'agent', None))], tracer.span("crew.task", task=task_name(task, i)), \
+                    completion_cache.task_scope(task_name(task, i)):
+                start = time.perf_counter()
+                output = self.run_task(task, context)
+                durations[task_name(task, i)] = time.perf_counter() - start
+            if checkpoint is not None:
+                memo = tool_memo.current()
+                calls = [entry for entry in memo.read() if entry.task == task_name(task, i)] if memo else []
+                checkpoint.save(task_name(task, i), i, self._text(output), inputs, calls)
+            if task_callback is not None:
+                task_callback(output)
+            return output
+
+        pending = {i: deps for i, deps in graph.items() if i not in outputs}
+        running: Dict[Future, int] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crew-dag") as pool:
+            while pending or running:
+                for i in sorted(i for i, deps in pending.items() if deps.issubset(outputs)):
+                    del pending[i]
+                    # Each task gets its own copy of the caller's context (tracing, streaming)
+                    running[pool.submit(contextvars.copy_context().run, run_one, i)] = i
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    outputs[i] = future.result()
+
+        dependents = set().union(*graph.values()) if graph else set()
+        sinks = [i for i in range(len(tasks)) if i not in dependents]
+        if len(sinks) == 1:
+            raw = self._text(outputs[sinks[0]])
+        else:
+            raw = "\n\n".join(f"## {task_name(tasks[i], i)}\n{self._text(outputs[i])}" for i in sinks)
+        return DagResult(raw=raw, tasks_output=[outputs[i] for i in range(len(tasks))], task_durations=durations,
+                         resumed=resumed)
+
+    @staticmethod
+    def _text(output) -> str:
+        return str(getattr(output, 'raw', output))
+
+def run_crew(crew, inputs: Dict[str, Any], settings: Optional[Dict[str, Any]] = None, checkpoint=None):
+    """Kick off a crew sequentially or as a task DAG, per crew_ai.execution_mode
+
+    Identical tool calls made anywhere in the run execute once (see tool_memo).
+    With a RunCheckpoint (crew_checkpoint) the run persists each finished
+    task and skips those an earlier attempt of the same run completed.
+    """
+    with tool_memo.run_scope():
+        return _kickoff(crew, inputs, settings or crew_settings, checkpoint)
+
+def _kickoff(crew, inputs: Dict[str, Any], settings: Dict[str, Any], checkpoint=None):
+    dag = settings.get('execution_mode') == 'dag'
+    if checkpoint is not None or (dag and len(getattr(crew, 'tasks', [])) > 1):
+        # kickoff() cannot skip tasks, so checkpointed sequential runs go through the executor in chain mode
+        return DagExecutor(max_workers=int(settings.get('max_parallel_tasks', 3)), chain=not dag).run(
+            crew, inputs, checkpoint)
+    skip = completion_cache.llm_cache.skip_tasks
+    if any(task_name(task, i) in skip for i, task in enumerate(getattr(crew, 'tasks', []))):
+        # Sequential kickoff cannot tell which task an LLM call belongs to, so honour opt-outs crew-wide
+        with completion_cache.bypass():
+            return crew.kickoff(inputs=inputs)
+    return crew.kickoff(inputs=inputs)
+
+def dedupe_inputs(inputs_list: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[List[int]]]:
+    """Collapse identical inputs; returns the unique inputs and, for each, the positions it came from"""
+    unique: List[Dict[str, Any]] = []
+    positions: List[List[int]] = []
+    seen: Dict[str, int] = {}
+    for index, inputs in enumerate(inputs_list):
+        key = json.dumps(inputs, sort_keys=True, default=str)
+        if key not in seen:
+            seen[key] = len(unique)
+            unique.append(inputs)
+            positions.append([])
+        positions[seen[key]].append(index)
+    return unique, positions
+
+@dataclass
+class BatchItem:
+    """Outcome of one distinct input in a batch run"""
+    indices: List[int]
+    inputs: Dict[str, Any]
+    result: Any = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+def run_batch(acquire: Callable[[], Any], inputs_list: List[Dict[str, Any]], max_workers: Optional[int] = None,
+              settings: Optional[Dict[str, Any]] = None) -> Iterator[BatchItem]:
+    """Run a crew over many inputs on a bounded thread pool, yielding each result as it finishes
+
+    Identical inputs run once and report every position they occupied.
+    Threads rather than processes, so every run shares this process's LLM
+    completion cache, tool memo TTLs and provider session. acquire() must
+    return a fresh crew per call (CrewPool.acquire).
+    """
+    settings = settings or crew_settings
+    unique, positions = dedupe_inputs(inputs_list)
+    workers = max(1, min(max_workers or int(settings.get('batch_max_concurrency', 4)), len(unique) or 1))
+    if len(unique) < len(inputs_list):
+        logger.info(f"Batch of {len(inputs_list)} inputs has {len(unique)} distinct runs")
+
+    def run_one(inputs: Dict[str, Any]) -> Tuple[Any, float]:
+        start = time.perf_counter()
+        return run_crew(acquire(), inputs, settings), time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crew-batch") as pool:
+        futures = {pool.submit(contextvars.copy_context().run, run_one, inputs): i for i, inputs in enumerate(unique)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result, seconds = future.result()
+                yield BatchItem(positions[i], unique[i], result=result, seconds=seconds)
+            except Exception as e:
+                logger.error(f"Batch run failed for {unique[i]}: {e}")
+                yield BatchItem(positions[i], unique[i], error=str(e))
+
+# Loaded once per process
+crew_settings = load_crew_settings()
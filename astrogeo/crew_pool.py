@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from loguru import logger
+
+DEFAULT_CONFIG_PATHS = ("config/agents.yaml", "config/tasks.yaml")
+
+class CrewPool:
+    """Build a crew once per process and hand out cheap isolated copies
+
+    Building runs every @agent/@task factory (YAML parsing, Agent and tool
+    construction). Each request instead gets template.copy(), which clones
+    agents and tasks so task outputs never leak between requests. The
+    template is rebuilt when any watched config file changes.
+    """
+
+    def __init__(self, factory: Callable[[], Any], config_paths: Sequence[str] = DEFAULT_CONFIG_PATHS,
+                 check_interval: float = 2.0):
+        self.factory = factory
+        self.config_paths = list(config_paths)
+        self.check_interval = check_interval
+        self._template = None
+        self._mtimes: Dict[str, Optional[float]] = {}
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._template is not None
+
+    def _config_mtimes(self) -> Dict[str, Optional[float]]:
+        mtimes = {}
+        for path in self.config_paths:
+            try:
+                mtimes[path] = os.path.getmtime(path)
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def _build(self) -> None:
+        start = time.perf_counter()
+        mtimes = self._config_mtimes()
+        self._template = self.factory()
+        self._mtimes = mtimes
+        self._last_check = time.monotonic()
+        self.builds += 1
+        logger.info(f"Crew template built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def _stale(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        return self._config_mtimes() != self._mtimes
+
+    def warm(self) -> "CrewPool":
+        """Build the template now rather than on the first request"""
+        with self._lock:
+            if self._template is None:
+                self._build()
+        return self
+
+    def template(self):
+        """Current template crew, rebuilt first if its config changed"""
+        with self._lock:
+            if self._template is None:
+                self._build()
+            elif self._stale():
+                logger.info("Crew config changed, rebuilding template")
+                self._build()
+            return self._template
+
+    def acquire(self):
+        """An isolated crew for one request"""
+        template = self.template()
+        copy = getattr(template, 'copy', None)
+        if copy is None:
+            return self.factory()
+        return copy()
+
+    def invalidate(self) -> None:
+        """Drop the template so the next request rebuilds it"""
+        with self._lock:
+            self._template = None
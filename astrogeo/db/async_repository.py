@@ -0,0 +1,305 @@
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+from datetime import datetime
+from sqlalchemy import select, and_, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from .models import User, QueryLog, ApiUsage, Feedback, QueryJob, TaskCheckpoint
+from .pagination import Page, keyset_select, build_page
+from .fulltext import fulltext_select
+
+async def _fetch_page(session: AsyncSession, model, filters: List[Any], limit: int,
+                      cursor: Optional[str], columns: Optional[Sequence[str]]) -> Page:
+    """Run a keyset query and wrap the rows in a Page"""
+    stmt = keyset_select(model, filters, cursor=cursor, limit=limit, columns=columns)
+    result = await session.execute(stmt)
+    rows = result.all() if columns else result.scalars().all()
+    return build_page(model, rows, limit, columns)
+
+async def _get_by_id(session: AsyncSession, model, row_id: int):
+    result = await session.execute(select(model).where(model.id == row_id))
+    return result.scalars().first()
+
+async def _create(session: AsyncSession, instance):
+    session.add(instance)
+    await session.commit()
+    await session.refresh(instance)
+    return instance
+
+async def _update(session: AsyncSession, instance, update_data: Dict[str, Any]):
+    if instance:
+        for key, value in update_data.items():
+            setattr(instance, key, value)
+        await session.commit()
+        await session.refresh(instance)
+    return instance
+
+class AsyncUserRepository:
+    """Async repository for User CRUD operations"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_user(self, user_data: Dict[str, Any]) -> User:
+        """Create a new user"""
+        return await _create(self.session, User(**user_data))
+
+    async def get_user_by_id(self, user_id: int) -> Optional[User]:
+        """Get user by ID"""
+        return await _get_by_id(self.session, User, user_id)
+
+    async def get_user_by_username(self, username: str) -> Optional[User]:
+        """Get user by username"""
+        result = await self.session.execute(select(User).where(User.username == username))
+        return result.scalars().first()
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        """Get user by email"""
+        result = await self.session.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+
+    async def update_user(self, user_id: int, update_data: Dict[str, Any]) -> Optional[User]:
+        """Update user information"""
+        return await _update(self.session, await self.get_user_by_id(user_id), update_data)
+
+    async def delete_user(self, user_id: int) -> bool:
+        """Soft delete user by setting is_active to False"""
+        user = await self.get_user_by_id(user_id)
+        if user:
+            user.is_active = False
+            await self.session.commit()
+            return True
+        return False
+
+    async def update_last_login(self, user_id: int) -> None:
+        """Update user's last login timestamp"""
+        user = await self.get_user_by_id(user_id)
+        if user:
+            user.last_login = datetime.utcnow()
+            await self.session.commit()
+
+class AsyncQueryLogRepository:
+    """Async repository for QueryLog CRUD operations"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_query_log(self, log_data: Dict[str, Any]) -> QueryLog:
+        """Create a new query log entry"""
+        return await _create(self.session, QueryLog(**log_data))
+
+    async def get_query_log_by_id(self, log_id: int) -> Optional[QueryLog]:
+        """Get query log by ID"""
+        return await _get_by_id(self.session, QueryLog, log_id)
+
+    async def get_user_query_logs(self, user_id: int, limit: int = 50, cursor: Optional[str] = None,
+                                  columns: Optional[Sequence[str]] = None) -> Page:
+        """Get a page of recent query logs for a specific user"""
+        return await _fetch_page(self.session, QueryLog, [QueryLog.user_id == user_id],
+                                 limit, cursor, columns)
+
+    async def get_query_logs_by_type(self, query_type: str, limit: int = 100, cursor: Optional[str] = None,
+                                     columns: Optional[Sequence[str]] = None) -> Page:
+        """Get a page of query logs by type"""
+        return await _fetch_page(self.session, QueryLog, [QueryLog.query_type == query_type],
+                                 limit, cursor, columns)
+
+    async def search_query_logs(self, query_text: str, start_date: Optional[datetime] = None,
+                                end_date: Optional[datetime] = None, query_type: Optional[str] = None,
+                                limit: int = 50) -> List[Tuple[QueryLog, float]]:
+        """Full-text search for logs containing every term, best match first"""
+        stmt = fulltext_select(self.session.bind.dialect.name, query_text,
+                               start_date=start_date, end_date=end_date,
+                               query_type=query_type, limit=limit)
+        if stmt is None:
+            return []
+        result = await self.session.execute(stmt)
+        return [(log, float(rank or 0.0)) for log, rank in result.all()]
+
+    async def find_similar_queries(self, query_text: str, since: Optional[datetime] = None,
+                                   query_type: Optional[str] = None, exclude_id: Optional[int] = None,
+                                   limit: int = 10) -> List[Tuple[QueryLog, float]]:
+        """Find past queries sharing terms with this one, most alike first"""
+        stmt = fulltext_select(self.session.bind.dialect.name, query_text, match_any=True,
+                               start_date=since, query_type=query_type,
+                               exclude_id=exclude_id, limit=limit)
+        if stmt is None:
+            return []
+        result = await self.session.execute(stmt)
+        return [(log, float(rank or 0.0)) for log, rank in result.all()]
+
+    async def update_query_log(self, log_id: int, update_data: Dict[str, Any]) -> Optional[QueryLog]:
+        """Update query log information"""
+        return await _update(self.session, await self.get_query_log_by_id(log_id), update_data)
+
+    async def get_query_statistics(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """Get query statistics for a date range"""
+        in_range = and_(QueryLog.created_at >= start_date, QueryLog.created_at <= end_date)
+        stats = {}
+
+        stats['total_queries'] = (await self.session.execute(
+            select(func.count(QueryLog.id)).where(in_range))).scalar()
+
+        query_types = await self.session.execute(
+            select(QueryLog.query_type, func.count(QueryLog.id))
+            .where(in_range)
+            .group_by(QueryLog.query_type))
+        stats['queries_by_type'] = dict(query_types.all())
+
+        avg_time = (await self.session.execute(
+            select(func.avg(QueryLog.processing_time_seconds)).where(in_range))).scalar()
+        stats['avg_processing_time'] = float(avg_time) if avg_time else 0.0
+
+        return stats
+
+class AsyncApiUsageRepository:
+    """Async repository for ApiUsage CRUD operations"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_api_usage(self, usage_data: Dict[str, Any]) -> ApiUsage:
+        """Create a new API usage record"""
+        return await _create(self.session, ApiUsage(**usage_data))
+
+    async def get_api_usage_by_id(self, usage_id: int) -> Optional[ApiUsage]:
+        """Get API usage record by ID"""
+        return await _get_by_id(self.session, ApiUsage, usage_id)
+
+    async def get_api_usage_by_provider(self, provider: str, limit: int = 100, cursor: Optional[str] = None,
+                                        columns: Optional[Sequence[str]] = None) -> Page:
+        """Get a page of API usage records by provider"""
+        return await _fetch_page(self.session, ApiUsage, [ApiUsage.api_provider == provider],
+                                 limit, cursor, columns)
+
+    async def get_user_api_usage(self, user_id: int, limit: int = 50, cursor: Optional[str] = None,
+                                 columns: Optional[Sequence[str]] = None) -> Page:
+        """Get a page of API usage for a specific user"""
+        return await _fetch_page(self.session, ApiUsage, [ApiUsage.user_id == user_id],
+                                 limit, cursor, columns)
+
+    async def get_api_usage_statistics(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+        """Get API usage statistics for a date range"""
+        in_range = and_(ApiUsage.created_at >= start_date, ApiUsage.created_at <= end_date)
+        stats = {}
+
+        provider_usage = await self.session.execute(
+            select(ApiUsage.api_provider, func.count(ApiUsage.id))
+            .where(in_range)
+            .group_by(ApiUsage.api_provider))
+        stats['usage_by_provider'] = dict(provider_usage.all())
+
+        response_times = await self.session.execute(
+            select(ApiUsage.api_provider, func.avg(ApiUsage.response_time_ms))
+            .where(in_range)
+            .group_by(ApiUsage.api_provider))
+        stats['avg_response_time'] = {provider: float(time) if time else 0.0
+                                     for provider, time in response_times.all()}
+
+        error_counts = await self.session.execute(
+            select(ApiUsage.api_provider, func.count(ApiUsage.id))
+            .where(and_(in_range, ApiUsage.response_status >= 400))
+            .group_by(ApiUsage.api_provider))
+        stats['error_counts'] = dict(error_counts.all())
+
+        return stats
+
+class AsyncFeedbackRepository:
+    """Async repository for Feedback CRUD operations"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_feedback(self, feedback_data: Dict[str, Any]) -> Feedback:
+        """Create a new feedback entry"""
+        return await _create(self.session, Feedback(**feedback_data))
+
+    async def get_feedback_by_id(self, feedback_id: int) -> Optional[Feedback]:
+        """Get feedback by ID"""
+        return await _get_by_id(self.session, Feedback, feedback_id)
+
+    async def get_user_feedback(self, user_id: int, limit: int = 50, cursor: Optional[str] = None,
+                                columns: Optional[Sequence[str]] = None) -> Page:
+        """Get a page of feedback from a specific user"""
+        return await _fetch_page(self.session, Feedback, [Feedback.user_id == user_id],
+                                 limit, cursor, columns)
+
+    async def get_unresolved_feedback(self, limit: int = 100, cursor: Optional[str] = None,
+                                      columns: Optional[Sequence[str]] = None) -> Page:
+        """Get a page of unresolved feedback"""
+        return await _fetch_page(self.session, Feedback, [Feedback.is_resolved == False],
+                                 limit, cursor, columns)
+
+    async def update_feedback(self, feedback_id: int, update_data: Dict[str, Any]) -> Optional[Feedback]:
+        """Update feedback information"""
+        return await _update(self.session, await self.get_feedback_by_id(feedback_id), update_data)
+
+    async def get_feedback_statistics(self) -> Dict[str, Any]:
+        """Get overall feedback statistics"""
+        stats = {}
+
+        avg_rating = (await self.session.execute(select(func.avg(Feedback.rating)))).scalar()
+        stats['average_rating'] = float(avg_rating) if avg_rating else 0.0
+
+        rating_counts = await self.session.execute(
+            select(Feedback.rating, func.count(Feedback.id)).group_by(Feedback.rating))
+        stats['ratings_distribution'] = dict(rating_counts.all())
+
+        category_counts = await self.session.execute(
+            select(Feedback.category, func.count(Feedback.id)).group_by(Feedback.category))
+        stats['feedback_by_category'] = dict(category_counts.all())
+
+        resolution_stats = await self.session.execute(
+            select(Feedback.is_resolved, func.count(Feedback.id)).group_by(Feedback.is_resolved))
+        stats['resolution_status'] = dict(resolution_stats.all())
+
+        return stats
+
+class AsyncJobRepository:
+    """Async repository for QueryJob rows, used by the API process"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_job(self, job_data: Dict[str, Any]) -> QueryJob:
+        """Create a new queued job"""
+        return await _create(self.session, QueryJob(**job_data))
+
+    async def get_job(self, job_id: str) -> Optional[QueryJob]:
+        """Get job by ID"""
+        result = await self.session.execute(select(QueryJob).where(QueryJob.id == job_id))
+        return result.scalars().first()
+
+    async def finish_job(self, job_id: str, status: str, result: Optional[str] = None,
+                         error_message: Optional[str] = None) -> None:
+        """Record the final status of a job unless it already has one"""
+        job = await self.get_job(job_id)
+        if job and job.status in ('queued', 'running'):
+            await _update(self.session, job, {
+                'status': status,
+                'result': result,
+                'error_message': error_message,
+                'finished_at': datetime.utcnow(),
+            })
+
+    async def requeue_job(self, job_id: str) -> Optional[QueryJob]:
+        """Put a failed job back in the queue for another attempt; None unless it had failed"""
+        job = await self.get_job(job_id)
+        if job is None or job.status != 'failed':
+            return None
+        return await _update(self.session, job, {
+            'status': 'queued',
+            'error_message': None,
+            'finished_at': None,
+            # Checkpointed tasks report their outputs again when the retry resumes them
+            'partial_output': [],
+            'attempts': (job.attempts or 0) + 1,
+        })
+
+    async def purge_expired_jobs(self, now: Optional[datetime] = None) -> int:
+        """Delete jobs past their expiry, and their checkpoints; returns the number of jobs removed"""
+        expired = select(QueryJob.id).where(QueryJob.expires_at <= (now or datetime.utcnow()))
+        await self.session.execute(delete(TaskCheckpoint).where(TaskCheckpoint.run_id.in_(expired)))
+        result = await self.session.execute(
+            delete(QueryJob).where(QueryJob.expires_at <= (now or datetime.utcnow())))
+        await self.session.commit()
+        return result.rowcount
+
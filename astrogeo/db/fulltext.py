@@ -0,0 +1,100 @@
+import re
+from datetime import datetime
+from typing import Any, List, Optional
+
+from sqlalchemy import DDL, and_, column, event, func, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection
+
+from .models import QueryLog
+
+# Longer inputs are cut down; the extra terms add cost without improving ranking
+MAX_SEARCH_TERMS = 32
+
+POSTGRES_FULLTEXT_DDL = [
+    "ALTER TABLE query_logs ADD COLUMN IF NOT EXISTS query_tsv tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', coalesce(query_text, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS idx_query_logs_query_tsv ON query_logs USING GIN (query_tsv)",
+]
+
+# External-content FTS5 table kept in sync with query_logs by triggers
+SQLITE_FULLTEXT_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS query_logs_fts USING fts5("
+    "query_text, content='query_logs', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS query_logs_fts_insert AFTER INSERT ON query_logs BEGIN "
+    "INSERT INTO query_logs_fts(rowid, query_text) VALUES (new.id, new.query_text); END",
+    "CREATE TRIGGER IF NOT EXISTS query_logs_fts_delete AFTER DELETE ON query_logs BEGIN "
+    "INSERT INTO query_logs_fts(query_logs_fts, rowid, query_text) VALUES ('delete', old.id, old.query_text); END",
+    "CREATE TRIGGER IF NOT EXISTS query_logs_fts_update AFTER UPDATE OF query_text ON query_logs BEGIN "
+    "INSERT INTO query_logs_fts(query_logs_fts, rowid, query_text) VALUES ('delete', old.id, old.query_text); "
+    "INSERT INTO query_logs_fts(rowid, query_text) VALUES (new.id, new.query_text); END",
+]
+
+query_logs_fts = table('query_logs_fts', column('rowid'), column('query_text'))
+
+for statement in POSTGRES_FULLTEXT_DDL:
+    event.listen(QueryLog.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+for statement in SQLITE_FULLTEXT_DDL:
+    event.listen(QueryLog.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+def install_fulltext_index(connection: Connection) -> None:
+    """Add the full-text index to an existing database and backfill it"""
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        for statement in POSTGRES_FULLTEXT_DDL:
+            connection.execute(text(statement))
+    elif dialect == 'sqlite':
+        for statement in SQLITE_FULLTEXT_DDL:
+            connection.execute(text(statement))
+        connection.execute(text("INSERT INTO query_logs_fts(query_logs_fts) VALUES ('rebuild')"))
+
+def search_terms(query_text: str) -> List[str]:
+    """Split free text into plain word terms safe to embed in a match expression"""
+    terms = re.findall(r"\w+", query_text.lower())
+    return list(dict.fromkeys(terms))[:MAX_SEARCH_TERMS]
+
+def fulltext_select(dialect: str, query_text: str, match_any: bool = False,
+                    start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                    query_type: Optional[str] = None, exclude_id: Optional[int] = None,
+                    limit: int = 50):
+    """Build a ranked full-text query over query_logs returning (QueryLog, rank) rows
+
+    match_any=False requires every term (search); match_any=True needs any term
+    and lets the ranking sort out which past queries are most alike.
+    """
+    terms = search_terms(query_text)
+    if not terms:
+        return None
+
+    filters: List[Any] = []
+    if start_date is not None:
+        filters.append(QueryLog.created_at >= start_date)
+    if end_date is not None:
+        filters.append(QueryLog.created_at <= end_date)
+    if query_type is not None:
+        filters.append(QueryLog.query_type == query_type)
+    if exclude_id is not None:
+        filters.append(QueryLog.id != exclude_id)
+
+    if dialect == 'postgresql':
+        joiner = ' | ' if match_any else ' & '
+        tsquery = func.to_tsquery('english', joiner.join(terms))
+        tsv = literal_column('query_logs.query_tsv')
+        rank = func.ts_rank_cd(tsv, tsquery).label('rank')
+        stmt = select(QueryLog, rank).where(tsv.op('@@')(tsquery))
+    elif dialect == 'sqlite':
+        joiner = ' OR ' if match_any else ' '
+        match = joiner.join(f'"{term}"' for term in terms)
+        # bm25 is lower-is-better; negate so both dialects sort rank descending
+        rank = (-func.bm25(literal_column('query_logs_fts'))).label('rank')
+        stmt = (select(QueryLog, rank)
+                .join(query_logs_fts, query_logs_fts.c.rowid == QueryLog.id)
+                .where(literal_column('query_logs_fts').op('MATCH')(match)))
+    else:
+        # No full-text support; fall back to a substring scan so callers still work
+        rank = literal_column('0.0').label('rank')
+        conditions = [QueryLog.query_text.ilike(f"%{term}%") for term in terms]
+        stmt = select(QueryLog, rank).where(or_(*conditions) if match_any else and_(*conditions))
+
+    if filters:
+        stmt = stmt.where(and_(*filters))
+    return stmt.order_by(rank.desc(), QueryLog.created_at.desc()).limit(limit)
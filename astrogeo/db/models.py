@@ -1,7 +1,7 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Float, JSON, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 Base = declarative_base()
 
@@ -23,6 +23,11 @@ class User(Base):
 class QueryLog(Base):
     """Log model for tracking user queries and system interactions"""
     __tablename__ = "query_logs"
+    __table_args__ = (
+        # Keyset pagination on (created_at, id) for the list queries in repository.py
+        Index('idx_query_logs_user_created', 'user_id', 'created_at', 'id'),
+        Index('idx_query_logs_type_created', 'query_type', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True)
@@ -40,6 +45,10 @@ class QueryLog(Base):
 class ApiUsage(Base):
     """Track API usage across different space agency endpoints"""
     __tablename__ = "api_usage"
+    __table_args__ = (
+        Index('idx_api_usage_provider_created', 'api_provider', 'created_at', 'id'),
+        Index('idx_api_usage_user_created', 'user_id', 'created_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     api_provider = Column(String(50), nullable=False)  # NASA, ISRO, ESA, Bhuvan
@@ -57,6 +66,11 @@ class ApiUsage(Base):
 class Feedback(Base):
     """User feedback and system performance ratings"""
     __tablename__ = "feedback"
+    __table_args__ = (
+        Index('idx_feedback_user_created', 'user_id', 'created_at', 'id'),
+        Index('idx_feedback_unresolved_created', 'created_at', 'id',
+              postgresql_where=text('is_resolved = FALSE'), sqlite_where=text('is_resolved = 0')),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True)
@@ -69,3 +83,41 @@ class Feedback(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     category = Column(String(50))  # bug, feature_request, improvement, compliment
+
+class QueryJob(Base):
+    """Queued crew run for a query; rows are purged once expires_at passes"""
+    __tablename__ = "query_jobs"
+    __table_args__ = (
+        Index('idx_query_jobs_username_created', 'username', 'created_at'),
+    )
+    
+    id = Column(String(32), primary_key=True)
+    username = Column(String(100))
+    query_text = Column(Text, nullable=False)
+    query_type = Column(String(50))
+    inputs = Column(JSON)  # crew kickoff inputs
+    status = Column(String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    partial_output = Column(JSON)  # task outputs recorded so far, in order
+    result = Column(Text)
+    error_message = Column(Text)
+    attempts = Column(Integer, default=0)  # retries after the first run
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True), index=True)
+
+class TaskCheckpoint(Base):
+    """Output of one completed task in a crew run, kept so a retry only runs the remaining tasks"""
+    __tablename__ = "task_checkpoints"
+    __table_args__ = (
+        UniqueConstraint('run_id', 'task_name', name='uq_task_checkpoints_run_task'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String(32), nullable=False, index=True)  # QueryJob.id for queued runs
+    task_name = Column(String(100), nullable=False)
+    position = Column(Integer)  # task's index in the crew
+    output = Column(Text, nullable=False)
+    tool_calls = Column(JSON)  # [{'tool', 'arguments', 'result'}] made by the task
+    inputs = Column(JSON)  # crew kickoff inputs for the run
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,112 @@
+import base64
+import json
+from collections import namedtuple
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, desc, or_, select
+
+# Projection record types are cached per (model, columns) so repeated page
+# loads reuse the same lightweight class instead of building a new one each time
+_RECORD_TYPES: Dict[Tuple[str, Tuple[str, ...]], type] = {}
+
+
+@dataclass
+class Page:
+    """A single page of results plus the token needed to fetch the next one"""
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    """Encode a (created_at, id) position as an opaque continuation token"""
+    payload = {"c": created_at.isoformat() if created_at else None, "i": row_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Decode a continuation token back into a (created_at, id) position"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        created_at = datetime.fromisoformat(payload["c"]) if payload["c"] else None
+        return created_at, int(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid pagination cursor: {cursor!r}") from e
+
+
+def record_type(model, columns: Sequence[str]) -> type:
+    """Get the slotted record class used for a column projection"""
+    key = (model.__tablename__, tuple(columns))
+    if key not in _RECORD_TYPES:
+        name = f"{model.__name__}Row"
+        _RECORD_TYPES[key] = namedtuple(name, columns)
+    return _RECORD_TYPES[key]
+
+
+def keyset_select(model, filters: Sequence[Any], cursor: Optional[str] = None,
+                  limit: int = 50, columns: Optional[Sequence[str]] = None):
+    """Build a newest-first keyset query on (created_at, id)
+
+    One extra row is fetched so the caller can tell whether another page exists
+    without running a COUNT.
+    """
+    if columns:
+        unknown = [name for name in columns if not hasattr(model, name)]
+        if unknown:
+            raise ValueError(f"Unknown columns for {model.__tablename__}: {', '.join(unknown)}")
+        # created_at and id are always needed to build the next cursor
+        selected = list(columns) + [name for name in ("created_at", "id") if name not in columns]
+        stmt = select(*[getattr(model, name) for name in selected])
+    else:
+        stmt = select(model)
+
+    conditions = list(filters)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        if created_at is None:
+            conditions.append(model.id < row_id)
+        else:
+            conditions.append(or_(model.created_at < created_at,
+                                  and_(model.created_at == created_at, model.id < row_id)))
+
+    if conditions:
+        stmt = stmt.where(and_(*conditions))
+
+    return stmt.order_by(desc(model.created_at), desc(model.id)).limit(limit + 1)
+
+
+def build_page(model, rows: Sequence[Any], limit: int,
+               columns: Optional[Sequence[str]] = None) -> Page:
+    """Turn the rows returned by a keyset query into a Page"""
+    rows = list(rows)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    if columns:
+        record = record_type(model, columns)
+        items = [record(*(getattr(row, name) for name in columns)) for row in rows]
+    else:
+        items = rows
+
+    return Page(items=items, next_cursor=next_cursor)
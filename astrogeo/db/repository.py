@@ -1,8 +1,18 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
-from .models import User, QueryLog, ApiUsage, Feedback
+from sqlalchemy import and_, func
+from .models import User, QueryLog, ApiUsage, Feedback, QueryJob, TaskCheckpoint
+from .pagination import Page, keyset_select, build_page
+from .fulltext import fulltext_select
+
+def _fetch_page(session: Session, model, filters: List[Any], limit: int,
+                cursor: Optional[str], columns: Optional[Sequence[str]]) -> Page:
+    """Run a keyset query and wrap the rows in a Page"""
+    stmt = keyset_select(model, filters, cursor=cursor, limit=limit, columns=columns)
+    result = session.execute(stmt)
+    rows = result.all() if columns else result.scalars().all()
+    return build_page(model, rows, limit, columns)
 
 class UserRepository:
     """Repository for User CRUD operations"""
@@ -74,21 +84,39 @@ class QueryLogRepository:
         """Get query log by ID"""
         return self.session.query(QueryLog).filter(QueryLog.id == log_id).first()
     
-    def get_user_query_logs(self, user_id: int, limit: int = 50) -> List[QueryLog]:
-        """Get recent query logs for a specific user"""
-        return (self.session.query(QueryLog)
-                .filter(QueryLog.user_id == user_id)
-                .order_by(desc(QueryLog.created_at))
-                .limit(limit)
-                .all())
+    def get_user_query_logs(self, user_id: int, limit: int = 50, cursor: Optional[str] = None,
+                            columns: Optional[Sequence[str]] = None) -> Page:
+        """Get a page of recent query logs for a specific user"""
+        return _fetch_page(self.session, QueryLog, [QueryLog.user_id == user_id],
+                           limit, cursor, columns)
     
-    def get_query_logs_by_type(self, query_type: str, limit: int = 100) -> List[QueryLog]:
-        """Get query logs by type"""
-        return (self.session.query(QueryLog)
-                .filter(QueryLog.query_type == query_type)
-                .order_by(desc(QueryLog.created_at))
-                .limit(limit)
-                .all())
+    def get_query_logs_by_type(self, query_type: str, limit: int = 100, cursor: Optional[str] = None,
+                               columns: Optional[Sequence[str]] = None) -> Page:
+        """Get a page of query logs by type"""
+        return _fetch_page(self.session, QueryLog, [QueryLog.query_type == query_type],
+                           limit, cursor, columns)
+    
+    def search_query_logs(self, query_text: str, start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None, query_type: Optional[str] = None,
+                          limit: int = 50) -> List[Tuple[QueryLog, float]]:
+        """Full-text search for logs containing every term, best match first"""
+        stmt = fulltext_select(self.session.get_bind().dialect.name, query_text,
+                               start_date=start_date, end_date=end_date,
+                               query_type=query_type, limit=limit)
+        if stmt is None:
+            return []
+        return [(log, float(rank or 0.0)) for log, rank in self.session.execute(stmt).all()]
+    
+    def find_similar_queries(self, query_text: str, since: Optional[datetime] = None,
+                             query_type: Optional[str] = None, exclude_id: Optional[int] = None,
+                             limit: int = 10) -> List[Tuple[QueryLog, float]]:
+        """Find past queries sharing terms with this one, most alike first"""
+        stmt = fulltext_select(self.session.get_bind().dialect.name, query_text, match_any=True,
+                               start_date=since, query_type=query_type,
+                               exclude_id=exclude_id, limit=limit)
+        if stmt is None:
+            return []
+        return [(log, float(rank or 0.0)) for log, rank in self.session.execute(stmt).all()]
     
     def update_query_log(self, log_id: int, update_data: Dict[str, Any]) -> Optional[QueryLog]:
         """Update query log information"""
@@ -145,21 +173,17 @@ class ApiUsageRepository:
         """Get API usage record by ID"""
         return self.session.query(ApiUsage).filter(ApiUsage.id == usage_id).first()
     
-    def get_api_usage_by_provider(self, provider: str, limit: int = 100) -> List[ApiUsage]:
-        """Get API usage records by provider"""
-        return (self.session.query(ApiUsage)
-                .filter(ApiUsage.api_provider == provider)
-                .order_by(desc(ApiUsage.created_at))
-                .limit(limit)
-                .all())
+    def get_api_usage_by_provider(self, provider: str, limit: int = 100, cursor: Optional[str] = None,
+                                  columns: Optional[Sequence[str]] = None) -> Page:
+        """Get a page of API usage records by provider"""
+        return _fetch_page(self.session, ApiUsage, [ApiUsage.api_provider == provider],
+                           limit, cursor, columns)
     
-    def get_user_api_usage(self, user_id: int, limit: int = 50) -> List[ApiUsage]:
-        """Get API usage for a specific user"""
-        return (self.session.query(ApiUsage)
-                .filter(ApiUsage.user_id == user_id)
-                .order_by(desc(ApiUsage.created_at))
-                .limit(limit)
-                .all())
+    def get_user_api_usage(self, user_id: int, limit: int = 50, cursor: Optional[str] = None,
+                           columns: Optional[Sequence[str]] = None) -> Page:
+        """Get a page of API usage for a specific user"""
+        return _fetch_page(self.session, ApiUsage, [ApiUsage.user_id == user_id],
+                           limit, cursor, columns)
     
     def get_api_usage_statistics(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
         """Get API usage statistics for a date range"""
@@ -213,21 +237,17 @@ class FeedbackRepository:
         """Get feedback by ID"""
         return self.session.query(Feedback).filter(Feedback.id == feedback_id).first()
     
-    def get_user_feedback(self, user_id: int, limit: int = 50) -> List[Feedback]:
-        """Get feedback from a specific user"""
-        return (self.session.query(Feedback)
-                .filter(Feedback.user_id == user_id)
-                .order_by(desc(Feedback.created_at))
-                .limit(limit)
-                .all())
+    def get_user_feedback(self, user_id: int, limit: int = 50, cursor: Optional[str] = None,
+                          columns: Optional[Sequence[str]] = None) -> Page:
+        """Get a page of feedback from a specific user"""
+        return _fetch_page(self.session, Feedback, [Feedback.user_id == user_id],
+                           limit, cursor, columns)
     
-    def get_unresolved_feedback(self, limit: int = 100) -> List[Feedback]:
-        """Get unresolved feedback"""
-        return (self.session.query(Feedback)
-                .filter(Feedback.is_resolved == False)
-                .order_by(desc(Feedback.created_at))
-                .limit(limit)
-                .all())
+    def get_unresolved_feedback(self, limit: int = 100, cursor: Optional[str] = None,
+                                columns: Optional[Sequence[str]] = None) -> Page:
+        """Get a page of unresolved feedback"""
+        return _fetch_page(self.session, Feedback, [Feedback.is_resolved == False],
+                           limit, cursor, columns)
     
     def update_feedback(self, feedback_id: int, update_data: Dict[str, Any]) -> Optional[Feedback]:
         """Update feedback information"""
@@ -266,3 +286,97 @@ class FeedbackRepository:
         stats['resolution_status'] = dict(resolution_stats)
         
         return stats
+
+class JobRepository:
+    """Repository for QueryJob rows, used by job pool processes"""
+    
+    def __init__(self, session: Session):
+        self.session = session
+    
+    def create_job(self, job_data: Dict[str, Any]) -> QueryJob:
+        """Create a new queued job"""
+        job = QueryJob(**job_data)
+        self.session.add(job)
+        self.session.commit()
+        self.session.refresh(job)
+        return job
+    
+    def get_job(self, job_id: str) -> Optional[QueryJob]:
+        """Get job by ID"""
+        return self.session.query(QueryJob).filter(QueryJob.id == job_id).first()
+    
+    def mark_running(self, job_id: str) -> None:
+        """Record that a pool process has started the job"""
+        job = self.get_job(job_id)
+        if job:
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+            self.session.commit()
+    
+    def append_partial_output(self, job_id: str, output: str) -> None:
+        """Append one task output to the job's partial output"""
+        job = self.get_job(job_id)
+        if job:
+            # Reassign so the JSON column is flagged as changed
+            job.partial_output = list(job.partial_output or []) + [output]
+            self.session.commit()
+    
+    def finish_job(self, job_id: str, status: str, result: Optional[str] = None,
+                   error_message: Optional[str] = None) -> None:
+        """Record the final status of a job unless it already has one"""
+        job = self.get_job(job_id)
+        if job and job.status in ('queued', 'running'):
+            job.status = status
+            job.result = result
+            job.error_message = error_message
+            job.finished_at = datetime.utcnow()
+            self.session.commit()
+    
+    def purge_expired_jobs(self, now: Optional[datetime] = None) -> int:
+        """Delete jobs past their expiry, and their checkpoints; returns the number of jobs removed"""
+        expired = self.session.query(QueryJob.id).filter(QueryJob.expires_at <= (now or datetime.utcnow()))
+        (self.session.query(TaskCheckpoint)
+         .filter(TaskCheckpoint.run_id.in_(expired.scalar_subquery()))
+         .delete(synchronize_session=False))
+        removed = expired.delete(synchronize_session=False)
+        self.session.commit()
+        return removed
+
+class CheckpointRepository:
+    """Repository for TaskCheckpoint rows, written by whichever process runs the crew"""
+    
+    def __init__(self, session: Session):
+        self.session = session
+    
+    def save_checkpoint(self, run_id: str, task_name: str, position: int, output: str,
+                        tool_calls: Optional[List[Dict[str, Any]]] = None,
+                        inputs: Optional[Dict[str, Any]] = None) -> TaskCheckpoint:
+        """Record a completed task, replacing any earlier checkpoint of the same task"""
+        checkpoint = (self.session.query(TaskCheckpoint)
+                      .filter(TaskCheckpoint.run_id == run_id, TaskCheckpoint.task_name == task_name)
+                      .first())
+        if checkpoint is None:
+            checkpoint = TaskCheckpoint(run_id=run_id, task_name=task_name)
+            self.session.add(checkpoint)
+        checkpoint.position = position
+        checkpoint.output = output
+        checkpoint.tool_calls = tool_calls or []
+        checkpoint.inputs = inputs
+        self.session.commit()
+        return checkpoint
+    
+    def get_checkpoints(self, run_id: str) -> List[TaskCheckpoint]:
+        """Completed tasks of a run, in crew order"""
+        return (self.session.query(TaskCheckpoint)
+                .filter(TaskCheckpoint.run_id == run_id)
+                .order_by(TaskCheckpoint.position, TaskCheckpoint.id)
+                .all())
+    
+    def delete_checkpoints(self, run_id: str) -> int:
+        """Drop a run's checkpoints once it has finished"""
+        removed = (self.session.query(TaskCheckpoint)
+                   .filter(TaskCheckpoint.run_id == run_id)
+                   .delete(synchronize_session=False))
+        self.session.commit()
+        return removed
+
@@ -33,7 +33,9 @@ CREATE TABLE query_logs (
     data_sources JSONB,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     ip_address INET,
-    user_agent TEXT
+    user_agent TEXT,
+    -- Full-text vector kept current by PostgreSQL on every insert/update
+    query_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', coalesce(query_text, ''))) STORED
 );
 
 -- Create indexes for query_logs table
@@ -42,6 +44,13 @@ CREATE INDEX idx_query_logs_query_type ON query_logs(query_type);
 CREATE INDEX idx_query_logs_created_at ON query_logs(created_at);
 CREATE INDEX idx_query_logs_result_status ON query_logs(result_status);
 
+-- Composite indexes backing keyset pagination on (created_at, id)
+CREATE INDEX idx_query_logs_user_created ON query_logs(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_query_logs_type_created ON query_logs(query_type, created_at DESC, id DESC);
+
+-- Full-text search over query text (SQLite uses an FTS5 table instead, see db/fulltext.py)
+CREATE INDEX idx_query_logs_query_tsv ON query_logs USING GIN (query_tsv);
+
 -- API usage tracking for monitoring external API consumption
 CREATE TABLE api_usage (
     id SERIAL PRIMARY KEY,
@@ -65,6 +74,10 @@ CREATE INDEX idx_api_usage_created_at ON api_usage(created_at);
 CREATE INDEX idx_api_usage_user_id ON api_usage(user_id);
 CREATE INDEX idx_api_usage_response_status ON api_usage(response_status);
 
+-- Composite indexes backing keyset pagination on (created_at, id)
+CREATE INDEX idx_api_usage_provider_created ON api_usage(api_provider, created_at DESC, id DESC);
+CREATE INDEX idx_api_usage_user_created ON api_usage(user_id, created_at DESC, id DESC);
+
 -- Feedback table for user ratings and system improvement
 CREATE TABLE feedback (
     id SERIAL PRIMARY KEY,
@@ -87,6 +100,47 @@ CREATE INDEX idx_feedback_rating ON feedback(rating);
 CREATE INDEX idx_feedback_created_at ON feedback(created_at);
 CREATE INDEX idx_feedback_category ON feedback(category);
 
+-- Composite indexes backing keyset pagination on (created_at, id)
+CREATE INDEX idx_feedback_user_created ON feedback(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_feedback_unresolved_created ON feedback(created_at DESC, id DESC)
+    WHERE is_resolved = FALSE;
+
+-- Queued crew runs for POST /jobs; purged after expires_at
+CREATE TABLE query_jobs (
+    id VARCHAR(32) PRIMARY KEY,
+    username VARCHAR(100),
+    query_text TEXT NOT NULL,
+    query_type VARCHAR(50),
+    inputs JSONB,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    partial_output JSONB,
+    result TEXT,
+    error_message TEXT,
+    attempts INTEGER DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    expires_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX idx_query_jobs_username_created ON query_jobs(username, created_at);
+CREATE INDEX idx_query_jobs_expires_at ON query_jobs(expires_at);
+
+-- Completed task outputs of crew runs, so retries resume instead of starting over
+CREATE TABLE task_checkpoints (
+    id SERIAL PRIMARY KEY,
+    run_id VARCHAR(32) NOT NULL,
+    task_name VARCHAR(100) NOT NULL,
+    position INTEGER,
+    output TEXT NOT NULL,
+    tool_calls JSONB,
+    inputs JSONB,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_task_checkpoints_run_task UNIQUE (run_id, task_name)
+);
+
+CREATE INDEX idx_task_checkpoints_run_id ON task_checkpoints(run_id);
+
 -- Add foreign key constraints
 ALTER TABLE query_logs ADD CONSTRAINT fk_query_logs_user_id 
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL;
@@ -0,0 +1,167 @@
+import os
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+import yaml
+from loguru import logger
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from .models import Base
+from . import fulltext  # registers the query_logs full-text DDL on create_all
+
+DEFAULT_DATABASE_SETTINGS = {
+    'url': 'sqlite:///./data/astrogeo.db',
+    'connection_pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout_seconds': 30,
+    'pool_recycle_seconds': 1800,
+    'pool_pre_ping': True,
+    'statement_cache_size': 500,
+}
+
+# Async drivers used when only a sync URL is configured
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+def load_database_settings(config_path: str = "config/settings.yaml") -> Dict[str, Any]:
+    """Load the database section of settings.yaml merged over defaults"""
+    settings = dict(DEFAULT_DATABASE_SETTINGS)
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            settings.update(config.get('database', {}) or {})
+    except Exception as e:
+        logger.warning(f"Using default database settings: {e}")
+
+    if os.getenv('DATABASE_URL'):
+        settings['url'] = os.getenv('DATABASE_URL')
+    return settings
+
+def to_async_url(url: str) -> str:
+    """Swap a sync database URL onto its async driver"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.drivername == backend and backend in ASYNC_DRIVERS:
+        parsed = parsed.set(drivername=ASYNC_DRIVERS[backend])
+    return parsed.render_as_string(hide_password=False)
+
+def to_sync_url(url: str) -> str:
+    """Swap an async database URL back onto the default sync driver"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.drivername == ASYNC_DRIVERS.get(backend):
+        parsed = parsed.set(drivername=backend)
+    return parsed.render_as_string(hide_password=False)
+
+def _engine_options(url: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Pool and caching options shared by the sync and async engines"""
+    parsed = make_url(url)
+    options: Dict[str, Any] = {
+        'pool_pre_ping': bool(settings.get('pool_pre_ping', True)),
+        'query_cache_size': int(settings.get('statement_cache_size', 500)),
+    }
+
+    if parsed.get_backend_name() == 'sqlite' and parsed.database in (None, '', ':memory:'):
+        # An in-memory database only exists on one connection, so it cannot be pooled
+        options['poolclass'] = StaticPool
+        options['connect_args'] = {'check_same_thread': False}
+        return options
+
+    options.update({
+        'pool_size': int(settings.get('connection_pool_size', 10)),
+        'max_overflow': int(settings.get('max_overflow', 20)),
+        'pool_timeout': int(settings.get('pool_timeout_seconds', 30)),
+        'pool_recycle': int(settings.get('pool_recycle_seconds', 1800)),
+    })
+    return options
+
+def build_sync_engine(settings: Dict[str, Any]) -> Engine:
+    """Create a pooled sync engine from database settings"""
+    url = to_sync_url(settings['url'])
+    return create_engine(url, **_engine_options(url, settings))
+
+def build_async_engine(settings: Dict[str, Any]) -> AsyncEngine:
+    """Create a pooled async engine from database settings"""
+    url = to_async_url(settings['url'])
+    parsed = make_url(url)
+    if parsed.drivername == 'postgresql+asyncpg':
+        # asyncpg keeps its own per-connection prepared statement cache
+        parsed = parsed.update_query_dict({
+            'prepared_statement_cache_size': str(settings.get('statement_cache_size', 500))
+        })
+        url = parsed.render_as_string(hide_password=False)
+    return create_async_engine(url, **_engine_options(url, settings))
+
+class DatabaseManager:
+    """Owns the process-wide engines and hands out sync or async sessions"""
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self.settings = settings or load_database_settings()
+        self._sync_engine: Optional[Engine] = None
+        self._async_engine: Optional[AsyncEngine] = None
+        self._sync_factory: Optional[sessionmaker] = None
+        self._async_factory: Optional[async_sessionmaker] = None
+
+    @property
+    def sync_engine(self) -> Engine:
+        if self._sync_engine is None:
+            self._sync_engine = build_sync_engine(self.settings)
+            self._sync_factory = sessionmaker(bind=self._sync_engine, expire_on_commit=False)
+        return self._sync_engine
+
+    @property
+    def async_engine(self) -> AsyncEngine:
+        if self._async_engine is None:
+            self._async_engine = build_async_engine(self.settings)
+            self._async_factory = async_sessionmaker(bind=self._async_engine, expire_on_commit=False)
+        return self._async_engine
+
+    @contextmanager
+    def session(self) -> Iterator[Session]:
+        """Open a sync session, rolling back if the block raises"""
+        self.sync_engine
+        session = self._sync_factory()
+        try:
+            yield session
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @asynccontextmanager
+    async def async_session(self) -> AsyncIterator[AsyncSession]:
+        """Open an async session, rolling back if the block raises"""
+        self.async_engine
+        async with self._async_factory() as session:
+            try:
+                yield session
+            except Exception:
+                await session.rollback()
+                raise
+
+    async def create_all(self) -> None:
+        """Create any missing tables (development databases only)"""
+        async with self.async_engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    async def dispose(self) -> None:
+        """Close all pooled connections"""
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+        if self._sync_engine is not None:
+            self._sync_engine.dispose()
+
+# Global database manager; engines are built on first use
+db_manager = DatabaseManager()
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency yielding an async session from the shared pool"""
+    async with db_manager.async_session() as session:
+        yield session
@@ -0,0 +1,329 @@
+"""Micro-batched embedding service
+
+Run as a shared local process, from the astrogeo directory:
+
+    python embeddings/service.py --socket ./data/embeddings.sock
+
+and set rag.yaml `embedding_service.mode: socket` so every app process
+encodes through it instead of loading its own model copy.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import yaml
+from loguru import logger
+
+DEFAULT_EMBEDDING_SERVICE_SETTINGS = {
+    'mode': 'in_process',
+    'max_batch_size': 32,
+    'max_wait_ms': 5.0,
+    'socket_path': './data/embeddings.sock',
+    'timeout_seconds': 30.0,
+    'model_name': 'sentence-transformers/all-MiniLM-L6-v2',
+}
+
+# Frame: header length and payload length, then a JSON header and raw float32 payload
+_FRAME = struct.Struct('!II')
+
+def load_embedding_service_settings(config_path: str = "config/rag.yaml") -> Dict[str, Any]:
+    """Load the embedding_service section of rag.yaml merged over defaults
+
+    The batch size defaults to embedding.encode_kwargs.batch_size.
+    """
+    settings = dict(DEFAULT_EMBEDDING_SERVICE_SETTINGS)
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            embedding = config.get('embedding', {}) or {}
+            batch_size = (embedding.get('encode_kwargs', {}) or {}).get('batch_size')
+            if batch_size:
+                settings['max_batch_size'] = batch_size
+            if embedding.get('model_name'):
+                settings['model_name'] = embedding['model_name']
+            settings.update(config.get('embedding_service', {}) or {})
+    except Exception as e:
+        logger.warning(f"Using default embedding service settings: {e}")
+    return settings
+
+class MicroBatcher:
+    """Coalesce concurrent encode requests into batched model calls
+
+    Requests go on an asyncio queue. The collector takes the first waiting
+    request, keeps adding requests for up to max_wait_ms or until
+    max_batch_size texts, encodes them in one model call on a worker thread
+    and hands each caller its rows. While a batch is encoding, new requests
+    queue up and form the next batch, so under load batches fill without
+    waiting. Sync callers (Gradio handlers, agent threads) go through a
+    private event loop thread; async callers await encode_async.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], Any], max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # The model call runs off the loop, so collecting the next batch continues meanwhile
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-batch")
+        self.batches = 0
+        self.texts = 0
+
+    def _start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._collector = loop.create_task(self._collect())
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                started = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    self._start(loop)
+                    started.set()
+                    try:
+                        loop.run_forever()
+                    finally:
+                        tasks = asyncio.all_tasks(loop)
+                        for task in tasks:
+                            task.cancel()
+                        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+                        loop.close()
+
+                self._thread = threading.Thread(target=run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+                started.wait()
+            return self._loop
+
+    async def encode_async(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings of texts as a float32 matrix, encoded in a batch with other callers' texts"""
+        running = asyncio.get_running_loop()
+        with self._lock:
+            if self._loop is None:
+                self._start(running)
+        if self._loop is not running:
+            return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._submit(texts), self._loop))
+        return await self._submit(texts)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Blocking encode_async, a drop-in for SentenceTransformer.encode(list_of_texts)"""
+        loop = self._background_loop()
+        return asyncio.run_coroutine_threadsafe(self._submit(texts), loop).result()
+
+    async def _submit(self, texts: Sequence[str]) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((list(texts), future))
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[List[str], asyncio.Future]] = [await self._queue.get()]
+            count = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while count < self.max_batch_size:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+                batch.append(item)
+                count += len(item[0])
+
+            flat = [text for texts, _ in batch for text in texts]
+            try:
+                vectors = await loop.run_in_executor(self._worker, self._encode, flat)
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(flat)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(flat)
+            start = 0
+            for texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[start:start + len(texts)])
+                start += len(texts)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(self.encode_fn(texts), dtype=np.float32).reshape(len(texts), -1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'batches': self.batches,
+            'texts': self.texts,
+            'mean_batch_size': self.texts / self.batches if self.batches else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            loop, thread, collector = self._loop, self._thread, self._collector
+            self._loop = self._thread = self._collector = None
+        if thread is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+        elif collector is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(collector.cancel)
+        self._worker.shutdown(wait=False)
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[Dict[str, Any], bytes]:
+    header_size, payload_size = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+    header = json.loads(await reader.readexactly(header_size))
+    return header, await reader.readexactly(payload_size) if payload_size else b""
+
+def _frame(header: Dict[str, Any], payload: bytes = b"") -> bytes:
+    body = json.dumps(header).encode('utf-8')
+    return _FRAME.pack(len(body), len(payload)) + body + payload
+
+class EmbeddingServer:
+    """Serve a MicroBatcher over a Unix socket, so app processes on the host share one model"""
+
+    def __init__(self, batcher: MicroBatcher, socket_path: str):
+        self.batcher = batcher
+        self.socket_path = socket_path
+
+    async def serve_forever(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"Embedding service listening on {self.socket_path}")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # A connection carries one request at a time, for as long as the client keeps it open
+        try:
+            while True:
+                try:
+                    header, _ = await _read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                try:
+                    vectors = await self.batcher.encode_async([str(t) for t in header.get('texts', [])])
+                    writer.write(_frame({'shape': list(vectors.shape)}, vectors.tobytes()))
+                except Exception as e:
+                    writer.write(_frame({'error': str(e)}))
+                await writer.drain()
+        finally:
+            writer.close()
+
+class EmbeddingClient:
+    """Blocking client of EmbeddingServer; each thread keeps its own connection"""
+
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def available(self) -> bool:
+        try:
+            self._connect().close()
+            return True
+        except OSError:
+            return False
+
+    def _recv_exact(self, sock: socket.socket, size: int) -> bytes:
+        chunks, remaining = [], size
+        while remaining:
+            chunk = sock.recv(remaining)
+            if not chunk:
+                raise ConnectionError("Embedding service closed the connection")
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+
+    def _request(self, sock: socket.socket, texts: List[str]) -> np.ndarray:
+        sock.sendall(_frame({'texts': texts}))
+        header_size, payload_size = _FRAME.unpack(self._recv_exact(sock, _FRAME.size))
+        header = json.loads(self._recv_exact(sock, header_size))
+        payload = self._recv_exact(sock, payload_size) if payload_size else b""
+        if header.get('error'):
+            raise RuntimeError(f"Embedding service error: {header['error']}")
+        return np.frombuffer(payload, dtype=np.float32).reshape(header['shape'])
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings of texts as a float32 matrix; reconnects once if the connection went stale"""
+        texts = [str(t) for t in texts]
+        for attempt in range(2):
+            sock = getattr(self._local, 'sock', None)
+            try:
+                if sock is None:
+                    sock = self._local.sock = self._connect()
+                return self._request(sock, texts)
+            except (OSError, ConnectionError, struct.error):
+                self._local.sock = None
+                if sock is not None:
+                    sock.close()
+                if attempt:
+                    raise
+
+def create_encoder(load_encode_fn: Callable[[], Callable[[List[str]], Any]],
+                   settings: Optional[Dict[str, Any]] = None) -> Callable[[List[str]], np.ndarray]:
+    """Encode function for this process, by rag.yaml embedding_service.mode
+
+    'socket' uses the shared local service, loading the model here only if
+    the service is not running; 'in_process' micro-batches this process's
+    callers around its own model; 'off' calls the model directly.
+    load_encode_fn loads the model and returns its encode function.
+    """
+    settings = settings or load_embedding_service_settings()
+    mode = settings.get('mode', 'in_process')
+    if mode == 'socket':
+        client = EmbeddingClient(settings['socket_path'], float(settings.get('timeout_seconds', 30.0)))
+        if client.available():
+            logger.info(f"Encoding through the embedding service at {settings['socket_path']}")
+            return client.encode
+        logger.warning(f"Embedding service not reachable at {settings['socket_path']}, loading the model here")
+    encode_fn = load_encode_fn()
+    if mode == 'off':
+        return encode_fn
+    return MicroBatcher(encode_fn, settings.get('max_batch_size', 32), settings.get('max_wait_ms', 5.0)).encode
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve batched sentence embeddings over a Unix socket")
+    parser.add_argument('--config', default="config/rag.yaml")
+    parser.add_argument('--socket', help="socket path (default: embedding_service.socket_path)")
+    args = parser.parse_args()
+
+    settings = load_embedding_service_settings(args.config)
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(settings['model_name'])
+    batcher = MicroBatcher(model.encode, settings['max_batch_size'], settings['max_wait_ms'])
+    try:
+        asyncio.run(EmbeddingServer(batcher, args.socket or settings['socket_path']).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
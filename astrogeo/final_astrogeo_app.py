@@ -8,12 +8,20 @@ from sentence_transformers import SentenceTransformer
 import asyncio
 from loguru import logger
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from astrogeo.cache.answer_cache import answer_cache
+from astrogeo.cache.embedding_cache import embedding_cache
+from astrogeo.embeddings.service import create_encoder
+from astrogeo.monitoring.tracing import tracer
+
 # Add src to path
 sys.path.append(str(Path(__file__).parent / "src"))
 
 # Try to import CrewAI components
 try:
-    from astrogeo.crew import AstroGeoCrew
+    from astrogeo.crew import AstroGeoCrew, crew_inputs
+    from astrogeo.crew_pool import CrewPool
+    from astrogeo.crew_dag import run_crew
     from astrogeo.utils.config_loader import ConfigLoader
     CREWAI_AVAILABLE = True
     print("✅ CrewAI components available")
@@ -24,7 +32,7 @@ except Exception as e:
 class FinalAstroGeoApp:
     def __init__(self):
         self.vector_db_path = "data/vector_store/vector_db"
-        self.embedding_model = None
+        self.encoder = None
         self.chroma_client = None
         self.collection = None
         self.crew = None
@@ -43,14 +51,16 @@ class FinalAstroGeoApp:
                 print(f"✅ ChromaDB connected: {self.collection.name}")
             
             # Initialize embedding model
-            self.embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+            self.encoder = create_encoder(lambda: SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2').encode)
+            embedding_cache.set_embedder(self.encoder)
+            answer_cache.set_embedder(embedding_cache.encode)
             print("✅ Embedding model loaded")
             
             # Initialize CrewAI if available
             if CREWAI_AVAILABLE:
                 try:
                     self.config_loader = ConfigLoader()
-                    self.crew = AstroGeoCrew()
+                    self.crew = CrewPool(lambda: AstroGeoCrew().crew()).warm()
                     print("✅ CrewAI crew initialized with NASA API tools")
                 except Exception as e:
                     print(f"⚠️ CrewAI initialization failed: {e}")
@@ -63,15 +73,16 @@ class FinalAstroGeoApp:
         except Exception as e:
             print(f"❌ Initialization error: {e}")
     
+    @tracer.trace("vector.search")
     def search_vector_db(self, query: str, k: int = 3):
         """Search vector database"""
         try:
             if not self.collection:
                 return []
             
-            query_embedding = self.embedding_model.encode([query])
+            query_embedding = embedding_cache.embed(query)
             results = self.collection.query(
-                query_embeddings=query_embedding.tolist(),
+                query_embeddings=[query_embedding.tolist()],
                 n_results=k,
                 include=['documents', 'distances']
             )
@@ -138,22 +149,18 @@ class FinalAstroGeoApp:
             return None
         
         try:
-            inputs = {
-                'topic': query,
-                'query_type': query_type,
-                'celestial_objects': query,
-                'data_categories': query_type,
-                'time_range': 'current'
-            }
+            inputs = crew_inputs(query, query_type=query_type, data_categories=query_type)
             
             # Execute CrewAI crew
-            result = self.crew.crew().kickoff(inputs=inputs)
+            with tracer.span("crew.kickoff", query_type=query_type):
+                result = run_crew(self.crew.acquire(), inputs)
             return str(result)
             
         except Exception as e:
             logger.error(f"CrewAI analysis failed: {e}")
             return None
     
+    @tracer.trace("analyze_space_query")
     def analyze_space_query(self, query: str, query_type: str, use_nasa_agents: bool, progress=gr.Progress()):
         """Main analysis function"""
         if not query.strip():
@@ -161,6 +168,11 @@ class FinalAstroGeoApp:
         
         try:
             query_lower = query.lower()
+            cache_variant = f"nasa_agents={bool(use_nasa_agents)}"
+            cached = answer_cache.get(query, query_type, cache_variant)
+            if cached:
+                progress(1.0, desc="Answer served from cache")
+                return cached.answer
             
             progress(0.1, desc="Initializing analysis...")
             
@@ -234,6 +246,7 @@ class FinalAstroGeoApp:
             response += f"**Coverage**: Comprehensive multi-source analysis\n"
             
             progress(1.0, desc="Complete!")
+            answer_cache.put(query, response, query_type, cache_variant)
             return response
             
         except Exception as e:
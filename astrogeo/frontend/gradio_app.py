@@ -8,9 +8,13 @@ import sys
 import re
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
-from astrogeo.crew import AstroGeoCrew
+from astrogeo.crew import AstroGeoCrew, crew_inputs
+from astrogeo.crew_pool import CrewPool
+from astrogeo.crew_dag import run_crew
 from astrogeo.utils.vector_store import VectorStoreManager
 from astrogeo.utils.config_loader import ConfigLoader
+from astrogeo.cache.answer_cache import answer_cache
+from astrogeo.routing.keyword_router import keyword_router
 
 class AstroGeoGradioApp:
     def __init__(self):
@@ -29,7 +33,7 @@ class AstroGeoGradioApp:
             self.vector_store.initialize_vector_store()
             
             # Initialize enhanced crew with geospatial agent
-            self.crew = AstroGeoCrew()
+            self.crew = CrewPool(lambda: AstroGeoCrew().crew()).warm()
             
             logger.info("AstroGeo enhanced components with weather intelligence initialized")
             
@@ -37,24 +41,8 @@ class AstroGeoGradioApp:
             logger.error(f"Failed to initialize enhanced components: {e}")
     
     def analyze_query_intent(self, query: str):
-        """Analyze query to determine appropriate task routing"""
-        query_lower = query.lower()
-        
-        # Weather and geospatial queries
-        if any(term in query_lower for term in ['weather', 'temperature', 'rain', 'rainfall', 'climate', 'humidity', 'precipitation']):
-            return 'geospatial_analysis'
-        
-        # NASA and space queries
-        elif any(term in query_lower for term in ['nasa', 'apod', 'mars rover', 'solar activity', 'asteroid', 'space picture']):
-            return 'astronomical_analysis'
-        
-        # ISRO and Indian space queries
-        elif any(term in query_lower for term in ['isro', 'bhuvan', 'chandrayaan', 'mangalyaan', 'indian space']):
-            return 'data_harvesting'
-        
-        # Default to astronomical analysis
-        else:
-            return 'astronomical_analysis'
+        """Analyze query to determine appropriate task routing (crew_tasks profile in config/routing.yaml)"""
+        return keyword_router.route(query, 'crew_tasks').top
     
     def extract_location_from_query(self, query: str):
         """Extract location from weather-related queries"""
@@ -94,6 +82,12 @@ Ask me about weather, space missions, satellite data, or astronomical events!"""
             
             # Determine query intent and appropriate task
             intent = self.analyze_query_intent(query)
+            cache_variant = f"{query_type}:live_apis={bool(use_live_apis)}"
+            cached = answer_cache.get(query, intent, cache_variant)
+            if cached:
+                progress(1.0, desc="Answer served from cache")
+                return cached.answer
+            
             location = self.extract_location_from_query(query) if 'weather' in query.lower() or 'rain' in query.lower() else None
             
             response = f"🧠 **Enhanced AstroGeo Analysis**\n\n"
@@ -107,21 +101,21 @@ Ask me about weather, space missions, satellite data, or astronomical events!"""
             
             if self.crew:
                 # Prepare inputs for CrewAI with enhanced parameters
-                inputs = {
-                    'topic': query,
-                    'query_type': query_type,
-                    'intent': intent,
-                    'location': location or 'global',
-                    'use_live_apis': use_live_apis,
-                    'data_categories': intent,
-                    'time_range': 'current',
-                    'analysis_depth': 'comprehensive'
-                }
+                inputs = crew_inputs(
+                    query,
+                    query_type=query_type,
+                    intent=intent,
+                    location=location or 'global',
+                    geographic_region=location or 'global',
+                    use_live_apis=use_live_apis,
+                    data_categories=intent,
+                    analysis_depth='comprehensive'
+                )
                 
                 progress(0.7, desc="Multi-agent analysis in progress...")
                 
                 # Execute CrewAI crew with enhanced capabilities
-                result = self.crew.crew().kickoff(inputs=inputs)
+                result = run_crew(self.crew.acquire(), inputs)
                 result_text = str(result)
                 
                 response += f"## 🤖 **Multi-Agent Analysis Results**:\n\n{result_text}\n\n"
@@ -137,6 +131,7 @@ Ask me about weather, space missions, satellite data, or astronomical events!"""
                         response += f"**{i}.** {clean_doc}\n\n"
             
             progress(1.0, desc="Analysis complete!")
+            answer_cache.put(query, response, intent, cache_variant)
             return response
             
         except Exception as e:
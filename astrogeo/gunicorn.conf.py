@@ -0,0 +1,30 @@
+"""Gunicorn settings for the AstroGeo API
+
+Run from this directory:
+
+    gunicorn -c gunicorn.conf.py astrogeo.api.server:app
+
+Ordering matters for metrics. prometheus_client decides how to store
+samples the first time it is imported, so PROMETHEUS_MULTIPROC_DIR has to
+be set before the app, or anything else importing prometheus_client, is
+loaded. Gunicorn reads this file in the master before it imports the app
+(also with preload_app), so the directory is prepared here, at load time,
+using monitoring/multiproc.py, which does not import prometheus_client.
+Nothing above that call may import astrogeo or prometheus_client.
+"""
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+# child_exit is picked up as the server hook that drops a dead worker's live gauges
+from monitoring.multiproc import child_exit, prepare_multiprocess_dir  # noqa: E402,F401
+
+prepare_multiprocess_dir(config_path=os.path.join(HERE, "config", "settings.yaml"))
+
+chdir = HERE
+pythonpath = os.path.dirname(HERE)
+bind = os.environ.get("ASTROGEO_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("ASTROGEO_WORKERS", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
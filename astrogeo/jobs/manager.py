@@ -0,0 +1,177 @@
+import asyncio
+import multiprocessing
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Set
+
+import yaml
+from loguru import logger
+
+from ..db.async_repository import AsyncJobRepository
+from ..db.models import QueryJob
+from ..db.session import DatabaseManager, db_manager
+from .worker import run_query_job
+
+def load_job_settings(config_path: str = "config/settings.yaml") -> Dict[str, Any]:
+    """Load job pool settings from the data_processing section"""
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            return config.get('data_processing', {}) or {}
+    except Exception as e:
+        logger.warning(f"Using default job settings: {e}")
+        return {}
+
+def _naive_utc(moment: datetime) -> datetime:
+    """Naive UTC datetime; aware values (as PostgreSQL returns them) are converted first"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.replace(tzinfo=None)
+
+class JobManager:
+    """Queue crew runs onto a bounded process pool and track them as QueryJob rows
+
+    Pool processes write their own progress (running, task outputs, result) to
+    the database, so any API worker can answer GET /jobs/{id}. This process only
+    steps in when a pool process dies without recording an outcome; such jobs
+    are retried automatically up to job_max_retries times, resuming from the
+    tasks the dead process had checkpointed.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, result_ttl: Optional[timedelta] = None,
+                 runner: Callable[[str, Dict[str, Any]], str] = run_query_job,
+                 database: Optional[DatabaseManager] = None,
+                 executor_factory: Optional[Callable[[], Executor]] = None):
+        settings = load_job_settings()
+        self.max_workers = max_workers or int(settings.get('max_concurrent_jobs', 5))
+        self.result_ttl = result_ttl or timedelta(hours=float(settings.get('job_result_ttl_hours', 24)))
+        self.max_retries = int(settings.get('job_max_retries', 2))
+        self.runner = runner
+        self.database = database or db_manager
+        self.executor_factory = executor_factory or self._process_pool
+        self._executor: Optional[Executor] = None
+        self._running: Dict[str, asyncio.Future] = {}
+        self._on_success: Dict[str, Callable[[str, str], Any]] = {}
+        # The loop only keeps weak references to tasks, so hold completion handlers until they finish
+        self._callbacks: Set[asyncio.Task] = set()
+
+    def _process_pool(self) -> Executor:
+        # spawn, not fork: children must not inherit the parent's pooled DB connections
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self.executor_factory()
+        return self._executor
+
+    @property
+    def active_jobs(self) -> int:
+        return len(self._running)
+
+    async def submit(self, query: str, query_type: str, inputs: Dict[str, Any],
+                     username: Optional[str] = None,
+                     on_success: Optional[Callable[[str, str], Any]] = None) -> QueryJob:
+        """Record a queued job and hand it to the pool; returns immediately"""
+        now = datetime.utcnow()
+        async with self.database.async_session() as db:
+            jobs = AsyncJobRepository(db)
+            await jobs.purge_expired_jobs(now)
+            job = await jobs.create_job({
+                'id': uuid.uuid4().hex,
+                'username': username,
+                'query_text': query,
+                'query_type': query_type,
+                'inputs': inputs,
+                'status': 'queued',
+                'partial_output': [],
+                'created_at': now,
+                'expires_at': now + self.result_ttl,
+            })
+
+        if on_success is not None:
+            self._on_success[job.id] = on_success
+        self._dispatch(job.id, inputs)
+        logger.info(f"Job {job.id} queued ({self.active_jobs} active)")
+        return job
+
+    def _dispatch(self, job_id: str, inputs: Dict[str, Any]) -> None:
+        executor = self.executor
+        future = asyncio.get_running_loop().run_in_executor(executor, self.runner, job_id, inputs)
+        self._running[job_id] = future
+        future.add_done_callback(lambda done: self._track(self._finished(job_id, done, executor)))
+
+    def _track(self, coro) -> None:
+        task = asyncio.ensure_future(coro)
+        self._callbacks.add(task)
+        task.add_done_callback(self._callbacks.discard)
+
+    async def retry(self, job_id: str, on_success: Optional[Callable[[str, str], Any]] = None) -> Optional[QueryJob]:
+        """Queue a failed job again under the same id; it resumes from its checkpointed tasks
+
+        Returns None unless the job exists and has failed. Automatic retries
+        keep the original on_success hook; manual ones may pass a new one.
+        """
+        if job_id in self._running:
+            return None
+        async with self.database.async_session() as db:
+            job = await AsyncJobRepository(db).requeue_job(job_id)
+        if job is None:
+            return None
+        if on_success is not None:
+            self._on_success[job.id] = on_success
+        self._dispatch(job.id, job.inputs or {})
+        logger.info(f"Job {job.id} requeued (attempt {job.attempts + 1})")
+        return job
+
+    async def _finished(self, job_id: str, future: asyncio.Future, executor: Optional[Executor] = None) -> None:
+        self._running.pop(job_id, None)
+        error = future.exception() if not future.cancelled() else asyncio.CancelledError()
+        if error is None:
+            on_success = self._on_success.pop(job_id, None)
+            if on_success is not None:
+                try:
+                    result = on_success(job_id, future.result())
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    logger.error(f"Job {job_id} completion hook failed: {e}")
+            return
+
+        if isinstance(error, BrokenProcessPool):
+            # The pool cannot be reused once a process dies; start fresh unless another job already has
+            logger.error(f"Job pool broke while running {job_id}, restarting it")
+            if executor is not None and self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False)
+        try:
+            # No-op when the pool process already recorded the failure itself
+            async with self.database.async_session() as db:
+                await AsyncJobRepository(db).finish_job(job_id, 'failed', error_message=str(error) or type(error).__name__)
+        except Exception as e:
+            logger.error(f"Failed to record failure of job {job_id}: {e}")
+
+        if isinstance(error, BrokenProcessPool):
+            job = await self.get(job_id)
+            if job is not None and (job.attempts or 0) < self.max_retries and await self.retry(job_id):
+                return
+        self._on_success.pop(job_id, None)
+
+    async def get(self, job_id: str) -> Optional[QueryJob]:
+        """Get a job, or None once it has expired"""
+        async with self.database.async_session() as db:
+            job = await AsyncJobRepository(db).get_job(job_id)
+        if job is None or (job.expires_at and _naive_utc(job.expires_at) <= datetime.utcnow()):
+            return None
+        return job
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs and cancel those not yet started"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Global job manager; the process pool starts on the first submitted job
+job_manager = JobManager()
@@ -0,0 +1,46 @@
+from typing import Any, Dict
+
+from loguru import logger
+
+from ..db.repository import JobRepository
+from ..db.session import db_manager
+from ..crew_checkpoint import RunCheckpoint
+from ..crew_pool import CrewPool
+from ..crew_dag import run_crew
+
+def _build_crew():
+    # Imported here so the API process can queue jobs without loading crewai itself
+    from ..crew import AstroGeoCrew
+    return AstroGeoCrew().crew()
+
+# One template per pool process, reused across every job that process runs
+crew_pool = CrewPool(_build_crew)
+
+def run_query_job(job_id: str, inputs: Dict[str, Any]) -> str:
+    """Execute one crew run inside a job pool process, recording progress on the job row
+
+    Each finished task is checkpointed under the job id, so a retried job
+    only runs the tasks its earlier attempt did not finish.
+    """
+    with db_manager.session() as db:
+        JobRepository(db).mark_running(job_id)
+
+    def record_task_output(output):
+        with db_manager.session() as db:
+            JobRepository(db).append_partial_output(job_id, str(getattr(output, 'raw', output)))
+
+    try:
+        crew = crew_pool.acquire()
+        crew.task_callback = record_task_output
+        checkpoint = RunCheckpoint(job_id, database=db_manager)
+        result = str(run_crew(crew, inputs, checkpoint=checkpoint))
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {e}")
+        with db_manager.session() as db:
+            JobRepository(db).finish_job(job_id, 'failed', error_message=str(e))
+        raise
+
+    with db_manager.session() as db:
+        JobRepository(db).finish_job(job_id, 'succeeded', result=result)
+    checkpoint.clear()
+    return result
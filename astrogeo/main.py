@@ -3,8 +3,11 @@ import sys
 import warnings
 import os
 from datetime import datetime
+from pathlib import Path
 
-from crew import AstroGeoCrew
+# crew.py uses package-relative imports, so load it as astrogeo.crew
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from astrogeo.crew import AstroGeoCrew, crew_inputs
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -21,7 +24,7 @@ def run():
     
     query = input("Enter your query: ")
     
-    inputs = {'query': query}
+    inputs = crew_inputs(query, query=query)
     
     print(f"\n🔄 Processing: {query}")
     print("⏳ Agents analyzing...")
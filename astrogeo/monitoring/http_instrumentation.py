@@ -0,0 +1,411 @@
+import contextvars
+import copy
+import queue
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+import yaml
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .metrics import metrics
+from .tracing import tracer
+
+# Host suffix -> provider label
+PROVIDER_HOSTS = {
+    'api.nasa.gov': 'NASA',
+    'bhuvan.nrsc.gov.in': 'ISRO',
+    'bhuvan-app1.nrsc.gov.in': 'Bhuvan',
+    'scihub.copernicus.eu': 'ESA',
+    'api.openweathermap.org': 'OpenWeatherMap',
+    'api-inference.huggingface.co': 'HuggingFace',
+}
+
+# Known endpoint shapes; anything else goes through generic id collapsing
+ENDPOINT_TEMPLATES = [
+    (re.compile(r'^/mars-photos/api/v1/rovers/[^/]+/photos$'), '/mars-photos/api/v1/rovers/{rover}/photos'),
+    (re.compile(r'^/neo/rest/v1/neo/[^/]+$'), '/neo/rest/v1/neo/{asteroid_id}'),
+    (re.compile(r'^/models/.+$'), '/models/{model}'),
+]
+
+ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F-]{8,}|.*\d.*\d.*\d.*)$')
+MAX_PATH_SEGMENTS = 4
+MAX_TEMPLATES_PER_PROVIDER = 50
+
+# Query parameters that must never reach the ApiUsage table
+SECRET_PARAMS = {'api_key', 'apikey', 'appid', 'key', 'token', 'access_token'}
+
+CACHE_HEADERS = ('X-Cache', 'CF-Cache-Status', 'X-Cache-Status')
+RATE_LIMIT_HEADERS = ('X-RateLimit-Remaining', 'RateLimit-Remaining', 'X-Ratelimit-Remaining')
+
+def load_instrumentation_settings(config_path: str = "config/settings.yaml") -> Dict[str, Any]:
+    """Load HTTP instrumentation settings from the monitoring section"""
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            return config.get('monitoring', {}) or {}
+    except Exception as e:
+        logger.warning(f"Using default HTTP instrumentation settings: {e}")
+        return {}
+
+def provider_for_host(host: str) -> str:
+    """Map a request host onto a provider label"""
+    host = (host or '').lower()
+    for suffix, provider in PROVIDER_HOSTS.items():
+        if host == suffix or host.endswith('.' + suffix):
+            return provider
+    return 'other'
+
+class EndpointTemplater:
+    """Collapse raw URL paths into a bounded set of endpoint templates per provider"""
+
+    def __init__(self, max_templates: int = MAX_TEMPLATES_PER_PROVIDER):
+        self.max_templates = max_templates
+        self._seen: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def template(self, provider: str, path: str) -> str:
+        path = '/' + path.strip('/')
+        for pattern, template in ENDPOINT_TEMPLATES:
+            if pattern.match(path):
+                break
+        else:
+            segments = [s for s in path.split('/') if s][:MAX_PATH_SEGMENTS]
+            template = '/' + '/'.join('{id}' if ID_SEGMENT.match(s) else s for s in segments)
+
+        with self._lock:
+            seen = self._seen.setdefault(provider, set())
+            if template not in seen:
+                if len(seen) >= self.max_templates:
+                    return '{other}'
+                seen.add(template)
+        return template
+
+class ApiUsageRecorder:
+    """Sampled, non-blocking writer of ApiUsage rows
+
+    Rows are queued and written by a daemon thread so a slow database never
+    adds latency to provider calls. Error responses are always kept. The
+    thread starts with the first recorded row and is reused when the sink
+    is reconfigured.
+    """
+
+    def __init__(self, sink: Callable[[Dict[str, Any]], None], sample_rate: float = 0.1,
+                 max_queue: int = 1000):
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def configure(self, sink: Callable[[Dict[str, Any]], None], sample_rate: float) -> None:
+        self.sink = sink
+        self.sample_rate = sample_rate
+
+    def record(self, usage: Dict[str, Any]) -> None:
+        status = usage.get('response_status') or 0
+        if status < 400 and usage.get('error_message') is None and random.random() >= self.sample_rate:
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._drain, name="api-usage-recorder", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(usage)
+        except queue.Full:
+            logger.warning("ApiUsage queue full, dropping record")
+
+    def _drain(self) -> None:
+        while True:
+            usage = self._queue.get()
+            try:
+                self.sink(usage)
+            except Exception as e:
+                logger.error(f"Failed to record API usage: {e}")
+
+_recorder: Optional[ApiUsageRecorder] = None
+
+def configure_api_usage_sink(sink: Callable[[Dict[str, Any]], None], sample_rate: Optional[float] = None) -> None:
+    """Send sampled provider calls to sink, typically ApiUsageRepository.create_api_usage"""
+    global _recorder
+    if sample_rate is None:
+        sample_rate = float(load_instrumentation_settings().get('api_usage_sample_rate', 0.1))
+    if _recorder is None:
+        _recorder = ApiUsageRecorder(sink, sample_rate)
+    else:
+        _recorder.configure(sink, sample_rate)
+
+def _header_int(headers, names) -> Optional[int]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return int(float(value))
+            except ValueError:
+                return None
+    return None
+
+def _cache_hit(response: requests.Response) -> Optional[bool]:
+    if getattr(response, 'from_cache', None) is not None:
+        return bool(response.from_cache)
+    for name in CACHE_HEADERS:
+        value = response.headers.get(name)
+        if value:
+            return 'HIT' in value.upper()
+    return None
+
+_speculative: contextvars.ContextVar[bool] = contextvars.ContextVar('astrogeo_http_speculative', default=False)
+
+@contextmanager
+def speculative() -> Iterator[None]:
+    """Mark GET requests in this block as prefetches whose responses are kept for later callers"""
+    token = _speculative.set(True)
+    try:
+        yield
+    finally:
+        _speculative.reset(token)
+
+def response_cache_key(url: str) -> str:
+    """Request URL with its query parameters sorted, so parameter order does not matter"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{parts.scheme}://{parts.netloc}{parts.path}?{query}"
+
+class ResponseCache:
+    """Short-lived store of prefetched provider GET responses, shared by every user of the session
+
+    Only speculative requests (see speculative()) fill the cache; any GET for
+    the same URL then reuses the response, or waits for the prefetch if it
+    is still in flight instead of issuing a duplicate request.
+    """
+
+    def __init__(self, ttl_seconds: float = 120, max_entries: int = 256, join_timeout: float = 30):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.join_timeout = join_timeout
+        self._entries: Dict[str, Tuple[float, requests.Response, str]] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.prefetched = 0
+        self.hits = 0
+        self.joined = 0
+        self.unused = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def _served(response: requests.Response) -> requests.Response:
+        # Each caller gets its own Response object over the shared, already-read body
+        served = copy.copy(response)
+        served.from_cache = True
+        return served
+
+    def _expire(self, now: float) -> None:
+        for key in [key for key, (expires, _, _) in self._entries.items() if expires <= now]:
+            self._discard_unused(key)
+        while len(self._entries) > self.max_entries:
+            self._discard_unused(next(iter(self._entries)))
+
+    def _discard_unused(self, key: str) -> None:
+        _, _, provider = self._entries.pop(key)
+        self.unused += 1
+        metrics.track_prefetch(provider, 'unused')
+
+    def fetch(self, url: str, provider: str, send: Callable[[], requests.Response]) -> requests.Response:
+        """Serve a GET from a prefetch when one exists; otherwise send it, keeping the response if speculative"""
+        key = response_cache_key(url)
+        prefetching = _speculative.get()
+        pending: Optional[Future] = None
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not prefetching:
+                    # A prefetch is used once; later callers go to the provider (or their own caches)
+                    del self._entries[key]
+                    self.hits += 1
+                    metrics.track_prefetch(provider, 'hit')
+                return self._served(entry[1])
+            pending = self._inflight.get(key)
+            if pending is None and prefetching:
+                pending = self._inflight[key] = Future()
+                self.prefetched += 1
+                metrics.track_prefetch(provider, 'issued')
+                owner = True
+            else:
+                owner = False
+
+        if pending is not None and not owner:
+            if prefetching:
+                return self._served(pending.result(timeout=self.join_timeout))
+            try:
+                response = pending.result(timeout=self.join_timeout)
+            except Exception:
+                # The prefetch failed or is too slow; fetch normally
+                return send()
+            with self._lock:
+                self._entries.pop(key, None)
+                self.joined += 1
+            metrics.track_prefetch(provider, 'joined')
+            return self._served(response)
+        if not owner:
+            return send()
+
+        try:
+            response = send()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+            if response.ok:
+                self._entries[key] = (time.time() + self.ttl, response, provider)
+        pending.set_result(response)
+        return response
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'in_flight': len(self._inflight),
+                'prefetched': self.prefetched,
+                'hits': self.hits,
+                'joined': self.joined,
+                'unused': self.unused,
+            }
+
+def create_response_cache() -> ResponseCache:
+    """Response cache sized from the monitoring settings (prefetch_ttl_seconds 0 disables it)"""
+    settings = load_instrumentation_settings()
+    return ResponseCache(ttl_seconds=float(settings.get('prefetch_ttl_seconds', 120)),
+                         max_entries=int(settings.get('prefetch_max_entries', 256)))
+
+# Shared by every session built here; filled by monitoring.prefetch
+response_cache = create_response_cache()
+
+class InstrumentedAdapter(HTTPAdapter):
+    """Transport adapter timing every provider request and emitting metrics"""
+
+    def __init__(self, templater: Optional[EndpointTemplater] = None, cache: Optional[ResponseCache] = None,
+                 **kwargs):
+        self.templater = templater or EndpointTemplater()
+        self.cache = cache or response_cache
+        super().__init__(**kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        parts = urlsplit(request.url)
+        provider = provider_for_host(parts.hostname)
+        endpoint = self.templater.template(provider, parts.path)
+        body = request.body or b''
+        bytes_out = len(body.encode('utf-8') if isinstance(body, str) else body)
+
+        with tracer.span(f"http.{provider}", endpoint=endpoint, method=request.method) as span:
+            if self.cache.enabled and request.method == 'GET' and not kwargs.get('stream'):
+                response = self.cache.fetch(request.url, provider,
+                                            lambda: self._send(request, provider, endpoint, bytes_out, **kwargs))
+            else:
+                response = self._send(request, provider, endpoint, bytes_out, **kwargs)
+            if span is not None:
+                span.set_attribute('status', response.status_code)
+                if getattr(response, 'from_cache', False):
+                    span.set_attribute('prefetched', True)
+        return response
+
+    def _send(self, request, provider, endpoint, bytes_out, **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception as e:
+            duration = time.perf_counter() - start
+            metrics.track_provider_request(provider, endpoint, 'error', duration, bytes_out=bytes_out)
+            self._record_usage(request, provider, endpoint, None, duration, 0, None, str(e))
+            raise
+
+        duration = time.perf_counter() - start
+        if kwargs.get('stream'):
+            bytes_in = int(response.headers.get('Content-Length') or 0)
+        else:
+            bytes_in = len(response.content or b'')
+        retries = len(getattr(getattr(response.raw, 'retries', None), 'history', ()) or ())
+        rate_limit_remaining = _header_int(response.headers, RATE_LIMIT_HEADERS)
+
+        metrics.track_provider_request(
+            provider, endpoint, str(response.status_code), duration,
+            bytes_out=bytes_out, bytes_in=bytes_in, retries=retries,
+            cache_hit=_cache_hit(response), rate_limit_remaining=rate_limit_remaining,
+        )
+        self._record_usage(request, provider, endpoint, response.status_code, duration, bytes_in,
+                           rate_limit_remaining, None if response.ok else response.reason)
+        return response
+
+    def _record_usage(self, request, provider, endpoint, status, duration, bytes_in,
+                      rate_limit_remaining, error_message) -> None:
+        if _recorder is None:
+            return
+        params = {k: v for k, v in parse_qsl(urlsplit(request.url).query) if k.lower() not in SECRET_PARAMS}
+        _recorder.record({
+            'api_provider': provider,
+            'endpoint': endpoint,
+            'request_method': request.method,
+            'request_params': params,
+            'response_status': status,
+            'response_time_ms': duration * 1000,
+            'data_size_bytes': bytes_in,
+            'rate_limit_remaining': rate_limit_remaining,
+            'error_message': error_message,
+        })
+
+def provider_retry(retries: int, backoff_factor: float = 0.5) -> Retry:
+    """Retry policy for a provider that has opted in: idempotent requests on 429 and 5xx"""
+    return Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        raise_on_status=False,
+    )
+
+def create_http_session(provider_retries: Optional[Dict[str, int]] = None, backoff_factor: float = 0.5,
+                        pool_maxsize: int = 20) -> requests.Session:
+    """Build a requests session whose every call is instrumented
+
+    Requests are not retried unless their provider is listed in
+    provider_retries (monitoring.provider_retries in settings.yaml): tools
+    already fall back on failure, and retrying a 429 only spends more of
+    the provider's quota while the user waits.
+    """
+    if provider_retries is None:
+        provider_retries = load_instrumentation_settings().get('provider_retries', {}) or {}
+    templater = EndpointTemplater()
+    adapter = InstrumentedAdapter(templater, max_retries=0, pool_connections=10, pool_maxsize=pool_maxsize)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    for host, provider in PROVIDER_HOSTS.items():
+        retries = int(provider_retries.get(provider, 0) or 0)
+        if retries > 0:
+            # Mounted per host prefix; requests picks the longest matching prefix
+            session.mount(f'https://{host}', InstrumentedAdapter(
+                templater, max_retries=provider_retry(retries, backoff_factor), pool_maxsize=pool_maxsize))
+    return session
+
+# Shared instrumented session used by every provider tool
+http_session = create_http_session()
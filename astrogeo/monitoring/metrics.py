@@ -1,15 +1,60 @@
-from prometheus_client import Counter, Histogram, Gauge, start_http_server
+from prometheus_client import (CollectorRegistry, Counter, Histogram, Gauge, multiprocess,
+                               start_http_server)
+import inspect
 import time
+from typing import Optional
 from functools import wraps
 from loguru import logger
 
+# PROMETHEUS_MULTIPROC_DIR must be set before prometheus_client (imported above) is
+# first imported anywhere; see multiproc.py and gunicorn.conf.py
+from .multiproc import MULTIPROC_ENV, mark_worker_dead, multiprocess_enabled, prepare_multiprocess_dir
+
 # Prometheus metrics
 AGENT_REQUESTS = Counter('astrogeo_agent_requests_total', 'Total agent requests', ['agent_name', 'status'])
 AGENT_DURATION = Histogram('astrogeo_agent_duration_seconds', 'Agent processing time', ['agent_name'])
-ACTIVE_AGENTS = Gauge('astrogeo_active_agents', 'Number of active agents')
+ACTIVE_AGENTS = Gauge('astrogeo_active_agents', 'Number of active agents', multiprocess_mode='livesum')
 API_CALLS = Counter('astrogeo_api_calls_total', 'Total API calls', ['provider', 'endpoint', 'status'])
 VECTOR_DB_QUERIES = Counter('astrogeo_vector_db_queries_total', 'Vector database queries', ['status'])
 
+# Provider HTTP metrics; endpoint labels are templates, never raw URLs
+PROVIDER_REQUEST_DURATION = Histogram('astrogeo_provider_request_duration_seconds',
+                                      'Provider HTTP request latency including retries',
+                                      ['provider', 'endpoint', 'status'],
+                                      buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60))
+PROVIDER_BYTES = Counter('astrogeo_provider_bytes_total', 'Provider HTTP payload bytes', ['provider', 'direction'])
+PROVIDER_RETRIES = Counter('astrogeo_provider_retries_total', 'Provider HTTP retries', ['provider', 'endpoint'])
+PROVIDER_CACHE = Counter('astrogeo_provider_cache_total', 'Provider HTTP cache lookups', ['provider', 'result'])
+PROVIDER_RATE_LIMIT_REMAINING = Gauge('astrogeo_provider_rate_limit_remaining',
+                                      'Last rate-limit-remaining header seen per provider', ['provider'],
+                                      multiprocess_mode='mostrecent')
+LLM_CACHE = Counter('astrogeo_llm_cache_total', 'LLM completion cache lookups', ['model', 'result'])
+PREFETCH = Counter('astrogeo_prefetch_total', 'Speculative provider prefetches by how they were used',
+                   ['provider', 'outcome'])
+
+class AgentTimer:
+    """Time a block as one agent request; usable with `with` or `async with`"""
+
+    def __init__(self, agent_name: str):
+        self.agent_name = agent_name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        status = 'error' if exc_type is not None else 'success'
+        AGENT_REQUESTS.labels(agent_name=self.agent_name, status=status).inc()
+        AGENT_DURATION.labels(agent_name=self.agent_name).observe(time.perf_counter() - self.start)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
 class MetricsCollector:
     """Collect and expose system metrics"""
     
@@ -19,28 +64,43 @@ class MetricsCollector:
         
     def start_metrics_server(self):
         """Start Prometheus metrics server"""
+        registry = None
+        if multiprocess_enabled():
+            # Serve the sum over every worker's files rather than this process's view
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
         try:
-            start_http_server(self.port)
+            if registry is not None:
+                start_http_server(self.port, registry=registry)
+            else:
+                start_http_server(self.port)
             logger.info(f"Metrics server started on port {self.port}")
+        except OSError as e:
+            if registry is not None:
+                logger.info(f"Metrics port {self.port} already served by another worker")
+            else:
+                logger.error(f"Failed to start metrics server: {e}")
         except Exception as e:
             logger.error(f"Failed to start metrics server: {e}")
     
+    def time_agent(self, agent_name: str) -> AgentTimer:
+        """Context manager timing one agent request (sync or async)"""
+        return AgentTimer(agent_name)
+    
     def track_agent_performance(self, agent_name: str):
-        """Decorator to track agent performance"""
+        """Decorator to track agent performance on sync or async functions"""
         def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    async with AgentTimer(agent_name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+            
             @wraps(func)
             def wrapper(*args, **kwargs):
-                start_time = time.time()
-                try:
-                    result = func(*args, **kwargs)
-                    AGENT_REQUESTS.labels(agent_name=agent_name, status='success').inc()
-                    return result
-                except Exception as e:
-                    AGENT_REQUESTS.labels(agent_name=agent_name, status='error').inc()
-                    raise
-                finally:
-                    duration = time.time() - start_time
-                    AGENT_DURATION.labels(agent_name=agent_name).observe(duration)
+                with AgentTimer(agent_name):
+                    return func(*args, **kwargs)
             return wrapper
         return decorator
     
@@ -48,6 +108,29 @@ class MetricsCollector:
         """Track external API calls"""
         API_CALLS.labels(provider=provider, endpoint=endpoint, status=status).inc()
     
+    def track_provider_request(self, provider: str, endpoint: str, status: str, duration: float,
+                               bytes_out: int = 0, bytes_in: int = 0, retries: int = 0,
+                               cache_hit: Optional[bool] = None, rate_limit_remaining: Optional[int] = None):
+        """Track one instrumented provider HTTP request"""
+        PROVIDER_REQUEST_DURATION.labels(provider=provider, endpoint=endpoint, status=status).observe(duration)
+        PROVIDER_BYTES.labels(provider=provider, direction='out').inc(bytes_out)
+        PROVIDER_BYTES.labels(provider=provider, direction='in').inc(bytes_in)
+        if retries:
+            PROVIDER_RETRIES.labels(provider=provider, endpoint=endpoint).inc(retries)
+        if cache_hit is not None:
+            PROVIDER_CACHE.labels(provider=provider, result='hit' if cache_hit else 'miss').inc()
+        if rate_limit_remaining is not None:
+            PROVIDER_RATE_LIMIT_REMAINING.labels(provider=provider).set(rate_limit_remaining)
+        self.track_api_call(provider, endpoint, status)
+    
+    def track_llm_cache(self, model: str, hit: bool):
+        """Track one LLM completion cache lookup"""
+        LLM_CACHE.labels(model=model, result='hit' if hit else 'miss').inc()
+    
+    def track_prefetch(self, provider: str, outcome: str):
+        """Track a speculative prefetch: issued, hit, joined (awaited in flight) or unused"""
+        PREFETCH.labels(provider=provider, outcome=outcome).inc()
+    
     def track_vector_db_query(self, status: str):
         """Track vector database queries"""
         VECTOR_DB_QUERIES.labels(status=status).inc()
@@ -0,0 +1,46 @@
+import os
+import shutil
+from typing import Optional
+
+import yaml
+from loguru import logger
+
+# prometheus_client picks its value storage when it is first imported: with
+# this variable set, every process writes its samples to files here and the
+# exporter sums them. So it must be set before anything imports
+# prometheus_client (monitoring.metrics, http_instrumentation, the app), and
+# this module must not import it either. gunicorn.conf.py calls
+# prepare_multiprocess_dir at load time, before workers import the app.
+MULTIPROC_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+def multiprocess_enabled() -> bool:
+    """Whether metrics are being written to a shared multiprocess directory"""
+    return bool(os.environ.get(MULTIPROC_ENV))
+
+def prepare_multiprocess_dir(path: Optional[str] = None, config_path: str = "config/settings.yaml") -> str:
+    """Empty and export the shared metrics directory; call once in the master before forking workers"""
+    if path is None:
+        path = os.environ.get(MULTIPROC_ENV)
+    if path is None:
+        try:
+            with open(config_path, 'r') as file:
+                config = yaml.safe_load(file) or {}
+            path = (config.get('monitoring', {}) or {}).get('multiprocess_dir')
+        except Exception as e:
+            logger.warning(f"Could not read monitoring settings: {e}")
+    path = path or './data/prometheus_multiproc'
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    os.environ[MULTIPROC_ENV] = path
+    return path
+
+def mark_worker_dead(pid: int) -> None:
+    """Drop a dead worker's live gauges so they stop counting toward the total"""
+    if multiprocess_enabled():
+        # Imported here: by now the master's environment is set up
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
+
+# Gunicorn server hook, exported by gunicorn.conf.py
+def child_exit(server, worker):
+    mark_worker_dead(worker.pid)
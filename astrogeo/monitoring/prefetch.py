@@ -0,0 +1,126 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+import yaml
+from loguru import logger
+
+from .http_instrumentation import http_session, speculative
+from .tracing import tracer
+
+NASA_BASE_URL = "https://api.nasa.gov"
+OPENWEATHER_BASE_URL = "https://api.openweathermap.org"
+
+DEFAULT_PREFETCH_SETTINGS = {
+    'enabled': True,
+    'max_workers': 4,
+}
+
+def load_prefetch_settings(config_path: str = "config/settings.yaml") -> Dict[str, Any]:
+    """Load the prefetch section of settings.yaml merged over defaults"""
+    settings = dict(DEFAULT_PREFETCH_SETTINGS)
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            settings.update(config.get('prefetch', {}) or {})
+    except Exception as e:
+        logger.warning(f"Using default prefetch settings: {e}")
+    return settings
+
+@dataclass
+class Fetch:
+    """One provider GET, with the exact URL and parameters the agent or tool will later request"""
+    url: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    timeout: float = 10
+    # Fetches to start with this one's response (e.g. weather once a location is geocoded)
+    then: Optional[Callable[[requests.Response], List["Fetch"]]] = None
+
+def nasa_fetches(query: str, api_key: Optional[str] = None) -> List[Fetch]:
+    """NASA calls the live-data agents make for a query, using the same keyword dispatch they do"""
+    query_lower = query.lower()
+    key = {"api_key": api_key or os.getenv('NASA_API_KEY', 'DEMO_KEY')}
+    if any(term in query_lower for term in ['solar', 'space weather', 'flare', 'sun']):
+        return [Fetch(f"{NASA_BASE_URL}/DONKI/FLR", dict(key))]
+    if any(term in query_lower for term in ['apod', 'picture', 'image', 'photo']) and 'mars' not in query_lower:
+        return [Fetch(f"{NASA_BASE_URL}/planetary/apod", dict(key))]
+    if 'mars' in query_lower and any(term in query_lower for term in ['photo', 'image', 'rover', 'picture']):
+        return [Fetch(f"{NASA_BASE_URL}/mars-photos/api/v1/rovers/curiosity/photos", {"sol": 1000, **key})]
+    if any(term in query_lower for term in ['asteroid', 'space rock', 'dangerous', 'near earth']):
+        return [Fetch(f"{NASA_BASE_URL}/neo/rest/v1/feed", dict(key))]
+    return []
+
+def weather_fetches(location: Optional[str], api_key: Optional[str] = None) -> List[Fetch]:
+    """Geocode a location, then its current weather and forecast, as IntelligentWeatherTool requests them"""
+    api_key = api_key or os.getenv('OPENWEATHERMAP_KEY', 'DEMO_KEY')
+    if not location or api_key == 'DEMO_KEY':
+        # The tool skips geocoding without a real key, so there is nothing to warm
+        return []
+
+    def forecast(response: requests.Response) -> List[Fetch]:
+        places = response.json() if response.ok else []
+        if not places:
+            return []
+        name = f"{places[0]['name']},{places[0]['country']}"
+        params = {"q": name, "appid": api_key, "units": "metric"}
+        return [Fetch(f"{OPENWEATHER_BASE_URL}/data/2.5/weather", dict(params)),
+                Fetch(f"{OPENWEATHER_BASE_URL}/data/2.5/forecast", dict(params))]
+
+    return [Fetch(f"{OPENWEATHER_BASE_URL}/geo/1.0/direct", {"q": location, "limit": 3, "appid": api_key},
+                  timeout=8, then=forecast)]
+
+class SpeculativePrefetcher:
+    """Start the provider fetches a routed query will need before the agent gets to them
+
+    Routing is cheap keyword matching, so the likely fetches are known well
+    before an agent runs. Prefetching them in the background overlaps
+    provider latency with vector search and LLM planning; the responses land
+    in the session's ResponseCache, where the agent's own request picks
+    them up (or waits for one still in flight). Fetch errors are logged and
+    otherwise ignored: the agent simply makes its request as usual.
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, settings: Optional[Dict[str, Any]] = None):
+        self.settings = settings or load_prefetch_settings()
+        self.enabled = bool(self.settings.get('enabled', True))
+        self.session = session or http_session
+        self.max_workers = int(self.settings.get('max_workers', 4))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="prefetch")
+            return self._executor
+
+    def prefetch(self, fetches: List[Fetch]) -> List[Future]:
+        """Start fetches in the background and return at once"""
+        if not self.enabled or not fetches:
+            return []
+        # Each fetch keeps the caller's context, so its span joins the request's trace
+        return [self.executor.submit(contextvars.copy_context().run, self._fetch, fetch) for fetch in fetches]
+
+    def _fetch(self, fetch: Fetch) -> None:
+        try:
+            with tracer.span("prefetch", url=fetch.url), speculative():
+                response = self.session.get(fetch.url, params=fetch.params, timeout=fetch.timeout)
+            if fetch.then is not None:
+                for follow_up in fetch.then(response):
+                    self._fetch(follow_up)
+        except Exception as e:
+            logger.debug(f"Prefetch of {fetch.url} failed: {e}")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+# Global prefetcher; its threads start on the first prefetch
+prefetcher = SpeculativePrefetcher()
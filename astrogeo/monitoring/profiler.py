@@ -0,0 +1,210 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+from loguru import logger
+
+# Keep requests short so a forgotten call cannot leave a worker sampling for long
+MAX_PROFILE_SECONDS = 60
+DEFAULT_INTERVAL_SECONDS = 0.005
+TRACEMALLOC_FRAMES = 10
+
+Frame = Tuple[str, str, int]  # function, file, first line
+
+def _frame_key(frame) -> Frame:
+    code = frame.f_code
+    parts = code.co_filename.replace('\\', '/').split('/')
+    return code.co_name, '/'.join(parts[-2:]), code.co_firstlineno
+
+def _frame_label(frame: Frame) -> str:
+    name, filename, line = frame
+    # ';' separates frames in collapsed stacks and ' ' separates the count
+    return f"{name} ({filename}:{line})".replace(';', ':').replace(' ', '_')
+
+class SamplingProfiler:
+    """Statistical profiler sampling every thread's stack from a background thread
+
+    Only reads sys._current_frames() at a fixed interval, so overhead is
+    bounded by the sampling rate rather than by how much code runs.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL_SECONDS):
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def sample(self, seconds: float) -> Dict[str, Any]:
+        """Sample all threads for `seconds`; raises RuntimeError if a profile is already running"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running on this worker")
+        try:
+            return self._sample(min(seconds, MAX_PROFILE_SECONDS))
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds: float) -> Dict[str, Any]:
+        stacks: Counter = Counter()
+        own_thread = threading.get_ident()
+        names = {}
+        samples = 0
+        start = time.perf_counter()
+        deadline = start + seconds
+
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack: List[Frame] = []
+                while frame is not None:
+                    stack.append(_frame_key(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                stacks[(names.get(thread_id, str(thread_id)),) + tuple(stack)] += 1
+            samples += 1
+            time.sleep(self.interval)
+
+        return {
+            'stacks': stacks,
+            'samples': samples,
+            'duration': time.perf_counter() - start,
+            'interval': self.interval,
+        }
+
+def to_collapsed(profile: Dict[str, Any], top: Optional[int] = None) -> str:
+    """Render a profile in Brendan Gregg's collapsed-stack format (flamegraph.pl, speedscope)"""
+    lines = []
+    for (thread_name, *frames), count in profile['stacks'].most_common(top):
+        stack = ';'.join([f"thread:{thread_name}".replace(' ', '_')] + [_frame_label(f) for f in frames])
+        lines.append(f"{stack} {count}")
+    return "\n".join(lines) + "\n"
+
+def to_speedscope(profile: Dict[str, Any], name: str = "astrogeo", top: Optional[int] = None) -> Dict[str, Any]:
+    """Render a profile as a speedscope file with one sampled profile per thread"""
+    frames: List[Dict[str, Any]] = []
+    frame_index: Dict[Frame, int] = {}
+    per_thread: Dict[str, Tuple[List[List[int]], List[float]]] = {}
+
+    for (thread_name, *stack), count in profile['stacks'].most_common(top):
+        indices = []
+        for frame in stack:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+            indices.append(frame_index[frame])
+        samples, weights = per_thread.setdefault(thread_name, ([], []))
+        samples.append(indices)
+        weights.append(count * profile['interval'])
+
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'astrogeo.monitoring.profiler',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': thread_name,
+            'unit': 'seconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        } for thread_name, (samples, weights) in per_thread.items()],
+    }
+
+class AllocationTracker:
+    """Diff tracemalloc snapshots taken before and after a window of live traffic"""
+
+    def __init__(self, nframes: int = TRACEMALLOC_FRAMES):
+        self.nframes = nframes
+        self._lock = threading.Lock()
+
+    def diff(self, seconds: float, top: int = 25, group_by: str = 'lineno') -> Dict[str, Any]:
+        """Trace allocations for `seconds` and return the largest growth sites"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("An allocation snapshot is already running on this worker")
+        started_here = not tracemalloc.is_tracing()
+        try:
+            if started_here:
+                tracemalloc.start(self.nframes)
+            before = self._snapshot()
+            time.sleep(min(seconds, MAX_PROFILE_SECONDS))
+            after = self._snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+            self._lock.release()
+
+        stats = after.compare_to(before, group_by)[:top]
+        return {
+            'seconds': seconds,
+            'traced_current_bytes': current,
+            'traced_peak_bytes': peak,
+            'top': [{
+                'location': [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                'size_diff_bytes': stat.size_diff,
+                'size_bytes': stat.size,
+                'count_diff': stat.count_diff,
+                'count': stat.count,
+            } for stat in stats],
+        }
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+
+# Global instances; one profile of each kind may run per worker at a time
+profiler = SamplingProfiler()
+allocation_tracker = AllocationTracker()
+
+def create_profiling_router(admin_dependency: Callable) -> APIRouter:
+    """Admin-only endpoints profiling the worker that serves the request"""
+    router = APIRouter(prefix="/admin/profile", tags=["admin"], dependencies=[Depends(admin_dependency)])
+
+    @router.get("/cpu")
+    async def profile_cpu(seconds: float = Query(10, gt=0, le=MAX_PROFILE_SECONDS),
+                          format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+                          top: int = Query(200, gt=0)):
+        """Sample every thread on this worker and return the hottest stacks"""
+        try:
+            # Sampling runs on a worker thread so the event loop keeps serving traffic
+            profile = await asyncio.to_thread(profiler.sample, seconds)
+        except RuntimeError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        logger.info(f"CPU profile taken on pid {os.getpid()}: {profile['samples']} samples over {seconds}s")
+
+        if format == "speedscope":
+            return JSONResponse(
+                to_speedscope(profile, name=f"astrogeo-{os.getpid()}", top=top),
+                headers={"Content-Disposition": f'attachment; filename="astrogeo-{os.getpid()}.speedscope.json"'}
+            )
+        return PlainTextResponse(to_collapsed(profile, top=top))
+
+    @router.get("/memory")
+    async def profile_memory(seconds: float = Query(10, gt=0, le=MAX_PROFILE_SECONDS),
+                             top: int = Query(25, gt=0, le=500),
+                             group_by: str = Query("lineno", pattern="^(lineno|traceback|filename)$")):
+        """Report allocation growth on this worker between two tracemalloc snapshots"""
+        try:
+            report = await asyncio.to_thread(allocation_tracker.diff, seconds, top, group_by)
+        except RuntimeError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        report['pid'] = os.getpid()
+        return report
+
+    return router
@@ -0,0 +1,272 @@
+import contextvars
+import inspect
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import requests
+import yaml
+from loguru import logger
+
+DEFAULT_TRACING_SETTINGS = {
+    'enabled': True,
+    'sample_rate': 0.05,
+    'latency_threshold_seconds': 5.0,
+    'exporter': 'jsonl',
+    'jsonl_dir': 'logs/traces',
+    'otlp_endpoint': 'http://localhost:4318/v1/traces',
+    'service_name': 'astrogeo',
+}
+
+# Characters allowed in a Server-Timing metric name (an HTTP token)
+SERVER_TIMING_UNSAFE = re.compile(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]")
+
+def load_tracing_settings(config_path: str = "config/settings.yaml") -> Dict[str, Any]:
+    """Load the tracing section of settings.yaml merged over defaults"""
+    settings = dict(DEFAULT_TRACING_SETTINGS)
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            settings.update(config.get('tracing', {}) or {})
+    except Exception as e:
+        logger.warning(f"Using default tracing settings: {e}")
+    return settings
+
+@dataclass
+class Span:
+    """One timed stage of a request"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_time: float
+    start_perf: float
+    end_perf: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        end = self.end_perf if self.end_perf is not None else time.perf_counter()
+        return end - self.start_perf
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_time': datetime.utcfromtimestamp(self.start_time).isoformat() + 'Z',
+            'duration_ms': round(self.duration * 1000, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+class Trace:
+    """All spans recorded under one root span; appended to from any thread"""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+        self.root: Optional[Span] = None
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def stage_durations(self) -> Dict[str, float]:
+        """Total seconds spent per span name, excluding the root span"""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            if span is not self.root and span.end_perf is not None:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration
+        return totals
+
+    def server_timing(self) -> str:
+        """Render the trace as a Server-Timing header value"""
+        parts = [f"{SERVER_TIMING_UNSAFE.sub('_', name)};dur={seconds * 1000:.1f}"
+                 for name, seconds in sorted(self.stage_durations().items(), key=lambda item: -item[1])]
+        if self.root is not None:
+            parts.append(f"total;dur={self.root.duration * 1000:.1f}")
+        return ", ".join(parts)
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('astrogeo_span', default=None)
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar('astrogeo_trace', default=None)
+
+class JsonlExporter:
+    """Append finished traces to a daily JSONL file, one span per line"""
+
+    def __init__(self, directory: str = 'logs/traces'):
+        self.directory = directory
+
+    def export(self, trace: Trace) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"traces-{datetime.utcnow():%Y%m%d}.jsonl")
+        with open(path, 'a', encoding='utf-8') as file:
+            for span in trace.spans:
+                file.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+class OtlpHttpExporter:
+    """POST finished traces as OTLP/JSON to a collector's /v1/traces endpoint"""
+
+    def __init__(self, endpoint: str, service_name: str = 'astrogeo', timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def _otlp_span(self, span: Span) -> Dict[str, Any]:
+        start_ns = int(span.start_time * 1e9)
+        return {
+            'traceId': span.trace_id,
+            'spanId': span.span_id,
+            'parentSpanId': span.parent_id or '',
+            'name': span.name,
+            'kind': 1,
+            'startTimeUnixNano': str(start_ns),
+            'endTimeUnixNano': str(start_ns + int(span.duration * 1e9)),
+            'attributes': [{'key': key, 'value': {'stringValue': str(value)}}
+                           for key, value in span.attributes.items()],
+            'status': {'code': 2, 'message': span.error} if span.error else {'code': 1},
+        }
+
+    def export(self, trace: Trace) -> None:
+        payload = {'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name',
+                                         'value': {'stringValue': self.service_name}}]},
+            'scopeSpans': [{'scope': {'name': 'astrogeo.tracing'},
+                            'spans': [self._otlp_span(span) for span in trace.spans]}],
+        }]}
+        # Plain requests on purpose: the instrumented session would trace its own export
+        requests.post(self.endpoint, json=payload, timeout=self.timeout).raise_for_status()
+
+def build_exporter(settings: Dict[str, Any]):
+    """Create the exporter named in tracing settings"""
+    if settings.get('exporter') == 'otlp':
+        return OtlpHttpExporter(settings['otlp_endpoint'], settings.get('service_name', 'astrogeo'))
+    return JsonlExporter(settings.get('jsonl_dir', 'logs/traces'))
+
+class Tracer:
+    """Create nested spans through contextvars and export sampled traces
+
+    A trace is always collected in memory (so Server-Timing works on every
+    response) but only exported when it is sampled by rate, is slower than
+    the latency threshold, or failed.
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None, exporter=None):
+        self.settings = settings or load_tracing_settings()
+        self.enabled = bool(self.settings.get('enabled', True))
+        self.sample_rate = float(self.settings.get('sample_rate', 0.05))
+        self.latency_threshold = float(self.settings.get('latency_threshold_seconds', 5.0))
+        self.exporter = exporter or build_exporter(self.settings)
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=1000)
+        self._thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """Time a block as a child of the current span, or as a new root"""
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        trace = _current_trace.get() if parent is not None else None
+        if trace is None:
+            trace = Trace(uuid.uuid4().hex)
+
+        span = Span(name=name, trace_id=trace.trace_id, span_id=uuid.uuid4().hex[:16],
+                    parent_id=parent.span_id if parent else None, start_time=time.time(),
+                    start_perf=time.perf_counter(), attributes=attributes)
+        if parent is None:
+            trace.root = span
+        trace.add(span)
+
+        span_token = _current_span.set(span)
+        trace_token = _current_trace.set(trace)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_perf = time.perf_counter()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            if parent is None:
+                self._finish(trace)
+
+    def trace(self, name: Optional[str] = None):
+        """Decorator recording each call of a sync or async function as a span"""
+        def decorator(func):
+            span_name = name or func.__qualname__
+            if inspect.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(span_name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def current_trace(self) -> Optional[Trace]:
+        """Trace of the span active in this context, if any"""
+        return _current_trace.get()
+
+    def _should_export(self, trace: Trace) -> bool:
+        if any(span.error for span in trace.spans):
+            return True
+        if trace.root is not None and trace.root.duration >= self.latency_threshold:
+            return True
+        return random.random() < self.sample_rate
+
+    def _finish(self, trace: Trace) -> None:
+        if not self._should_export(trace):
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._drain, name="trace-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            logger.warning("Trace export queue full, dropping trace")
+
+    def _drain(self) -> None:
+        while True:
+            trace = self._queue.get()
+            try:
+                self.exporter.export(trace)
+            except Exception as e:
+                logger.error(f"Failed to export trace {trace.trace_id}: {e}")
+
+def propagate(func: Callable) -> Callable:
+    """Bind func to the caller's trace context so spans it opens in a worker thread nest correctly"""
+    context = contextvars.copy_context()
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        # A context can only be entered by one thread at a time, so each call runs in a copy
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+# Global tracer instance
+tracer = Tracer()
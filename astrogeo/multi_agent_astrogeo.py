@@ -3,10 +3,22 @@ import os
 import sys
 from pathlib import Path
 from datetime import datetime
-import requests
 import chromadb
 from sentence_transformers import SentenceTransformer
 import json
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from astrogeo.api.streaming import emit_progress
+from astrogeo.cache.answer_cache import answer_cache
+from astrogeo.cache.embedding_cache import embedding_cache
+from astrogeo.embeddings.service import create_encoder
+from astrogeo.monitoring.http_instrumentation import http_session
+from astrogeo.monitoring.prefetch import nasa_fetches, prefetcher
+from astrogeo.monitoring.tracing import tracer
+from astrogeo.routing.fan_out import agent_fan_out
+from astrogeo.routing.keyword_router import keyword_router
+from astrogeo.routing.semantic_router import semantic_router
 
 # Add src to path
 sys.path.append('src')
@@ -16,21 +28,30 @@ NASA_API_KEY = os.getenv('NASA_API_KEY', 'DEMO_KEY')
 
 class BaseAgent:
     """Base agent class for all specialized agents"""
+    # Query type used to pick this agent's answer cache TTL
+    cache_type = "general_space"
+    
     def __init__(self, name, role, capabilities):
         self.name = name
         self.role = role
         self.capabilities = capabilities
     
     def can_handle(self, query):
-        """Check if this agent can handle the query"""
-        return False
+        """Check if this agent can handle the query (its cache_type intent in config/routing.yaml)"""
+        return semantic_router.route(query, 'agents').score(self.cache_type) > 0
     
     def process(self, query):
         """Process the query and return response"""
         return "Agent not implemented"
+    
+    def prefetches(self, query):
+        """Provider fetches process() is likely to make, started speculatively on an answer cache miss"""
+        return []
 
 class ISROGeospatialAgent(BaseAgent):
     """ISRO and Bhuvan geospatial specialist agent"""
+    cache_type = "isro_geospatial"
+    
     def __init__(self, vector_store):
         super().__init__(
             name="ISRO Geospatial Expert",
@@ -39,11 +60,6 @@ class ISROGeospatialAgent(BaseAgent):
         )
         self.vector_store = vector_store
     
-    def can_handle(self, query):
-        query_lower = query.lower()
-        keywords = ['isro', 'bhuvan', 'saphir', 'ocm', 'chandrayaan', 'mangalyaan', 'indian space', 'aryabhatta']
-        return any(keyword in query_lower for keyword in keywords)
-    
     def process(self, query):
         # Search vector database for ISRO-specific content
         results = self.vector_store.search_vector_db(query, k=5)
@@ -104,6 +120,8 @@ class ISROGeospatialAgent(BaseAgent):
 
 class NASALiveDataAgent(BaseAgent):
     """NASA live data specialist agent"""
+    cache_type = "nasa_live"
+    
     def __init__(self):
         super().__init__(
             name="NASA Live Data Specialist",
@@ -111,11 +129,17 @@ class NASALiveDataAgent(BaseAgent):
             capabilities=["APOD", "Solar activity", "Mars rover data", "Asteroid tracking"]
         )
     
-    def can_handle(self, query):
-        query_lower = query.lower()
-        live_keywords = ['today', 'current', 'now', 'recent', 'live', 'latest']
-        nasa_keywords = ['nasa', 'apod', 'picture', 'mars rover', 'solar', 'asteroid']
-        return any(live in query_lower for live in live_keywords) and any(nasa in query_lower for nasa in nasa_keywords)
+    def prefetches(self, query):
+        return nasa_fetches(query, NASA_API_KEY)
+    
+    def _fetch(self, url, **params):
+        """GET a NASA endpoint, reporting the call to a streaming client"""
+        start = time.perf_counter()
+        response = http_session.get(url, params=dict(params, api_key=NASA_API_KEY), timeout=10)
+        emit_progress("provider_call", agent=self.name, provider="nasa", url=url, status=response.status_code,
+                      elapsed_ms=round((time.perf_counter() - start) * 1000, 1))
+        response.raise_for_status()
+        return response.json()
     
     def process(self, query):
         query_lower = query.lower()
@@ -151,9 +175,7 @@ class NASALiveDataAgent(BaseAgent):
             return f"❌ Unable to fetch live NASA data: {str(e)}"
     
     def _get_solar_activity(self):
-        response = requests.get("https://api.nasa.gov/DONKI/FLR", params={"api_key": NASA_API_KEY}, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = self._fetch("https://api.nasa.gov/DONKI/FLR")
         
         if not data:
             return "☀️ **Solar Status**: The Sun is currently calm with no major flare activity - completely normal!"
@@ -177,9 +199,7 @@ class NASALiveDataAgent(BaseAgent):
 **Status**: Continuously monitored by NASA for space weather alerts."""
     
     def _get_apod(self):
-        response = requests.get("https://api.nasa.gov/planetary/apod", params={"api_key": NASA_API_KEY}, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = self._fetch("https://api.nasa.gov/planetary/apod")
         
         title = data.get('title', 'Unknown')
         explanation = data.get('explanation', '')[:200] + "..." if len(data.get('explanation', '')) > 200 else data.get('explanation', '')
@@ -190,13 +210,7 @@ class NASALiveDataAgent(BaseAgent):
 **View**: {url}"""
     
     def _get_mars_photos(self):
-        response = requests.get(
-            "https://api.nasa.gov/mars-photos/api/v1/rovers/curiosity/photos",
-            params={"sol": 1000, "api_key": NASA_API_KEY},
-            timeout=10
-        )
-        response.raise_for_status()
-        data = response.json()
+        data = self._fetch("https://api.nasa.gov/mars-photos/api/v1/rovers/curiosity/photos", sol=1000)
         
         photos = data.get('photos', [])
         if not photos:
@@ -209,9 +223,7 @@ class NASALiveDataAgent(BaseAgent):
         return result
     
     def _get_asteroid_data(self):
-        response = requests.get("https://api.nasa.gov/neo/rest/v1/feed", params={"api_key": NASA_API_KEY}, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = self._fetch("https://api.nasa.gov/neo/rest/v1/feed")
         
         total = sum(len(asteroids) for asteroids in data.get('near_earth_objects', {}).values())
         hazardous = sum(1 for asteroids in data.get('near_earth_objects', {}).values() 
@@ -223,6 +235,8 @@ class NASALiveDataAgent(BaseAgent):
 
 class SpaceWeatherAgent(BaseAgent):
     """Space weather monitoring agent"""
+    cache_type = "space_weather"
+    
     def __init__(self):
         super().__init__(
             name="Space Weather Monitor",
@@ -230,15 +244,13 @@ class SpaceWeatherAgent(BaseAgent):
             capabilities=["Solar activity", "Geomagnetic storms", "Radiation levels", "Satellite safety"]
         )
     
-    def can_handle(self, query):
-        query_lower = query.lower()
-        return any(term in query_lower for term in ['space weather', 'solar wind', 'geomagnetic', 'aurora', 'solar storm'])
-    
     def process(self, query):
         return f"☀️ **{self.name}**: Space weather analysis with solar activity monitoring, geomagnetic storm tracking, and satellite impact assessment."
 
 class GeospatialAgent(BaseAgent):
     """Geospatial and Earth observation agent"""
+    cache_type = "geospatial_expert"
+    
     def __init__(self, vector_store):
         super().__init__(
             name="Geospatial Intelligence Expert",
@@ -247,50 +259,40 @@ class GeospatialAgent(BaseAgent):
         )
         self.vector_store = vector_store
     
-    def can_handle(self, query):
-        query_lower = query.lower()
-        return any(term in query_lower for term in ['satellite', 'imagery', 'remote sensing', 'gis', 'earth observation', 'landsat', 'sentinel'])
-    
     def process(self, query):
         return f"🛰️ **{self.name}**: Satellite imagery analysis, remote sensing data processing, and environmental monitoring using advanced GIS techniques."
 
 class QueryRouter:
-    """Intelligent query router that decides which agent should handle the query"""
-    def __init__(self):
-        self.space_keywords = [
-            'space', 'astronomy', 'planet', 'star', 'galaxy', 'nasa', 'isro', 'esa', 
-            'satellite', 'rocket', 'mars', 'moon', 'sun', 'solar', 'asteroid', 
-            'comet', 'telescope', 'rover', 'spacecraft', 'orbit', 'mission', 
-            'apollo', 'chandrayaan', 'bhuvan', 'saphir', 'ocm', 'cosmic', 
-            'universe', 'celestial', 'nebula', 'meteor', 'spacex', 'apod'
-        ]
+    """Intelligent query router that decides which agent should handle the query
+    
+    The keyword rules live in config/routing.yaml and are compiled once into
+    keyword_router; a query is scanned once and every agent scored. Agents
+    are picked by semantic_router when it has a model and a clear match.
+    """
+    def __init__(self, router=None, semantic=None):
+        self.router = router or keyword_router
+        self.semantic = semantic or semantic_router
     
     def is_space_query(self, query):
         """Check if query is space-related"""
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in self.space_keywords)
+        return 'space' in self.router.route(query, 'domains').labels
     
     def identify_non_space_domain(self, query):
         """Identify what domain a non-space query belongs to"""
-        query_lower = query.lower()
-        
-        if any(term in query_lower for term in ['weather in', 'temperature in', 'climate in']):
-            return "weather/climate"
-        elif any(term in query_lower for term in ['news', 'current events']):
-            return "news"
-        elif any(term in query_lower for term in ['movie', 'film', 'entertainment']):
-            return "entertainment"
-        elif any(term in query_lower for term in ['food', 'restaurant', 'recipe']):
-            return "food/dining"
-        elif any(term in query_lower for term in ['travel', 'hotel', 'flight']):
-            return "travel"
-        else:
-            return "general information"
+        return self._non_space_domain(self.router.route(query, 'domains'))
     
+    @staticmethod
+    def _non_space_domain(domains):
+        return next((name for name in domains.labels if name != 'space'), domains.fallback)
+    
+    @tracer.trace("router.route_query")
     def route_query(self, query, agents):
-        """Route query to appropriate agent"""
-        if not self.is_space_query(query):
-            domain = self.identify_non_space_domain(query)
+        """Route query to the best-scoring agent; every matching agent is listed in 'candidates'"""
+        found = self.router.scan(query)
+        domains = self.router.route(query, 'domains', found)
+        if 'space' not in domains.labels:
+            domain = self._non_space_domain(domains)
+            emit_progress("routing", agent=None, domain=domain)
             return {
                 'agent': None,
                 'message': f"🤖 I'm AstroGeo, specialized in space and astronomy topics. Your query appears to be about {domain}. Please ask me about space agencies, planets, satellites, missions, or astronomical phenomena!",
@@ -302,14 +304,21 @@ class QueryRouter:
                 ]
             }
         
-        # Find the best agent for space queries
-        for agent in agents:
-            if agent.can_handle(query):
-                return {
-                    'agent': agent,
-                    'message': None,
-                    'suggestions': []
-                }
+        # Rank the agents whose intents matched, best first
+        by_intent = {agent.cache_type: agent for agent in agents}
+        routed = self.semantic.route(query, 'agents', found)
+        ranked = [(by_intent[intent.name], intent.confidence) for intent in routed.intents if intent.name in by_intent]
+        emit_progress("routing", agent=ranked[0][0].name if ranked else None,
+                      confidence=ranked[0][1] if ranked else 0.0, method=routed.method,
+                      candidates=[agent.name for agent, _ in ranked])
+        if ranked:
+            return {
+                'agent': ranked[0][0],
+                'confidence': ranked[0][1],
+                'candidates': ranked,
+                'message': None,
+                'suggestions': []
+            }
         
         # Default space knowledge
         return {
@@ -332,8 +341,9 @@ class IntelligentAstroGeoSystem:
         # Initialize vector database
         self.vector_store = self._initialize_vector_db()
         
-        # Initialize query router
+        # Initialize query router, and the fan-out for queries several agents match
         self.router = QueryRouter()
+        self.fan_out = agent_fan_out
         
         # Initialize all agents
         self.agents = [
@@ -344,6 +354,9 @@ class IntelligentAstroGeoSystem:
         ]
         
         print(f"✅ Initialized {len(self.agents)} specialized agents")
+        
+        # Agent centroids for semantic routing (a no-op without the embedding model)
+        semantic_router.fit('agents', {agent.cache_type: [agent.role] + agent.capabilities for agent in self.agents})
     
     def _initialize_vector_db(self):
         """Initialize vector database"""
@@ -354,19 +367,25 @@ class IntelligentAstroGeoSystem:
             
             if collections:
                 collection = collections[0]
-                embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+                encoder = create_encoder(lambda: SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2').encode)
+                # One cached encode for routing, the answer cache and vector search
+                embedding_cache.set_embedder(encoder)
+                answer_cache.set_embedder(embedding_cache.encode)
+                semantic_router.set_embedder(embedding_cache.encode)
                 print(f"✅ Vector DB connected: {collection.name}")
                 
                 class VectorStore:
-                    def __init__(self, client, collection, model):
+                    def __init__(self, client, collection, encoder):
                         self.client = client
                         self.collection = collection
-                        self.embedding_model = model
+                        self.encoder = encoder
                     
+                    @tracer.trace("vector.search")
                     def search_vector_db(self, query, k=3):
-                        query_embedding = self.embedding_model.encode([query])
+                        # Usually already embedded while routing
+                        query_embedding = embedding_cache.embed(query)
                         results = self.collection.query(
-                            query_embeddings=query_embedding.tolist(),
+                            query_embeddings=[query_embedding.tolist()],
                             n_results=k,
                             include=['documents', 'distances']
                         )
@@ -379,18 +398,23 @@ class IntelligentAstroGeoSystem:
                                     documents.append({'content': doc, 'score': score})
                         return documents
                 
-                return VectorStore(chroma_client, collection, embedding_model)
+                return VectorStore(chroma_client, collection, encoder)
             
         except Exception as e:
             print(f"⚠️ Vector DB not available: {e}")
             return None
     
     def search_vector_db(self, query, k=3):
-        """Wrapper for vector database search"""
-        if self.vector_store:
-            return self.vector_store.search_vector_db(query, k)
-        return []
+        """Wrapper for vector database search, reporting the documents found to a streaming client"""
+        documents = self.vector_store.search_vector_db(query, k) if self.vector_store else []
+        emit_progress("documents", query=query, documents=documents)
+        return documents
     
+    def answer(self, query):
+        """Answer outside the Gradio UI, e.g. from api_server_v2"""
+        return self.process_query(query, True, progress=lambda *args, **kwargs: None)
+    
+    @tracer.trace("process_query")
     def process_query(self, query, use_nasa_api, progress=gr.Progress()):
         """Main query processing with intelligent agent routing"""
         if not query.strip():
@@ -424,22 +448,69 @@ Ask me anything about space, astronomy, or space agencies!"""
                 
                 return response
             
-            # Process with selected agent
+            # Process with the selected agent, or every agent a compound query matched
             agent = routing_result['agent']
+            agents = self.fan_out.select(routing_result['candidates'])
+            if len(agents) > 1:
+                return self._process_fan_out(query, agents, response, progress)
+            
+            cached = answer_cache.get(query, agent.cache_type, agent.name)
+            if cached:
+                progress(1.0, desc="Answer served from cache")
+                return cached.answer
+            self._prefetch(query, agents)
+            
             progress(0.5, desc=f"Consulting {agent.name}...")
             
             response += f"**Assigned Agent**: {agent.name}\n"
             response += f"**Agent Role**: {agent.role}\n\n"
             
             # Agent processes the query
-            agent_response = agent.process(query)
-            response += agent_response
+            response += self._run_agent(agent, query)
             
             progress(1.0, desc="Analysis complete!")
+            answer_cache.put(query, response, agent.cache_type, agent.name)
             return response
             
         except Exception as e:
             return f"❌ System Error: {str(e)}\n\nPlease try rephrasing your space-related query!"
+    
+    def _process_fan_out(self, query, agents, response, progress):
+        """Answer with every selected agent concurrently, one section each in routing order"""
+        # Cached under the shortest TTL of the agents, keyed by the whole agent set
+        cache_type = self.fan_out.cache_type(agents, answer_cache.ttl_for)
+        variant = "+".join(agent.name for agent in agents)
+        cached = answer_cache.get(query, cache_type, variant)
+        if cached:
+            progress(1.0, desc="Answer served from cache")
+            return cached.answer
+        self._prefetch(query, agents)
+        
+        progress(0.5, desc=f"Consulting {len(agents)} agents...")
+        response += f"**Assigned Agents**: {', '.join(agent.name for agent in agents)}\n\n"
+        sections = self.fan_out.dispatch(query, agents, self._run_agent)
+        response += self.fan_out.merge(sections)
+        
+        progress(1.0, desc="Analysis complete!")
+        # Partial answers are not cached, so asking again can get the whole answer
+        if all(section.status == 'complete' for section in sections):
+            answer_cache.put(query, response, cache_type, variant)
+        return response
+    
+    @staticmethod
+    def _prefetch(query, agents):
+        # Only on a cache miss: start the provider calls the agents will make while their answer is assembled
+        for agent in agents:
+            prefetcher.prefetch(agent.prefetches(query))
+    
+    @staticmethod
+    def _run_agent(agent, query):
+        with tracer.span("agent.process", agent=agent.name):
+            return agent.process(query)
+
+def create_intelligent_routing_system():
+    """Callable answering a query with the multi-agent system, for the chat API"""
+    return IntelligentAstroGeoSystem().answer
 
 def create_agent_interface():
     system = IntelligentAstroGeoSystem()
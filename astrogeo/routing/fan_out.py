@@ -0,0 +1,153 @@
+import contextvars
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import yaml
+from loguru import logger
+
+from .keyword_router import DEFAULT_RULES_PATH
+
+DEFAULT_FAN_OUT_SETTINGS = {
+    'enabled': True,
+    'max_agents': 3,
+    # Candidates whose routing confidence is below this share of the best one are left out
+    'min_relative_confidence': 0.5,
+    'deadline_seconds': 8.0,
+    'deadlines': {},
+    'max_workers': 8,
+}
+
+def load_fan_out_settings(config_path: str = DEFAULT_RULES_PATH) -> Dict[str, Any]:
+    """Load the fan_out section of routing.yaml merged over defaults"""
+    settings = dict(DEFAULT_FAN_OUT_SETTINGS)
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            settings.update(config.get('fan_out', {}) or {})
+    except Exception as e:
+        logger.warning(f"Using default fan-out settings: {e}")
+    return settings
+
+def _paragraph_key(paragraph: str) -> str:
+    return re.sub(r"\W+", " ", paragraph.lower()).strip()
+
+@dataclass
+class AgentSection:
+    """One agent's part of a fanned-out answer"""
+    agent: Any
+    status: str  # 'complete', 'partial' (missed its deadline) or 'failed'
+    text: str = ""
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return getattr(self.agent, 'name', str(self.agent))
+
+class AgentFanOut:
+    """Send a compound query to every matching agent at once and merge the answers
+
+    Agents run on a shared thread pool, each in a copy of the caller's
+    context so their spans join the request's trace. An agent that misses
+    its deadline is reported as partial and left to finish in the
+    background; the answer is returned at the pace of the slowest agent that
+    made it. Sections keep routing order, whatever order they finish in.
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        self.settings = settings or load_fan_out_settings()
+        self.enabled = bool(self.settings.get('enabled', True))
+        self.max_agents = int(self.settings.get('max_agents', 3))
+        self.min_relative_confidence = float(self.settings.get('min_relative_confidence', 0.5))
+        self.deadline_seconds = float(self.settings.get('deadline_seconds', 8.0))
+        self.deadlines = dict(self.settings.get('deadlines', {}) or {})
+        self.max_workers = int(self.settings.get('max_workers', 8))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agent-fan-out")
+            return self._executor
+
+    def select(self, candidates: Sequence[Tuple[Any, float]]) -> List[Any]:
+        """Agents to consult, best first: the top candidate plus any close enough to it"""
+        if not candidates:
+            return []
+        if not self.enabled:
+            return [candidates[0][0]]
+        best = candidates[0][1]
+        return [agent for agent, confidence in candidates[:self.max_agents]
+                if best <= 0 or confidence >= best * self.min_relative_confidence]
+
+    def deadline_for(self, agent: Any) -> float:
+        """Seconds an agent gets, overridable per cache_type"""
+        return float(self.deadlines.get(getattr(agent, 'cache_type', None), self.deadline_seconds))
+
+    @staticmethod
+    def cache_type(agents: Sequence[Any], ttl_for: Callable[[str], float]) -> str:
+        """The agents' cache_type with the shortest TTL, so a merged answer expires with its most live section"""
+        return min((agent.cache_type for agent in agents), key=ttl_for)
+
+    def dispatch(self, query: str, agents: Sequence[Any],
+                 run: Optional[Callable[[Any, str], str]] = None) -> List[AgentSection]:
+        """Run agents concurrently and collect their sections in the given order
+
+        run(agent, query) produces an agent's text; agent.process(query) by default.
+        """
+        run = run or (lambda agent, q: agent.process(q))
+        start = time.perf_counter()
+        futures: List[Future] = [self.executor.submit(contextvars.copy_context().run, run, agent, query)
+                                 for agent in agents]
+
+        sections = []
+        for agent, future in zip(agents, futures):
+            remaining = start + self.deadline_for(agent) - time.perf_counter()
+            try:
+                text = future.result(timeout=max(remaining, 0))
+                sections.append(AgentSection(agent, 'complete', text or "", time.perf_counter() - start))
+            except FutureTimeout:
+                logger.warning(f"{getattr(agent, 'name', agent)} missed its {self.deadline_for(agent):.1f}s deadline")
+                sections.append(AgentSection(agent, 'partial', "", time.perf_counter() - start))
+            except Exception as e:
+                logger.error(f"{getattr(agent, 'name', agent)} failed: {e}")
+                sections.append(AgentSection(agent, 'failed', "", time.perf_counter() - start, str(e)))
+        return sections
+
+    @staticmethod
+    def merge(sections: Sequence[AgentSection]) -> str:
+        """One answer with a section per agent; paragraphs an earlier section already gave are dropped"""
+        seen = set()
+        parts = []
+        for section in sections:
+            header = f"**{section.name}**"
+            if section.status == 'partial':
+                parts.append(f"{header} ⏳ *partial: no answer within {section.elapsed:.1f}s*")
+                continue
+            if section.status == 'failed':
+                parts.append(f"{header} ⚠️ *unavailable: {section.error}*")
+                continue
+            paragraphs = []
+            for paragraph in re.split(r"\n\s*\n", section.text.strip()):
+                key = _paragraph_key(paragraph)
+                if key and key in seen:
+                    continue
+                seen.add(key)
+                paragraphs.append(paragraph)
+            parts.append(header + "\n" + "\n\n".join(paragraphs))
+        return "\n\n".join(parts)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+# Global fan-out; its threads start on the first dispatch
+agent_fan_out = AgentFanOut()
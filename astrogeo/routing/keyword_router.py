@@ -0,0 +1,218 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import yaml
+from loguru import logger
+
+DEFAULT_RULES_PATH = "config/routing.yaml"
+
+# Keys of an intent rule that configure matching; everything else is returned as metadata
+RULE_KEYS = {'keywords', 'requires', 'excludes', 'min_score'}
+
+def load_routing_rules(config_path: str = DEFAULT_RULES_PATH) -> Dict[str, Any]:
+    """Load the routing rules table; an empty table routes every query to each profile's fallback"""
+    try:
+        with open(config_path, 'r') as file:
+            return yaml.safe_load(file) or {}
+    except Exception as e:
+        logger.warning(f"Routing without keyword rules: {e}")
+        return {}
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """Regex matching any of the words, factored by shared prefixes so matching never backtracks
+    across alternatives; at any position it matches the longest word"""
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        terminal = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # Greedy, so the longer word wins and the shorter one is the fallback
+            return ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+        return body
+
+    return build(trie)
+
+def _weighted(keywords) -> Dict[str, float]:
+    """Normalise a keyword list (weight 1 each) or keyword -> weight mapping"""
+    if isinstance(keywords, dict):
+        return {str(k).lower(): float(w) for k, w in keywords.items()}
+    return {str(k).lower(): 1.0 for k in keywords or []}
+
+@dataclass
+class IntentRule:
+    """One intent of a routing profile"""
+    name: str
+    keywords: Dict[str, float]
+    requires: List[Dict[str, float]] = field(default_factory=list)
+    excludes: FrozenSet[str] = frozenset()
+    min_score: float = 0.0
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_config(cls, name: str, config: Dict[str, Any]) -> "IntentRule":
+        return cls(
+            name=name,
+            keywords=_weighted(config.get('keywords')),
+            requires=[_weighted(group) for group in config.get('requires', []) or []],
+            excludes=frozenset(str(k).lower() for k in config.get('excludes', []) or []),
+            min_score=float(config.get('min_score', 0) or 0),
+            meta={k: v for k, v in config.items() if k not in RULE_KEYS},
+        )
+
+    def all_keywords(self) -> Iterable[str]:
+        yield from self.keywords
+        for group in self.requires:
+            yield from group
+        yield from self.excludes
+
+@dataclass
+class IntentScore:
+    """How strongly a query matched one intent"""
+    name: str
+    score: float
+    confidence: float
+    matched: List[str]
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass
+class RouteResult:
+    """Every matching intent of a profile, best first"""
+    profile: str
+    intents: List[IntentScore]
+    fallback: Optional[str] = None
+    fallback_meta: Dict[str, Any] = field(default_factory=dict)
+    # 'keywords', or 'semantic' when routing/semantic_router.py decided
+    method: str = 'keywords'
+
+    @property
+    def top(self) -> Optional[str]:
+        """Best intent, or the profile's fallback when nothing matched"""
+        return self.intents[0].name if self.intents else self.fallback
+
+    @property
+    def confidence(self) -> float:
+        return self.intents[0].confidence if self.intents else 0.0
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return self.intents[0].meta if self.intents else self.fallback_meta
+
+    @property
+    def labels(self) -> List[str]:
+        return [intent.name for intent in self.intents]
+
+    def score(self, name: str) -> float:
+        return next((intent.score for intent in self.intents if intent.name == name), 0.0)
+
+class KeywordRouter:
+    """Score every intent of a routing profile in one pass over the query
+
+    All keywords of all profiles are compiled into a single prefix-factored
+    regex (a trie, so it behaves like an Aho-Corasick automaton run at word
+    starts) that reports the longest keyword at each word start; keywords
+    contained in a longer match (e.g. "solar" in "solar wind") are added from
+    a table built at compile time, so the scan finds exactly the keywords
+    present. Scoring is then a dictionary walk over those keywords.
+    Recent scans are cached, since one request is routed through several
+    profiles (and agents' can_handle) with the same query.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, Any]] = None, rules_path: str = DEFAULT_RULES_PATH,
+                 scan_cache_size: int = 1024):
+        self.rules = rules if rules is not None else load_routing_rules(rules_path)
+        self._cached_scan = lru_cache(maxsize=scan_cache_size)(self._scan)
+        self.profiles: Dict[str, List[IntentRule]] = {}
+        self.fallbacks: Dict[str, Tuple[Optional[str], Dict[str, Any], float]] = {}
+        # keyword -> [(intent index, 'keywords' | requires group index | 'excludes', weight)] per profile
+        self._index: Dict[str, Dict[str, List[Tuple[int, Any, float]]]] = {}
+        self._compile()
+
+    def _compile(self) -> None:
+        keywords = set()
+        for profile, config in (self.rules.get('profiles', {}) or {}).items():
+            config = config or {}
+            intents = [IntentRule.from_config(name, rule or {})
+                       for name, rule in (config.get('intents', {}) or {}).items()]
+            self.profiles[profile] = intents
+            self.fallbacks[profile] = (config.get('fallback'), dict(config.get('fallback_meta', {}) or {}),
+                                       float(config.get('fallback_weight', 1.0)))
+            index: Dict[str, List[Tuple[int, Any, float]]] = {}
+            for i, intent in enumerate(intents):
+                for keyword, weight in intent.keywords.items():
+                    index.setdefault(keyword, []).append((i, 'keywords', weight))
+                for g, group in enumerate(intent.requires):
+                    for keyword, weight in group.items():
+                        index.setdefault(keyword, []).append((i, g, weight))
+                for keyword in intent.excludes:
+                    index.setdefault(keyword, []).append((i, 'excludes', 0.0))
+                keywords.update(intent.all_keywords())
+            self._index[profile] = index
+
+        ordered = sorted(keywords, key=len, reverse=True)
+        self._pattern = re.compile(r"\b(?=(" + trie_pattern(ordered) + "))") if ordered else None
+        # A match hides shorter keywords starting at the same place or inside it
+        starts = {k: re.compile(r"\b" + re.escape(k)) for k in ordered}
+        self._contained = {k: frozenset(other for other in ordered if starts[other].search(k)) for k in ordered}
+
+    def scan(self, query: str) -> FrozenSet[str]:
+        """Every keyword occurring (at a word start) in the query"""
+        if self._pattern is None or not query:
+            return frozenset()
+        return self._cached_scan(query.lower())
+
+    def _scan(self, query_lower: str) -> FrozenSet[str]:
+        found = set()
+        for match in self._pattern.finditer(query_lower):
+            found.update(self._contained[match.group(1)])
+        return frozenset(found)
+
+    def route(self, query: str, profile: str, found: Optional[FrozenSet[str]] = None) -> RouteResult:
+        """Score every intent of a profile; pass `found` from scan() to reuse one scan across profiles"""
+        if profile not in self.profiles:
+            raise KeyError(f"Unknown routing profile: {profile}")
+        found = self.scan(query) if found is None else found
+        intents = self.profiles[profile]
+        fallback, fallback_meta, fallback_weight = self.fallbacks[profile]
+
+        # Only intents touched by a found keyword are scored
+        scores: Dict[int, float] = {}
+        matched: Dict[int, List[str]] = {}
+        satisfied: Dict[int, set] = {}
+        excluded = set()
+        index = self._index[profile]
+        for keyword in found.intersection(index):
+            for i, role, weight in index[keyword]:
+                if role == 'excludes':
+                    excluded.add(i)
+                    continue
+                scores[i] = scores.get(i, 0.0) + weight
+                matched.setdefault(i, []).append(keyword)
+                if role != 'keywords':
+                    satisfied.setdefault(i, set()).add(role)
+
+        hits = [i for i, score in scores.items()
+                if i not in excluded and score > 0 and score >= intents[i].min_score
+                and len(satisfied.get(i, ())) == len(intents[i].requires)]
+        total = sum(scores[i] for i in hits) + fallback_weight
+        hits.sort(key=lambda i: (-scores[i], i))
+        return RouteResult(
+            profile=profile,
+            intents=[IntentScore(intents[i].name, scores[i], scores[i] / total if total else 0.0,
+                                 sorted(matched[i]), intents[i].meta) for i in hits],
+            fallback=fallback,
+            fallback_meta=fallback_meta,
+        )
+
+# Compiled once per process from config/routing.yaml
+keyword_router = KeywordRouter()
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import yaml
+from loguru import logger
+
+from .keyword_router import DEFAULT_RULES_PATH, IntentScore, KeywordRouter, RouteResult, keyword_router
+
+DEFAULT_SEMANTIC_SETTINGS = {
+    'enabled': True,
+    'model_name': 'sentence-transformers/all-MiniLM-L6-v2',
+    # Cosine similarity the best centroid must reach, and its lead over the runner-up
+    'threshold': 0.35,
+    'margin': 0.04,
+    # Any two space queries embed fairly alike, so further intents must clear a higher bar to be reported
+    'multi_intent_threshold': 0.6,
+    'centroid_path': './data/intent_centroids.npz',
+    'examples': {},
+}
+
+def load_semantic_settings(config_path: str = DEFAULT_RULES_PATH) -> Dict[str, Any]:
+    """Load the semantic section of routing.yaml merged over defaults"""
+    settings = dict(DEFAULT_SEMANTIC_SETTINGS)
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            settings.update(config.get('semantic', {}) or {})
+    except Exception as e:
+        logger.warning(f"Using default semantic routing settings: {e}")
+    return settings
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+class SemanticRouter:
+    """Route queries by embedding similarity to per-intent centroids
+
+    Each intent's centroid is the mean embedding of its descriptions (an
+    agent's role and capabilities) and the example queries in routing.yaml,
+    so paraphrases like "How's the Sun behaving?" land on space_weather
+    without any keyword. Centroids are computed once per model and
+    description set and persisted; classifying a query is one
+    matrix-vector product against them.
+
+    When no model is loaded, a profile has no centroids, or the best match is
+    below the threshold or too close to the runner-up, the keyword router
+    decides instead. Besides the top intent, only intents at or above
+    multi_intent_threshold are reported, for fan-out to several agents. Apps pass the shared embedding cache's encode
+    (cache/embedding_cache.py), so vector search for the same query reuses
+    the embedding computed for routing.
+    """
+
+    def __init__(self, embed_fn: Optional[Callable[[List[str]], Any]] = None,
+                 settings: Optional[Dict[str, Any]] = None, fallback: Optional[KeywordRouter] = None):
+        self.settings = settings or load_semantic_settings()
+        self.enabled = bool(self.settings.get('enabled', True))
+        self.threshold = float(self.settings.get('threshold', 0.35))
+        self.margin = float(self.settings.get('margin', 0.04))
+        self.multi_intent_threshold = float(self.settings.get('multi_intent_threshold', 0.6))
+        self.centroid_path = self.settings.get('centroid_path')
+        self.fallback = fallback or keyword_router
+
+        self._embed_fn = embed_fn
+        # profile -> (intent names, unit centroid matrix)
+        self._centroids: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def set_embedder(self, embed_fn: Callable[[List[str]], Any]) -> None:
+        """Reuse an already loaded embedding model's encode function"""
+        with self._lock:
+            self._embed_fn = embed_fn
+            self._centroids.clear()
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self._embed_fn is not None
+
+    def embed(self, query: str) -> Optional[np.ndarray]:
+        """Unit-length float32 query embedding, or None without a model"""
+        if self._embed_fn is None:
+            return None
+        return _unit(np.asarray(self._embed_fn([query]), dtype=np.float32).reshape(-1))
+
+    def fit(self, profile: str, descriptions: Optional[Dict[str, List[str]]] = None) -> bool:
+        """Build (or load the persisted) centroids for a profile's intents
+
+        descriptions maps intent names to texts such as agent capabilities;
+        the profile's example queries from routing.yaml are added to them.
+        Returns False when there is nothing to fit or no model.
+        """
+        if not self.ready:
+            return False
+        descriptions = descriptions or {}
+        examples = (self.settings.get('examples', {}) or {}).get(profile, {}) or {}
+        texts: Dict[str, List[str]] = {}
+        for name in list(descriptions) + [n for n in examples if n not in descriptions]:
+            items = [str(t) for t in list(descriptions.get(name) or []) + list(examples.get(name) or [])]
+            if items:
+                texts[name] = items
+        if not texts:
+            return False
+
+        names = list(texts)
+        fingerprint = hashlib.sha256(json.dumps(
+            [self.settings.get('model_name'), profile, [[n, texts[n]] for n in names]]).encode('utf-8')).hexdigest()
+        matrix = self._load_centroids(profile, fingerprint, names)
+        if matrix is None:
+            try:
+                matrix = self._compute_centroids(names, texts)
+            except Exception as e:
+                logger.error(f"Semantic routing disabled for {profile}: {e}")
+                return False
+            self._save_centroids(profile, fingerprint, names, matrix)
+        with self._lock:
+            self._centroids[profile] = (names, matrix)
+        logger.info(f"Semantic router fitted {len(names)} intents for {profile}")
+        return True
+
+    def _compute_centroids(self, names: List[str], texts: Dict[str, List[str]]) -> np.ndarray:
+        # One encode call for every text of every intent
+        flat = [text for name in names for text in texts[name]]
+        vectors = _unit(np.asarray(self._embed_fn(flat), dtype=np.float32).reshape(len(flat), -1))
+        centroids, start = [], 0
+        for name in names:
+            count = len(texts[name])
+            centroids.append(vectors[start:start + count].mean(axis=0))
+            start += count
+        return _unit(np.stack(centroids)).astype(np.float32)
+
+    def _centroid_file(self, profile: str) -> Optional[str]:
+        if not self.centroid_path:
+            return None
+        root, ext = os.path.splitext(self.centroid_path)
+        return f"{root}.{profile}{ext or '.npz'}"
+
+    def _load_centroids(self, profile: str, fingerprint: str, names: List[str]) -> Optional[np.ndarray]:
+        path = self._centroid_file(profile)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data['fingerprint']) != fingerprint or list(data['names']) != names:
+                    return None
+                return data['centroids'].astype(np.float32)
+        except Exception as e:
+            logger.warning(f"Recomputing intent centroids for {profile}: {e}")
+            return None
+
+    def _save_centroids(self, profile: str, fingerprint: str, names: List[str], matrix: np.ndarray) -> None:
+        path = self._centroid_file(profile)
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'wb') as file:
+                np.savez(file, fingerprint=np.array(fingerprint), names=np.array(names), centroids=matrix)
+        except Exception as e:
+            logger.warning(f"Could not persist intent centroids for {profile}: {e}")
+
+    def similarities(self, query: str, profile: str) -> Dict[str, float]:
+        """Cosine similarity of the query to each intent centroid of a profile"""
+        fitted = self._centroids.get(profile)
+        vector = self.embed(query) if fitted and self.ready else None
+        if vector is None:
+            return {}
+        names, matrix = fitted
+        return dict(zip(names, (matrix @ vector).tolist()))
+
+    def route(self, query: str, profile: str, found=None) -> RouteResult:
+        """Route by centroid similarity, or by keyword rules when the match is weak or ambiguous"""
+        try:
+            scores = self.similarities(query, profile)
+        except Exception as e:
+            logger.error(f"Semantic routing failed, using keyword rules: {e}")
+            scores = {}
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        if not ranked or ranked[0][1] < self.threshold or \
+                (len(ranked) > 1 and ranked[0][1] - ranked[1][1] < self.margin):
+            return self.fallback.route(query, profile, found)
+
+        meta = {intent.name: intent.meta for intent in self.fallback.profiles.get(profile, [])}
+        fallback, fallback_meta, _ = self.fallback.fallbacks.get(profile, (None, {}, 1.0))
+        return RouteResult(
+            profile=profile,
+            intents=[IntentScore(name, score, score, [], meta.get(name, {}))
+                     for index, (name, score) in enumerate(ranked)
+                     if index == 0 or score >= self.multi_intent_threshold],
+            fallback=fallback,
+            fallback_meta=fallback_meta,
+            method='semantic',
+        )
+
+# Idle until an app hands it its embedding model (set_embedder) and fits its profiles
+semantic_router = SemanticRouter()
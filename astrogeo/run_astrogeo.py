@@ -3,10 +3,18 @@ import os
 import sys
 from pathlib import Path
 from datetime import datetime
-import requests
 import chromadb
 from sentence_transformers import SentenceTransformer
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from astrogeo.cache.answer_cache import answer_cache
+from astrogeo.cache.embedding_cache import embedding_cache
+from astrogeo.embeddings.service import create_encoder
+from astrogeo.monitoring.http_instrumentation import http_session
+from astrogeo.monitoring.prefetch import nasa_fetches, prefetcher
+from astrogeo.monitoring.tracing import tracer
+from astrogeo.routing.semantic_router import semantic_router
+
 # Add src to path
 sys.path.append('src')
 
@@ -22,7 +30,7 @@ class IntelligentAstroGeo:
         self.vector_db_path = "data/vector_store/vector_db"
         self.chroma_client = None
         self.collection = None
-        self.embedding_model = None
+        self.encoder = None
         self.initialize_vector_db()
     
     def initialize_vector_db(self):
@@ -34,20 +42,27 @@ class IntelligentAstroGeo:
                 self.collection = collections[0]
                 print(f"✅ Vector DB connected: {self.collection.name}")
             
-            self.embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+            self.encoder = create_encoder(lambda: SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2').encode)
+            # One cached encode for routing, the answer cache and vector search
+            embedding_cache.set_embedder(self.encoder)
+            answer_cache.set_embedder(embedding_cache.encode)
+            semantic_router.set_embedder(embedding_cache.encode)
+            semantic_router.fit('intelligent')
             print("✅ Embedding model loaded")
         except Exception as e:
             print(f"⚠️ Vector DB not available: {e}")
     
+    @tracer.trace("vector.search")
     def search_vector_db(self, query, k=3):
         """Search vector database for specific knowledge"""
         try:
-            if not self.collection or not self.embedding_model:
+            if not self.collection or not self.encoder:
                 return []
             
-            query_embedding = self.embedding_model.encode([query])
+            # Usually already embedded while routing
+            query_embedding = embedding_cache.embed(query)
             results = self.collection.query(
-                query_embeddings=query_embedding.tolist(),
+                query_embeddings=[query_embedding.tolist()],
                 n_results=k,
                 include=['documents', 'distances']
             )
@@ -64,79 +79,29 @@ class IntelligentAstroGeo:
             return []
     
     def analyze_query_intent(self, query):
-        """INTELLIGENT query analysis to decide which agent/data source to use"""
-        query_lower = query.lower()
-        
-        # ISRO/Bhuvan specific queries
-        if any(term in query_lower for term in ['bhuvan', 'isro', 'saphir', 'ocm', 'indian space', 'chandrayaan', 'mangalyaan']):
-            return {
-                'agent': 'isro_geospatial',
-                'data_source': 'vector_db',
-                'reason': 'ISRO/Indian space query - checking specialized knowledge base'
-            }
-        
-        # NASA live data queries
-        elif any(term in query_lower for term in ['nasa picture', 'apod', 'today', 'current nasa']) and not any(term in query_lower for term in ['solar', 'mars']):
-            return {
-                'agent': 'nasa_live',
-                'data_source': 'nasa_api',
-                'reason': 'Live NASA APOD request'
-            }
-        
-        # Space weather/solar activity
-        elif any(term in query_lower for term in ['solar', 'space weather', 'flare', 'sun activity', 'today', 'current']) and 'solar' in query_lower:
-            return {
-                'agent': 'space_weather',
-                'data_source': 'nasa_api',
-                'reason': 'Space weather monitoring query'
-            }
-        
-        # Asteroid tracking
-        elif any(term in query_lower for term in ['asteroid', 'space rock', 'dangerous', 'near earth']):
-            return {
-                'agent': 'asteroid_tracker',
-                'data_source': 'nasa_api',
-                'reason': 'Asteroid monitoring query'
-            }
+        """INTELLIGENT query analysis to decide which agent/data source to use
         
-        # Mars exploration
-        elif any(term in query_lower for term in ['mars', 'red planet', 'rover', 'perseverance', 'curiosity']):
-            return {
-                'agent': 'mars_expert',
-                'data_source': 'mixed',  # Both NASA API and knowledge
-                'reason': 'Mars exploration query'
-            }
-        
-        # General space agencies
-        elif any(term in query_lower for term in ['nasa', 'esa', 'spacex']) and not any(term in query_lower for term in ['picture', 'today', 'current']):
-            return {
-                'agent': 'space_agency_expert',
-                'data_source': 'knowledge_base',
-                'reason': 'General space agency information'
-            }
-        
-        # Satellite/geospatial technology
-        elif any(term in query_lower for term in ['satellite', 'geospatial', 'remote sensing', 'earth observation']):
-            return {
-                'agent': 'geospatial_expert',
-                'data_source': 'vector_db',
-                'reason': 'Geospatial/satellite technology query'
-            }
-        
-        # Default
-        else:
-            return {
-                'agent': 'general_space',
-                'data_source': 'knowledge_base',
-                'reason': 'General space knowledge query'
-            }
+        Every intent of the 'intelligent' profile in config/routing.yaml is
+        scored, by embedding similarity when the model is loaded and the match
+        is clear, else by keyword rules; the best one is returned along with
+        the other matches.
+        """
+        result = semantic_router.route(query, 'intelligent')
+        return {
+            'agent': result.top,
+            'data_source': result.meta.get('data_source', 'knowledge_base'),
+            'reason': result.meta.get('reason', 'General space knowledge query'),
+            'confidence': result.confidence,
+            'intents': [(intent.name, intent.confidence) for intent in result.intents],
+            'method': result.method
+        }
     
     def get_nasa_live_data(self, query_lower):
         """Get live NASA data based on query analysis"""
         try:
             # Solar activity / space weather
             if any(term in query_lower for term in ['solar', 'space weather', 'flare', 'sun']):
-                response = requests.get(
+                response = http_session.get(
                     "https://api.nasa.gov/DONKI/FLR",
                     params={"api_key": NASA_API_KEY},
                     timeout=10
@@ -178,7 +143,7 @@ class IntelligentAstroGeo:
             
             # APOD - Astronomy Picture of the Day
             elif any(term in query_lower for term in ['apod', 'picture', 'image', 'photo']) and 'mars' not in query_lower:
-                response = requests.get(
+                response = http_session.get(
                     "https://api.nasa.gov/planetary/apod",
                     params={"api_key": NASA_API_KEY},
                     timeout=10
@@ -210,7 +175,7 @@ class IntelligentAstroGeo:
             
             # Mars rover photos
             elif any(term in query_lower for term in ['mars']) and any(term in query_lower for term in ['photo', 'image', 'rover', 'picture']):
-                response = requests.get(
+                response = http_session.get(
                     "https://api.nasa.gov/mars-photos/api/v1/rovers/curiosity/photos",
                     params={"sol": 1000, "api_key": NASA_API_KEY},
                     timeout=10
@@ -238,7 +203,7 @@ class IntelligentAstroGeo:
             
             # Near-Earth asteroids
             elif any(term in query_lower for term in ['asteroid', 'space rock', 'dangerous', 'near earth']):
-                response = requests.get(
+                response = http_session.get(
                     "https://api.nasa.gov/neo/rest/v1/feed",
                     params={"api_key": NASA_API_KEY},
                     timeout=10
@@ -358,6 +323,7 @@ Space is full of incredible wonders:
 
 Ask me about specific topics like NASA missions, Mars exploration, or space agencies!"""
     
+    @tracer.trace("process_query")
     def process_query(self, query, use_nasa_api, progress=gr.Progress()):
         """INTELLIGENT query processing with proper routing"""
         if not query.strip():
@@ -367,7 +333,16 @@ Ask me about specific topics like NASA missions, Mars exploration, or space agen
             progress(0.1, desc="Analyzing your query...")
             
             # STEP 1: Intelligent query analysis
-            intent = self.analyze_query_intent(query)
+            with tracer.span("router.route_query"):
+                intent = self.analyze_query_intent(query)
+            cache_variant = f"nasa_api={bool(use_nasa_api)}"
+            cached = answer_cache.get(query, intent['agent'], cache_variant)
+            if cached:
+                progress(1.0, desc="Answer served from cache")
+                return cached.answer
+            if use_nasa_api and intent['agent'] in ['nasa_live', 'space_weather', 'asteroid_tracker', 'mars_expert']:
+                # Cache miss: start the NASA call now so it overlaps building the rest of the response
+                prefetcher.prefetch(nasa_fetches(query, NASA_API_KEY))
             
             response = f"🧠 **AstroGeo Intelligent Analysis**\n\n"
             response += f"**Query**: {query}\n"
@@ -413,6 +388,7 @@ Ask me about specific topics like NASA missions, Mars exploration, or space agen
                 response += f"📖 **Space Knowledge**:\n\n{general_knowledge}"
             
             progress(1.0, desc="Analysis complete!")
+            answer_cache.put(query, response, intent['agent'], cache_variant)
             return response
             
         except Exception as e:
@@ -1,19 +1,174 @@
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 import jwt
+import yaml
+from loguru import logger
 from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, status, Depends, Header
 from fastapi.security import OAuth2PasswordBearer
+import hmac
 import os
 
 # Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# Shared secret for admin endpoints on servers without user accounts; unset disables them
+ADMIN_TOKEN = os.getenv("ASTROGEO_ADMIN_TOKEN")
+
+def load_auth_settings(config_path: str = "config/settings.yaml") -> Dict[str, Any]:
+    """Load the authentication section of settings.yaml"""
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+            return config.get('authentication', {}) or {}
+    except Exception as e:
+        logger.warning(f"Using default authentication settings: {e}")
+        return {}
+
+auth_settings = load_auth_settings()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# bcrypt releases the GIL, so a small thread pool caps concurrent hashes
+# without letting a login burst starve the event loop
+password_executor = ThreadPoolExecutor(
+    max_workers=int(auth_settings.get('password_hash_workers', 4)),
+    thread_name_prefix="bcrypt"
+)
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+class TokenCache:
+    """Bounded LRU of verified token claims, each dropped once its exp passes"""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = _token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, token: str, claims: Dict[str, Any], expires_at: float) -> None:
+        key = _token_key(token)
+        with self._lock:
+            self._entries[key] = (claims, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(_token_key(token), None)
+
+class RevocationList:
+    """Revoked token ids, remembered only until the token would have expired anyway"""
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, token_id: str, expires_at: float) -> None:
+        with self._lock:
+            self._revoked[token_id] = expires_at
+            now = time.time()
+            for expired in [key for key, exp in self._revoked.items() if exp <= now]:
+                del self._revoked[expired]
+
+    def is_revoked(self, token_id: str) -> bool:
+        with self._lock:
+            return token_id in self._revoked
+
+def _redis_errors() -> Tuple[type, ...]:
+    """Exceptions a Redis command raises when the server is unreachable or failing"""
+    try:
+        import redis
+        return (redis.RedisError, OSError)
+    except ImportError:
+        return (ConnectionError, TimeoutError, OSError)
+
+class RedisRevocationList:
+    """Revoked token ids in Redis, shared by every worker
+
+    Each id is a key that Redis expires when the token would have, so a
+    logout on one worker is seen by all of them, including workers holding
+    the token's claims in their own TokenCache. Revocations are also kept in
+    this worker's memory, which answers while Redis is unreachable.
+    """
+
+    PREFIX = "astrogeo:revoked:"
+
+    def __init__(self, url: Optional[str] = None, client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError("The redis revocation backend requires the redis package") from e
+            client = redis.Redis.from_url(url)
+        self._client = client
+        self._errors = _redis_errors()
+        self._local = RevocationList()
+        self._available = True
+
+    def _unavailable(self, e: Exception) -> None:
+        # Log once per outage rather than on every request
+        if self._available:
+            logger.error(f"Redis revocation list unreachable, using this worker's revocations: {e}")
+        self._available = False
+
+    def revoke(self, token_id: str, expires_at: float) -> None:
+        self._local.revoke(token_id, expires_at)
+        ttl = int(expires_at - time.time()) + 1
+        if ttl > 0:
+            try:
+                self._client.set(self.PREFIX + token_id, 1, ex=ttl)
+            except self._errors as e:
+                self._unavailable(e)
+
+    def is_revoked(self, token_id: str) -> bool:
+        try:
+            revoked = bool(self._client.exists(self.PREFIX + token_id))
+        except self._errors as e:
+            self._unavailable(e)
+            return self._local.is_revoked(token_id)
+        if not self._available:
+            logger.info("Redis revocation list reachable again")
+            self._available = True
+        return revoked or self._local.is_revoked(token_id)
+
+def build_revocation_list(settings: Dict[str, Any]):
+    """Create the revocation list named in authentication settings, falling back to memory"""
+    if settings.get('revocation_backend') == 'redis':
+        try:
+            return RedisRevocationList(settings.get('revocation_redis_url', "redis://localhost:6379/0"))
+        except Exception as e:
+            logger.warning(f"Redis revocation backend unavailable, revocations stay per worker: {e}")
+    return RevocationList()
+
+# Global instances
+token_cache = TokenCache(int(auth_settings.get('token_cache_size', 10000)))
+revocation_list = build_revocation_list(auth_settings)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -22,6 +177,16 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bcrypt pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the bcrypt pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
@@ -30,22 +195,35 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _token_id(payload: Dict[str, Any], token: str) -> str:
+    # Tokens issued before jti was added are revoked by hash instead
+    return payload.get("jti") or _token_key(token)
+
+def _token_expiry(payload: Dict[str, Any]) -> float:
+    return float(payload.get("exp") or time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 def verify_token(token: str):
     """Verify JWT token"""
+    cached = token_cache.get(token)
+    if cached is not None and not revocation_list.is_revoked(cached["token_id"]):
+        return cached["user"]
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
-        if username is None:
+        if username is None or revocation_list.is_revoked(_token_id(payload, token)):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return {"username": username}
+        user = {"username": username, "is_admin": bool(payload.get("admin", False))}
+        token_cache.put(token, {"user": user, "token_id": _token_id(payload, token)}, _token_expiry(payload))
+        return user
     except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -53,6 +231,15 @@ def verify_token(token: str):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def revoke_token(token: str) -> None:
+    """Revoke a token so it is rejected until it expires"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return
+    revocation_list.revoke(_token_id(payload, token), _token_expiry(payload))
+    token_cache.discard(token)
+
 def authenticate_user(username: str, password: str):
     """Authenticate user credentials"""
     # Mock authentication - replace with database lookup
@@ -63,3 +250,21 @@ def authenticate_user(username: str, password: str):
 def get_current_active_user(token: str = Depends(oauth2_scheme)):
     """Get current active user from token"""
     return verify_token(token)
+
+def get_current_admin_user(current_user: dict = Depends(get_current_active_user)):
+    """Get current user, rejecting anyone without the admin claim"""
+    if not current_user.get("is_admin"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Check the X-Admin-Token header against ASTROGEO_ADMIN_TOKEN"""
+    if not ADMIN_TOKEN or not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return {"username": "admin", "is_admin": True}
@@ -0,0 +1,396 @@
+import asyncio
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import yaml
+from fastapi import status
+from fastapi.responses import JSONResponse
+from loguru import logger
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from .auth import verify_token
+
+DEFAULT_RATE_LIMIT_SETTINGS = {
+    'enabled': True,
+    'backend': 'memory',
+    'redis_url': 'redis://localhost:6379/0',
+    'trust_forwarded_for': False,
+    'per_ip': {'limit': 120, 'window_seconds': 60},
+    'per_user': {'limit': 300, 'window_seconds': 60},
+    'login': {'limit': 5, 'window_seconds': 900},
+    'route_costs': {},
+    'concurrency': {'routes': [], 'max_concurrent': 4, 'max_queue': 16, 'queue_timeout_seconds': 30},
+}
+
+def load_rate_limit_settings(config_path: str = "config/settings.yaml") -> Dict[str, Any]:
+    """Load rate limiting settings, honouring api.rate_limiting and authentication.max_login_attempts"""
+    settings = dict(DEFAULT_RATE_LIMIT_SETTINGS)
+    try:
+        with open(config_path, 'r') as file:
+            config = yaml.safe_load(file) or {}
+        for key, value in (config.get('rate_limiting', {}) or {}).items():
+            if isinstance(value, dict) and isinstance(settings.get(key), dict):
+                value = dict(settings[key], **value)
+            settings[key] = value
+        settings['enabled'] = bool((config.get('api', {}) or {}).get('rate_limiting', True))
+        max_login_attempts = (config.get('authentication', {}) or {}).get('max_login_attempts')
+        if max_login_attempts:
+            settings['login'] = dict(settings['login'], limit=int(max_login_attempts))
+    except Exception as e:
+        logger.warning(f"Using default rate limiting settings: {e}")
+    return settings
+
+# (key, limit, window seconds, cost) for each window a request is charged to
+WindowCheck = Tuple[str, int, float, int]
+
+class InMemoryBackend:
+    """Weighted sliding-window log per key, local to this worker"""
+
+    # Hits are in-process, so the middleware calls them on the event loop
+    blocking = False
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._windows: Dict[str, Deque[Tuple[float, int]]] = {}
+        self._lock = threading.Lock()
+
+    def _sweep(self, now: float, window: float) -> None:
+        # Forget callers whose newest hit has left the window
+        for key in [key for key, entries in self._windows.items() if not entries or entries[-1][0] <= now - window]:
+            del self._windows[key]
+
+    def hit(self, key: str, limit: int, window: float, cost: int = 1, commit: bool = True) -> Tuple[bool, float]:
+        """Record cost against key; returns (allowed, seconds until it would be allowed)
+
+        With commit=False the window is only checked, nothing is recorded.
+        """
+        return self.hit_many([(key, limit, window, cost)], commit)
+
+    def hit_many(self, checks: List[WindowCheck], commit: bool = True) -> Tuple[bool, float]:
+        """Check every window first and record the costs only if all of them admit theirs
+
+        A request rejected by one window (say per-user) is then not charged to
+        the others (per-IP), so retries do not drain windows they never used.
+        """
+        now = time.monotonic()
+        with self._lock:
+            waits = []
+            for key, limit, window, cost in checks:
+                if key not in self._windows and len(self._windows) >= self.max_keys:
+                    self._sweep(now, window)
+                entries = self._windows.setdefault(key, deque())
+                while entries and entries[0][0] <= now - window:
+                    entries.popleft()
+                wait = self._wait(entries, limit, window, cost, now)
+                if wait is not None:
+                    waits.append(wait)
+            if waits:
+                return False, max(waits)
+            if commit:
+                for key, _, _, cost in checks:
+                    self._windows[key].append((now, cost))
+            return True, 0.0
+
+    @staticmethod
+    def _wait(entries: Deque[Tuple[float, int]], limit: int, window: float, cost: int, now: float) -> Optional[float]:
+        # None if cost fits, else seconds until enough of the window expires
+        used = sum(weight for _, weight in entries)
+        if used + cost <= limit:
+            return None
+        if not entries:
+            # The cost alone exceeds the limit
+            return window
+
+        freed = 0
+        for timestamp, weight in entries:
+            freed += weight
+            if used - freed + cost <= limit:
+                return timestamp + window - now
+        return window
+
+class RedisBackend:
+    """Weighted sliding-window log in Redis, shared by every worker"""
+
+    # Each hit is a network round trip, so the middleware runs it in a thread
+    blocking = True
+
+    # Trim and sum every window, then either admit and record the cost in all
+    # of them or report the longest wait until enough cost expires
+    SCRIPT = """
+local now = tonumber(ARGV[1])
+local member = ARGV[2]
+local commit = ARGV[3] == '1'
+local wait = nil
+for k = 1, #KEYS do
+  local window = tonumber(ARGV[k * 3 + 2])
+  local limit = tonumber(ARGV[k * 3 + 1])
+  local cost = tonumber(ARGV[k * 3 + 3])
+  redis.call('ZREMRANGEBYSCORE', KEYS[k], '-inf', now - window)
+  local entries = redis.call('ZRANGE', KEYS[k], 0, -1, 'WITHSCORES')
+  local used = 0
+  for i = 1, #entries, 2 do
+    used = used + tonumber(string.match(entries[i], ':(%d+)$'))
+  end
+  if used + cost > limit then
+    local key_wait = window
+    local freed = 0
+    for i = 1, #entries, 2 do
+      freed = freed + tonumber(string.match(entries[i], ':(%d+)$'))
+      if used - freed + cost <= limit then
+        key_wait = tonumber(entries[i + 1]) + window - now
+        break
+      end
+    end
+    if wait == nil or key_wait > wait then
+      wait = key_wait
+    end
+  end
+end
+if wait ~= nil then
+  return {0, tostring(wait)}
+end
+if commit then
+  for k = 1, #KEYS do
+    local window = tonumber(ARGV[k * 3 + 2])
+    redis.call('ZADD', KEYS[k], now, member .. ':' .. ARGV[k * 3 + 3])
+    redis.call('EXPIRE', KEYS[k], math.ceil(window))
+  end
+end
+return {1, '0'}
+"""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("The redis rate limit backend requires the redis package") from e
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def hit(self, key: str, limit: int, window: float, cost: int = 1, commit: bool = True) -> Tuple[bool, float]:
+        return self.hit_many([(key, limit, window, cost)], commit)
+
+    def hit_many(self, checks: List[WindowCheck], commit: bool = True) -> Tuple[bool, float]:
+        args: List[Any] = [time.time(), uuid.uuid4().hex, int(commit)]
+        for _, limit, window, cost in checks:
+            args.extend([limit, window, cost])
+        allowed, retry_after = self._script(
+            keys=[f"astrogeo:ratelimit:{key}" for key, _, _, _ in checks],
+            args=args
+        )
+        return bool(int(allowed)), float(retry_after)
+
+def build_backend(settings: Dict[str, Any]):
+    """Create the rate limit backend named in settings, falling back to memory"""
+    if settings.get('backend') == 'redis':
+        try:
+            return RedisBackend(settings['redis_url'])
+        except Exception as e:
+            logger.warning(f"Redis rate limit backend unavailable, using in-memory limits: {e}")
+    return InMemoryBackend()
+
+class AdmissionRejected(Exception):
+    """Raised when the admission queue is full or the wait times out"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Server busy, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Cap concurrent expensive requests with a bounded, time-limited wait queue"""
+
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 16, queue_timeout: float = 30.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the serving event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    async def acquire(self) -> None:
+        semaphore = self.semaphore
+        if not semaphore.locked():
+            await semaphore.acquire()
+            return
+        if self.waiting >= self.max_queue:
+            raise AdmissionRejected(self.queue_timeout)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise AdmissionRejected(self.queue_timeout)
+        finally:
+            self.waiting -= 1
+
+    def release(self) -> None:
+        self.semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self, patient: bool = False) -> AsyncIterator[None]:
+        """Hold a slot for a block; patient callers (batch items) retry instead of being rejected"""
+        while True:
+            try:
+                await self.acquire()
+                break
+            except AdmissionRejected as e:
+                if not patient:
+                    raise
+                await asyncio.sleep(min(e.retry_after, 5))
+        try:
+            yield
+        finally:
+            self.release()
+
+def _too_many_requests(detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    """Per-IP and per-user sliding-window limits plus admission control for crew-backed routes
+
+    Each route costs route_costs[path] units (default 1) against the caller's
+    windows, so one expensive crew run counts as many cheap requests.
+    """
+
+    def __init__(self, app, settings: Optional[Dict[str, Any]] = None, backend=None):
+        super().__init__(app)
+        self.settings = settings or load_rate_limit_settings()
+        self.enabled = bool(self.settings.get('enabled', True))
+        self.backend = backend or build_backend(self.settings)
+        self.route_costs: Dict[str, int] = self.settings.get('route_costs', {}) or {}
+        concurrency = self.settings.get('concurrency', {}) or {}
+        self.admission_routes: List[str] = concurrency.get('routes', []) or []
+        self.admission = AdmissionController(
+            max_concurrent=int(concurrency.get('max_concurrent', 4)),
+            max_queue=int(concurrency.get('max_queue', 16)),
+            queue_timeout=float(concurrency.get('queue_timeout_seconds', 30)),
+        )
+
+    def client_ip(self, request: Request) -> str:
+        if self.settings.get('trust_forwarded_for'):
+            forwarded = request.headers.get('X-Forwarded-For')
+            if forwarded:
+                return forwarded.split(',')[0].strip()
+        return request.client.host if request.client else 'unknown'
+
+    def username(self, request: Request) -> Optional[str]:
+        authorization = request.headers.get('Authorization', '')
+        if not authorization.lower().startswith('bearer '):
+            return None
+        try:
+            return verify_token(authorization[7:])['username']
+        except Exception:
+            return None
+
+    async def _call(self, fn, *args):
+        # Backends that do network I/O (and token checks against a shared revocation list) run off the loop
+        if getattr(self.backend, 'blocking', False):
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def retry_after(self, request: Request, cost: Optional[int] = None) -> Optional[float]:
+        """Charge the request's cost to all its windows; seconds to wait if any window is full, else None"""
+        path = request.url.path
+        cost = int(self.route_costs.get(path, 1)) if cost is None else cost
+        ip = self.client_ip(request)
+
+        if path.endswith('/login'):
+            # Only failed logins are charged (charge_failed_login); here the bucket is just checked
+            login = self.settings['login']
+            allowed, retry_after = self.backend.hit(
+                f"login:{ip}", int(login['limit']), float(login['window_seconds']), 1, commit=False)
+            if not allowed:
+                logger.warning(f"Too many failed logins from {ip}")
+                return retry_after
+
+        windows = [(f"ip:{ip}", self.settings['per_ip'])]
+        user = self.username(request)
+        if user:
+            windows.append((f"user:{user}", self.settings['per_user']))
+
+        # Charged to every window or, if any is full, to none
+        allowed, retry_after = self.backend.hit_many(
+            [(key, int(limit['limit']), float(limit['window_seconds']), cost) for key, limit in windows])
+        if not allowed:
+            logger.warning(f"Rate limit exceeded for {', '.join(key for key, _ in windows)} on {path}")
+            return retry_after
+        return None
+
+    def charge_failed_login(self, request: Request) -> None:
+        login = self.settings['login']
+        self.backend.hit(f"login:{self.client_ip(request)}", int(login['limit']), float(login['window_seconds']), 1)
+
+    async def check_limits(self, request: Request) -> Optional[JSONResponse]:
+        retry_after = await self._call(self.retry_after, request)
+        if retry_after is None:
+            return None
+        return _too_many_requests("Rate limit exceeded", retry_after)
+
+    async def pace(self, request: Request, cost: int) -> None:
+        """Wait until the caller's windows can absorb `cost` more units, then charge them
+
+        For work an endpoint fans out after admission, such as batch items,
+        which should be slowed to the caller's limits rather than rejected.
+        """
+        if not self.enabled:
+            return
+        # A single unit of work never has to fit more than a whole window
+        cost = min(cost, int(self.settings['per_ip']['limit']), int(self.settings['per_user']['limit']))
+        while True:
+            retry_after = await self._call(self.retry_after, request, cost)
+            if retry_after is None:
+                return
+            await asyncio.sleep(max(retry_after, 0.05))
+
+    async def dispatch(self, request: Request, call_next):
+        # Endpoints reach the limiter through request.state to charge or admit extra work
+        request.state.rate_limiter = self
+        if not self.enabled:
+            return await call_next(request)
+
+        rejected = await self.check_limits(request)
+        if rejected is not None:
+            return rejected
+
+        if request.url.path not in self.admission_routes:
+            response = await call_next(request)
+            if request.url.path.endswith('/login') and response.status_code == status.HTTP_401_UNAUTHORIZED:
+                await self._call(self.charge_failed_login, request)
+            return response
+
+        try:
+            await self.admission.acquire()
+        except AdmissionRejected as e:
+            logger.warning(f"Admission queue full for {request.url.path}")
+            return _too_many_requests("Server busy", e.retry_after)
+        try:
+            response = await call_next(request)
+        except Exception:
+            self.admission.release()
+            raise
+
+        # Hold the slot until the body is fully sent, which matters for streamed answers
+        body = response.body_iterator
+        async def release_when_sent():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                self.admission.release()
+        response.body_iterator = release_when_sent()
+        return response
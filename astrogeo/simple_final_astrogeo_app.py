@@ -3,11 +3,13 @@ import os
 import sys
 from pathlib import Path
 from datetime import datetime
-import requests
 
 # Add src to path
 sys.path.append(str(Path(__file__).parent / "src"))
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from astrogeo.monitoring.http_instrumentation import http_session
+
 # NASA API Configuration
 NASA_API_KEY = os.getenv('NASA_API_KEY', 'DEMO_KEY')
 
@@ -19,7 +21,7 @@ class SimpleFinalAstroGeoApp:
     def nasa_apod_tool(self):
         """Get NASA APOD"""
         try:
-            r = requests.get(
+            r = http_session.get(
                 "https://api.nasa.gov/planetary/apod",
                 params={"api_key": NASA_API_KEY},
                 timeout=10
@@ -33,7 +35,7 @@ class SimpleFinalAstroGeoApp:
     def nasa_mars_tool(self, sol=1000):
         """Get Mars rover photos"""
         try:
-            r = requests.get(
+            r = http_session.get(
                 "https://api.nasa.gov/mars-photos/api/v1/rovers/curiosity/photos",
                 params={"sol": sol, "api_key": NASA_API_KEY},
                 timeout=10
@@ -56,7 +58,7 @@ class SimpleFinalAstroGeoApp:
     def nasa_asteroids_tool(self):
         """Get near-Earth asteroid data"""
         try:
-            r = requests.get(
+            r = http_session.get(
                 "https://api.nasa.gov/neo/rest/v1/feed",
                 params={"api_key": NASA_API_KEY},
                 timeout=10
@@ -80,7 +82,7 @@ class SimpleFinalAstroGeoApp:
         """Get solar flare activity"""
         try:
             url = "https://api.nasa.gov/DONKI/FLR"
-            r = requests.get(url, params={"api_key": NASA_API_KEY}, timeout=10)
+            r = http_session.get(url, params={"api_key": NASA_API_KEY}, timeout=10)
             r.raise_for_status()
             arr = r.json()
             
@@ -0,0 +1,18 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.monitoring.tracing import tracer
+
+class NullExporter:
+    """Drop exported traces so test runs don't write logs/traces"""
+
+    def export(self, trace):
+        pass
+
+@pytest.fixture(autouse=True)
+def null_trace_exporter(monkeypatch):
+    monkeypatch.setattr(tracer, 'exporter', NullExporter())
@@ -0,0 +1,101 @@
+import pytest
+import re
+import time
+from pathlib import Path
+import sys
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.cache.answer_cache import AnswerCache, normalize_query
+
+def bag_of_words_embedder(texts):
+    """Deterministic stand-in for the sentence transformer"""
+    vocabulary = ["what", "is", "bhuvan", "isro", "solar", "activity", "today", "the", "platform"]
+    return np.array([[text.split().count(word) for word in vocabulary] for text in texts], dtype=np.float32)
+
+@pytest.fixture
+def cache():
+    return AnswerCache(embed_fn=bag_of_words_embedder, settings={
+        'enabled': True,
+        'max_entries': 3,
+        'similarity_threshold': 0.85,
+        'default_ttl_seconds': 3600,
+        'ttl_seconds': {'space_weather': 60},
+    })
+
+class TestAnswerCache:
+    """Test exact and near-hit lookups in the answer cache"""
+
+    def test_normalize_query(self):
+        """Test that case, punctuation and spacing differences normalize away"""
+        assert normalize_query("What is Bhuvan?") == normalize_query("  what is   bhuvan ")
+
+    def test_exact_hit_after_normalization(self, cache):
+        """Test that trivially different phrasings hit the same entry"""
+        cache.put("what is Bhuvan", "Bhuvan is ISRO's geoportal", "isro_geospatial")
+
+        hit = cache.get("What is Bhuvan?", "isro_geospatial")
+
+        assert hit is not None
+        assert hit.answer == "Bhuvan is ISRO's geoportal"
+        assert cache.stats()['hits'] == 1
+
+    def test_near_hit_by_embedding(self, cache):
+        """Test that a close paraphrase is served from the nearest entry"""
+        cache.put("what is the bhuvan platform", "Bhuvan is ISRO's geoportal", "isro_geospatial")
+
+        hit = cache.get("what is bhuvan platform", "isro_geospatial")
+
+        assert hit is not None
+        assert hit.similarity < 1.0
+        assert cache.stats()['near_hits'] == 1
+
+    def test_query_type_and_variant_isolate_entries(self, cache):
+        """Test that answers are not shared across query types or variants"""
+        cache.put("what is bhuvan", "answer", "isro_geospatial", variant="nasa_api=True")
+
+        assert cache.get("what is bhuvan", "general_space", variant="nasa_api=True") is None
+        assert cache.get("what is bhuvan", "isro_geospatial", variant="nasa_api=False") is None
+
+    def test_per_type_ttl_expires_live_data(self, cache):
+        """Test that short-TTL query types expire while long-TTL ones survive"""
+        an_hour_ago = time.time() - 3000
+        cache.put("solar activity today", "Class M flare", "space_weather", created_at=an_hour_ago)
+        cache.put("what is isro", "India's space agency", "general_space", created_at=an_hour_ago)
+
+        assert cache.get("solar activity today", "space_weather") is None
+        assert cache.get("what is isro", "general_space") is not None
+
+    def test_lru_bound(self, cache):
+        """Test that the cache never holds more than max_entries answers"""
+        for i in range(5):
+            cache.put(f"query number {i}", f"answer {i}", "general_space")
+
+        assert cache.stats()['entries'] == 3
+        assert cache.get("query number 0", "general_space") is None
+
+    def test_history_lookup_bookkeeping(self, cache):
+        """Test that contains() sees exact fresh entries and history checks expire after the recheck window"""
+        cache.put("What is Bhuvan?", "ISRO's geoportal", "isro")
+        embeds_before = cache.stats()
+        assert cache.contains("what is bhuvan", "isro")
+        assert not cache.contains("what is bhuvan", "astronomy")
+        assert cache.stats() == embeds_before
+
+        assert not cache.history_checked("solar activity today", "space_weather")
+        cache.mark_history_checked("Solar activity today?", "space_weather")
+        assert cache.history_checked("solar activity today", "space_weather")
+        cache.history_recheck = 0
+        assert not cache.history_checked("solar activity today", "space_weather")
+
+    def test_root_scripts_import_shared_modules_through_the_package(self):
+        """Test that root scripts use astrogeo.cache (not cache) so a process never holds two answer caches"""
+        astrogeo_dir = Path(__file__).parent.parent
+        shared = re.compile(r"^\s*from (cache|monitoring|routing|embeddings|api|security|db)\.", re.M)
+        # gunicorn.conf.py loads monitoring.multiproc in the master before the package, which the workers import
+        scripts = [path for path in astrogeo_dir.glob("*.py") if path.name != "gunicorn.conf.py"]
+
+        assert scripts
+        assert [path.name for path in scripts if shared.search(path.read_text(encoding="utf-8-sig"))] == []
@@ -0,0 +1,129 @@
+import pytest
+import asyncio
+import time
+from datetime import timedelta
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from fastapi import HTTPException
+
+from astrogeo.security import auth
+from astrogeo.security.auth import (
+    RedisRevocationList, TokenCache, create_access_token, get_password_hash_async, revoke_token,
+    verify_password_async, verify_token
+)
+
+class FakeRedis:
+    """The two commands RedisRevocationList uses, over a dict standing in for the shared server"""
+
+    def __init__(self):
+        self.keys = {}
+
+    def set(self, key, value, ex=None):
+        self.keys[key] = (value, time.time() + ex)
+
+    def exists(self, key):
+        value = self.keys.get(key)
+        return int(value is not None and value[1] > time.time())
+
+class TestAuth:
+    """Test token claim caching, revocation and off-loop password hashing"""
+
+    def test_verified_claims_are_cached(self, monkeypatch):
+        """Test that a second verification of the same token skips jwt.decode"""
+        token = create_access_token({"sub": "astronaut"}, timedelta(minutes=5))
+        assert verify_token(token)["username"] == "astronaut"
+
+        def fail_decode(*args, **kwargs):
+            raise AssertionError("decode should not run on a cache hit")
+
+        monkeypatch.setattr(auth.jwt, "decode", fail_decode)
+        assert verify_token(token)["username"] == "astronaut"
+
+    def test_cache_entries_expire_and_are_bounded(self):
+        """Test that entries vanish at exp and the least recently used is evicted"""
+        cache = TokenCache(max_size=2)
+        cache.put("a", {"user": 1}, time.time() - 1)
+        assert cache.get("a") is None
+
+        cache.put("b", {"user": 2}, time.time() + 60)
+        cache.put("c", {"user": 3}, time.time() + 60)
+        cache.get("b")
+        cache.put("d", {"user": 4}, time.time() + 60)
+        assert cache.get("c") is None
+        assert cache.get("b") == {"user": 2}
+
+    def test_revoked_token_rejected_even_when_cached(self):
+        """Test that revocation wins over a cached verification"""
+        token = create_access_token({"sub": "astronaut"}, timedelta(minutes=5))
+        verify_token(token)
+        revoke_token(token)
+        with pytest.raises(HTTPException) as error:
+            verify_token(token)
+        assert error.value.status_code == 401
+
+    def test_revocation_reaches_other_workers(self, monkeypatch):
+        """Test that a token revoked on one worker is rejected by another that has it cached"""
+        monkeypatch.setattr(auth, "revocation_list", RedisRevocationList(client=FakeRedis()))
+        worker_a, worker_b = TokenCache(), TokenCache()
+        token = create_access_token({"sub": "astronaut"}, timedelta(minutes=5))
+
+        monkeypatch.setattr(auth, "token_cache", worker_a)
+        verify_token(token)
+        monkeypatch.setattr(auth, "token_cache", worker_b)
+        verify_token(token)
+        revoke_token(token)
+
+        monkeypatch.setattr(auth, "token_cache", worker_a)
+        assert worker_a.get(token) is not None
+        with pytest.raises(HTTPException) as error:
+            verify_token(token)
+        assert error.value.status_code == 401
+
+    def test_unreachable_redis_falls_back_to_local_revocations(self, monkeypatch):
+        """Test that a Redis outage leaves valid tokens accepted and local revocations enforced"""
+        redis_client = FakeRedis()
+        monkeypatch.setattr(auth, "revocation_list", RedisRevocationList(client=redis_client))
+        monkeypatch.setattr(auth, "token_cache", TokenCache())
+        kept = create_access_token({"sub": "astronaut"}, timedelta(minutes=5))
+        revoked = create_access_token({"sub": "astronaut"}, timedelta(minutes=5))
+        verify_token(kept)
+
+        def unreachable(*args, **kwargs):
+            raise ConnectionError("Redis is down")
+
+        monkeypatch.setattr(redis_client, "exists", unreachable)
+        monkeypatch.setattr(redis_client, "set", unreachable)
+        assert verify_token(kept)["username"] == "astronaut"
+        revoke_token(revoked)
+        with pytest.raises(HTTPException) as error:
+            verify_token(revoked)
+        assert error.value.status_code == 401
+
+    def test_password_hashing_runs_off_the_event_loop(self, monkeypatch):
+        """Test that the event loop keeps ticking while a slow hash runs"""
+        def slow_hash(password):
+            time.sleep(0.05)
+            return "hashed:" + password
+
+        monkeypatch.setattr(auth, "get_password_hash", slow_hash)
+        monkeypatch.setattr(auth, "verify_password", lambda plain, hashed: slow_hash(plain) == hashed)
+
+        async def run():
+            ticks = 0
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.005)
+                    ticks += 1
+            task = asyncio.create_task(ticker())
+            hashed = await get_password_hash_async("demo123")
+            valid = await verify_password_async("demo123", hashed)
+            task.cancel()
+            return valid, ticks
+
+        valid, ticks = asyncio.run(run())
+        assert valid
+        assert ticks > 0
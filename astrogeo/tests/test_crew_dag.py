@@ -0,0 +1,198 @@
+import pytest
+import threading
+import time
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.crew_dag import (DagExecutor, build_task_graph, dedupe_inputs, load_task_dependencies, run_batch,
+                               run_crew)
+
+class FakeTask:
+    """Stand-in for crewai.Task: a name, an agent and an optional context list"""
+
+    def __init__(self, name, agent=None, context=None, delay=0.0):
+        self.name = name
+        self.agent = agent or object()
+        self.context = context
+        self.delay = delay
+        self.inputs = None
+
+    def interpolate_inputs(self, inputs):
+        self.inputs = inputs
+
+class FakeAgent:
+    """Stand-in for crewai.Agent's step_callback and input interpolation"""
+
+    def __init__(self, step_callback=None):
+        self.step_callback = step_callback
+        self.inputs = None
+
+    def interpolate_inputs(self, inputs):
+        self.inputs = inputs
+
+class FakeCrew:
+    """Stand-in for crewai.Crew exposing what DagExecutor touches"""
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.task_callback = None
+        self.step_callback = None
+        self.kicked_off = False
+
+    def kickoff(self, inputs=None):
+        self.kicked_off = True
+        return "sequential"
+
+def fake_run(task, context):
+    time.sleep(task.delay)
+    return f"{task.name} output" + (f" <{context}>" if context else "")
+
+@pytest.fixture
+def tasks_yaml(tmp_path):
+    path = tmp_path / "tasks.yaml"
+    path.write_text(
+        "astronomical_analysis_task: {}\n"
+        "geospatial_analysis_task: {}\n"
+        "collaborative_synthesis_task:\n"
+        "  depends_on: [astronomical_analysis_task, geospatial_analysis_task]\n"
+    )
+    return str(path)
+
+class TestCrewDag:
+    """Test dependency inference, concurrent execution and deterministic output ordering"""
+
+    def test_independent_tasks_run_concurrently(self, tmp_path):
+        """Test that tasks without dependencies overlap instead of running back to back"""
+        tasks = [FakeTask(f"task_{i}", delay=0.2) for i in range(3)]
+        executor = DagExecutor(max_workers=3, run_task=fake_run, tasks_config_path=str(tmp_path / "missing.yaml"))
+
+        start = time.perf_counter()
+        result = executor.run(FakeCrew(tasks), {'query_topic': 'Mars'})
+
+        assert time.perf_counter() - start < 0.5
+        assert set(result.task_durations) == {"task_0", "task_1", "task_2"}
+
+    def test_crew_setup_reaches_tasks_and_agents(self, tmp_path):
+        """Test that DAG runs fill inputs and hand the crew's step_callback to agents, as kickoff() does"""
+        steps = []
+        own_steps = []
+        shared, own = FakeAgent(), FakeAgent(step_callback=own_steps.append)
+        tasks = [FakeTask("task_0", agent=shared), FakeTask("task_1", agent=own), FakeTask("task_2", agent=shared)]
+        crew = FakeCrew(tasks)
+        crew.step_callback = steps.append
+
+        def run_step(task, context):
+            task.agent.step_callback(f"{task.name} tool result")
+            return f"{task.name} output"
+
+        DagExecutor(run_task=run_step, tasks_config_path=str(tmp_path / "missing.yaml")).run(crew, {'region': 'Kerala'})
+
+        assert sorted(steps) == ["task_0 tool result", "task_2 tool result"]
+        assert own_steps == ["task_1 tool result"]
+        assert all(task.inputs == {'region': 'Kerala'} for task in tasks)
+        assert shared.inputs == own.inputs == {'region': 'Kerala'}
+
+    def test_dependents_receive_upstream_outputs(self, tasks_yaml):
+        """Test that a dependent task waits for and is given its upstream outputs"""
+        tasks = [
+            FakeTask("astronomical_analysis_task", delay=0.1),
+            FakeTask("geospatial_analysis_task"),
+            FakeTask("collaborative_synthesis_task"),
+        ]
+        result = DagExecutor(run_task=fake_run, tasks_config_path=tasks_yaml).run(FakeCrew(tasks))
+
+        synthesis = result.tasks_output[2]
+        assert "## astronomical_analysis_task\nastronomical_analysis_task output" in synthesis
+        assert synthesis.index("astronomical_analysis_task") < synthesis.index("geospatial_analysis_task")
+        # The only sink's output is the report, as with a sequential crew
+        assert result.raw == synthesis
+
+    def test_report_order_follows_declaration_not_completion(self, tmp_path):
+        """Test that sink outputs are merged in declared order even when they finish out of order"""
+        tasks = [FakeTask("slow", delay=0.2), FakeTask("fast")]
+        result = DagExecutor(run_task=fake_run, tasks_config_path=str(tmp_path / "missing.yaml")).run(FakeCrew(tasks))
+
+        assert result.raw == "## slow\nslow output\n\n## fast\nfast output"
+
+    def test_context_list_and_cycles(self):
+        """Test that Task.context counts as a dependency and cycles are rejected"""
+        first = FakeTask("first")
+        second = FakeTask("second", context=[first])
+        assert build_task_graph([first, second], {}) == {0: set(), 1: {0}}
+
+        with pytest.raises(ValueError, match="cycle"):
+            build_task_graph([first, second], {"first": ["second"]})
+
+    def test_tasks_sharing_an_agent_do_not_overlap(self, tmp_path):
+        """Test that one agent never runs two tasks at once"""
+        agent = object()
+        active, overlaps = [0], []
+        lock = threading.Lock()
+
+        def tracking_run(task, context):
+            with lock:
+                active[0] += 1
+                overlaps.append(active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return task.name
+
+        tasks = [FakeTask(f"task_{i}", agent=agent) for i in range(3)]
+        DagExecutor(max_workers=3, run_task=tracking_run,
+                    tasks_config_path=str(tmp_path / "missing.yaml")).run(FakeCrew(tasks))
+
+        assert max(overlaps) == 1
+
+    def test_task_callback_and_mode_selection(self, tmp_path, monkeypatch):
+        """Test that task_callback fires per task and sequential mode falls back to kickoff"""
+        seen = []
+        crew = FakeCrew([FakeTask("a"), FakeTask("b")])
+        crew.task_callback = seen.append
+        DagExecutor(run_task=fake_run, tasks_config_path=str(tmp_path / "missing.yaml")).run(crew)
+        assert sorted(seen) == ["a output", "b output"]
+
+        sequential = FakeCrew([FakeTask("a"), FakeTask("b")])
+        assert run_crew(sequential, {}, {'execution_mode': 'sequential'}) == "sequential"
+        assert sequential.kicked_off
+
+    def test_shipped_crew_tasks_form_a_diamond(self):
+        """Test that the AstroGeoCrew tasks in config/tasks.yaml run both analyses after harvesting, in parallel"""
+        names = ['data_harvesting_task', 'astronomical_analysis_task', 'geospatial_analysis_task',
+                 'quality_validation_task']
+        declared = load_task_dependencies(str(Path(__file__).parent.parent / "config" / "tasks.yaml"))
+
+        graph = build_task_graph([FakeTask(name) for name in names], declared)
+        assert graph == {0: set(), 1: {0}, 2: {0}, 3: {0, 1, 2}}
+
+class TestCrewBatch:
+    """Test batch execution: deduplication, bounded concurrency and per-item failures"""
+
+    def test_identical_inputs_run_once(self):
+        """Test that duplicate inputs share one run and report every position"""
+        unique, positions = dedupe_inputs([{'region': 'Goa'}, {'region': 'Pune'}, {'region': 'Goa'}])
+        assert unique == [{'region': 'Goa'}, {'region': 'Pune'}]
+        assert positions == [[0, 2], [1]]
+
+    def test_batch_runs_concurrently_and_isolates_failures(self):
+        """Test that runs overlap up to the bound and one failure does not stop the rest"""
+        class BatchCrew(FakeCrew):
+            def kickoff(self, inputs=None):
+                time.sleep(0.1)
+                if inputs['region'] == 'Atlantis':
+                    raise RuntimeError("unknown region")
+                return f"report for {inputs['region']}"
+
+        inputs = [{'region': r} for r in ('Goa', 'Pune', 'Atlantis', 'Goa', 'Leh')]
+        start = time.perf_counter()
+        items = list(run_batch(lambda: BatchCrew([FakeTask("only")]), inputs, max_workers=4,
+                               settings={'execution_mode': 'sequential'}))
+
+        assert time.perf_counter() - start < 0.3
+        by_region = {item.inputs['region']: item for item in items}
+        assert by_region['Goa'].indices == [0, 3]
+        assert by_region['Leh'].result == "report for Leh"
+        assert by_region['Atlantis'].error == "unknown region"
+        assert len(items) == 4
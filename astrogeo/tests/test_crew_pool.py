@@ -0,0 +1,54 @@
+import pytest
+import copy
+import os
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.crew_pool import CrewPool
+
+class FakeCrew:
+    """Stand-in for crewai.Crew: copy() clones task state like Crew.copy does"""
+
+    def __init__(self, version):
+        self.version = version
+        self.task_outputs = []
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+@pytest.fixture
+def agents_yaml(tmp_path):
+    path = tmp_path / "agents.yaml"
+    path.write_text("astronomical_agent: {}\n")
+    return path
+
+class TestCrewPool:
+    """Test one-time crew construction, per-request isolation and config reloads"""
+
+    def test_template_built_once_and_copies_isolated(self, agents_yaml):
+        """Test that many requests share one build but never each other's task state"""
+        builds = []
+        pool = CrewPool(lambda: builds.append(1) or FakeCrew(len(builds)), config_paths=[str(agents_yaml)])
+
+        pool.warm()
+        first, second = pool.acquire(), pool.acquire()
+        first.task_outputs.append("Mars report")
+
+        assert len(builds) == 1
+        assert second.task_outputs == []
+        assert pool.template().task_outputs == []
+
+    def test_config_change_triggers_rebuild(self, agents_yaml):
+        """Test that editing a watched config file rebuilds the template"""
+        builds = []
+        pool = CrewPool(lambda: builds.append(1) or FakeCrew(len(builds)),
+                        config_paths=[str(agents_yaml)], check_interval=0)
+        assert pool.acquire().version == 1
+
+        stat = agents_yaml.stat()
+        os.utime(agents_yaml, (stat.st_atime, stat.st_mtime + 10))
+
+        assert pool.acquire().version == 2
+        assert pool.acquire().version == 2
@@ -0,0 +1,110 @@
+import pytest
+from pathlib import Path
+import sys
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.cache.answer_cache import AnswerCache
+from astrogeo.cache.embedding_cache import EmbeddingCache, embedding_key
+from astrogeo.routing.semantic_router import SemanticRouter
+
+class CountingEmbedder:
+    """Deterministic stand-in for SentenceTransformer.encode that records each batch"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return np.array([[len(text), text.lower().count('s'), 1.0] for text in texts], dtype=np.float64)
+
+def make_cache(tmp_path=None, embedder=None, **overrides):
+    settings = {
+        'enable_cache': True,
+        'max_cache_size': 3,
+        'cache_embeddings': tmp_path is not None,
+        'cache_directory': str(tmp_path) if tmp_path else ':memory:',
+        'embedding_disk_max_entries': 100,
+        'model_name': 'test-model',
+    }
+    settings.update(overrides)
+    return EmbeddingCache(embedder or CountingEmbedder(), settings)
+
+class TestEmbeddingCache:
+    """Test the shared query embedding cache"""
+
+    def test_repeated_and_respaced_queries_encode_once(self):
+        """Test that the same text, up to case and spacing, is embedded once"""
+        embedder = CountingEmbedder()
+        cache = make_cache(embedder=embedder)
+
+        first = cache.embed("Solar activity today")
+        second = cache.embed("  solar   ACTIVITY today ")
+
+        assert embedder.batches == [["Solar activity today"]]
+        assert first.dtype == np.float32 and np.array_equal(first, second)
+        assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+        assert embedding_key('a', "Mars") != embedding_key('b', "Mars")
+
+    def test_batch_encodes_only_missing_texts(self):
+        """Test that a batch call reuses cached rows and encodes the rest in one model call"""
+        embedder = CountingEmbedder()
+        cache = make_cache(embedder=embedder)
+        cache.embed("isro")
+
+        matrix = cache.encode(["isro", "bhuvan", "saphir", "bhuvan"])
+
+        assert embedder.batches == [["isro"], ["bhuvan", "saphir"]]
+        assert matrix.shape == (4, 3) and matrix.dtype == np.float32
+        assert np.array_equal(matrix[1], matrix[3])
+
+    def test_lru_bound(self):
+        """Test that the in-memory tier keeps only the most recently used texts"""
+        embedder = CountingEmbedder()
+        cache = make_cache(embedder=embedder, max_cache_size=2)
+
+        for text in ("a", "b", "a", "c", "a", "b"):
+            cache.embed(text)
+
+        assert [batch[0] for batch in embedder.batches] == ["a", "b", "c", "b"]
+        assert cache.stats()['entries'] == 2
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Test that with cache_embeddings a new process reads vectors from disk instead of encoding"""
+        make_cache(tmp_path).encode(["What is Bhuvan?", "Mars rovers"])
+
+        embedder = CountingEmbedder()
+        restarted = make_cache(tmp_path, embedder)
+        vector = restarted.embed("what is bhuvan?")
+
+        assert embedder.batches == []
+        assert restarted.stats()['disk_hits'] == 1
+        assert vector.tolist() == [15.0, 1.0, 1.0]
+        assert (tmp_path / "embeddings.sqlite").exists()
+
+    def test_disabled_cache_and_missing_model(self):
+        """Test that a disabled cache always encodes and that no model raises"""
+        embedder = CountingEmbedder()
+        cache = make_cache(embedder=embedder, enable_cache=False)
+        cache.embed("mars")
+        cache.embed("mars")
+
+        assert len(embedder.batches) == 2
+        with pytest.raises(RuntimeError):
+            EmbeddingCache(None, {'model_name': 'test-model'}).embed("mars")
+
+    def test_routing_and_search_share_one_encode(self):
+        """Test that vector search reuses the embedding the semantic router computed"""
+        embedder = CountingEmbedder()
+        cache = make_cache(embedder=embedder)
+        router = SemanticRouter(cache.encode, {'enabled': True, 'centroid_path': None, 'examples': {}})
+        router.fit('agents', {'space_weather': ["solar storms"], 'mars': ["mars rover"]})
+        answers = AnswerCache(cache.encode, {'enabled': True})
+
+        router.route("solar activity today", 'agents', frozenset())
+        cache.embed("solar activity today")
+        answers.get("solar activity today", "space_weather")
+
+        assert embedder.batches[1:] == [["solar activity today"]]
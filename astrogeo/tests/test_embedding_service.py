@@ -0,0 +1,145 @@
+import pytest
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.bench.run_embedding_benchmark import run_benchmark, simulated_encoder
+from astrogeo.embeddings.service import EmbeddingClient, EmbeddingServer, MicroBatcher, create_encoder
+
+class SlowModel:
+    """Stand-in for SentenceTransformer.encode whose cost is mostly per call, as on CPU with small batches"""
+
+    def __init__(self, delay=0.02, error=None):
+        self.delay = delay
+        self.error = error
+        self.batches = []
+
+    def encode(self, texts):
+        time.sleep(self.delay)
+        if self.error:
+            raise ValueError(self.error)
+        self.batches.append(list(texts))
+        return np.array([[len(text), ord(text[0])] for text in texts], dtype=np.float64)
+
+def encode_concurrently(encode, texts):
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        return list(pool.map(lambda text: encode([text]), texts))
+
+class TestMicroBatcher:
+    """Test that concurrent encode requests are coalesced into batches"""
+
+    def test_concurrent_requests_share_batches(self):
+        """Test that concurrent single-text requests are encoded together and each gets its own row"""
+        model = SlowModel()
+        batcher = MicroBatcher(model.encode, max_batch_size=32, max_wait_ms=20)
+        texts = [f"query {chr(97 + i)}" for i in range(12)]
+
+        results = encode_concurrently(batcher.encode, texts)
+
+        assert len(model.batches) < len(texts)
+        assert sorted(text for batch in model.batches for text in batch) == sorted(texts)
+        for text, rows in zip(texts, results):
+            assert rows.dtype == np.float32 and rows.tolist() == [[len(text), ord(text[0])]]
+        assert batcher.stats()['mean_batch_size'] > 1
+        batcher.shutdown()
+
+    def test_batch_size_cap_and_multi_text_requests(self):
+        """Test that batches stop at max_batch_size and multi-text requests come back whole"""
+        model = SlowModel(delay=0.05)
+        batcher = MicroBatcher(model.encode, max_batch_size=4, max_wait_ms=50)
+
+        results = encode_concurrently(batcher.encode, [f"t{i}" for i in range(10)])
+        pair = batcher.encode(["alpha", "beta"])
+
+        assert all(len(batch) <= 4 for batch in model.batches[:-1])
+        assert [row.shape for row in results] == [(1, 2)] * 10
+        assert pair.tolist() == [[5, ord('a')], [4, ord('b')]]
+        batcher.shutdown()
+
+    def test_failed_batch_reaches_every_caller(self):
+        """Test that a model error is raised to each request in the batch, and the batcher keeps working"""
+        model = SlowModel(error="out of memory")
+        batcher = MicroBatcher(model.encode, max_wait_ms=20)
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(batcher.encode, [f"q{i}"]) for i in range(3)]
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result()
+
+        model.error = None
+        assert batcher.encode(["ok"]).tolist() == [[2, ord('o')]]
+        batcher.shutdown()
+
+    def test_benchmark_reports_batched_throughput(self):
+        """Test that the harness compares direct and batched encoding under concurrency"""
+        report = run_benchmark(simulated_encoder(call_ms=4, text_ms=0.1), requests=32, concurrency=8)
+
+        assert report['batched']['mean_batch_size'] > 1
+        assert report['speedup'] > 1
+
+class TestEmbeddingServer:
+    """Test sharing one batcher across processes over a Unix socket"""
+
+    @pytest.fixture
+    def server(self, tmp_path):
+        model = SlowModel()
+        batcher = MicroBatcher(model.encode, max_batch_size=32, max_wait_ms=20)
+        socket_path = str(tmp_path / "embeddings.sock")
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        serving = asyncio.run_coroutine_threadsafe(EmbeddingServer(batcher, socket_path).serve_forever(), loop)
+        client = EmbeddingClient(socket_path, timeout=5)
+        for _ in range(100):
+            if client.available():
+                break
+            time.sleep(0.01)
+        yield model, socket_path
+        serving.cancel()
+        batcher.shutdown()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+
+    def test_clients_are_batched_through_the_socket(self, server):
+        """Test that concurrent clients get their own rows from shared batches"""
+        model, socket_path = server
+        client = EmbeddingClient(socket_path, timeout=5)
+        texts = [f"socket {chr(97 + i)}" for i in range(8)]
+
+        results = encode_concurrently(client.encode, texts)
+        again = client.encode(["reuse", "connection"])
+
+        assert len(model.batches) < len(texts) + 1
+        for text, rows in zip(texts, results):
+            assert rows.tolist() == [[len(text), ord(text[0])]]
+        assert again.shape == (2, 2) and again.dtype == np.float32
+
+    def test_create_encoder_uses_running_service(self, server):
+        """Test that socket mode connects to the service instead of loading a model"""
+        model, socket_path = server
+
+        def load():
+            raise AssertionError("model should not be loaded")
+
+        encode = create_encoder(load, {'mode': 'socket', 'socket_path': socket_path})
+        assert encode(["mars"]).tolist() == [[4, ord('m')]]
+
+    def test_create_encoder_falls_back_without_service(self, tmp_path):
+        """Test that socket mode loads the model in-process when no service is running, and off mode skips batching"""
+        model = SlowModel(delay=0)
+
+        encode = create_encoder(lambda: model.encode, {'mode': 'socket', 'socket_path': str(tmp_path / "none.sock")})
+        direct = create_encoder(lambda: model.encode, {'mode': 'off'})
+
+        assert isinstance(encode.__self__, MicroBatcher)
+        assert encode(["mars"]).tolist() == [[4, ord('m')]]
+        assert direct == model.encode
+        encode.__self__.shutdown()
@@ -0,0 +1,121 @@
+import threading
+import time
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.cache.answer_cache import AnswerCache
+from astrogeo.monitoring.tracing import Tracer
+from astrogeo.routing.fan_out import AgentFanOut
+
+class FakeAgent:
+    """Agent whose answer takes a fixed time"""
+
+    def __init__(self, name, cache_type, answer, delay=0.0, error=None):
+        self.name = name
+        self.cache_type = cache_type
+        self.answer = answer
+        self.delay = delay
+        self.error = error
+
+    def process(self, query):
+        time.sleep(self.delay)
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.answer
+
+def make_fan_out(**overrides):
+    settings = {'enabled': True, 'max_agents': 3, 'min_relative_confidence': 0.5,
+                'deadline_seconds': 1.0, 'deadlines': {}, 'max_workers': 4}
+    settings.update(overrides)
+    return AgentFanOut(settings)
+
+class TestAgentFanOut:
+    """Test concurrent dispatch to several agents and merging their answers"""
+
+    def test_select_keeps_close_candidates(self):
+        """Test that candidates well behind the best one, or past max_agents, are not consulted"""
+        isro, geo, live, weather = (FakeAgent(n, n, "") for n in ("isro", "geo", "live", "weather"))
+        fan_out = make_fan_out(max_agents=3)
+
+        assert fan_out.select([(isro, 0.4), (geo, 0.3), (live, 0.1), (weather, 0.3)]) == [isro, geo]
+        assert fan_out.select([(isro, 0.4), (geo, 0.4), (live, 0.4), (weather, 0.4)]) == [isro, geo, live]
+        assert make_fan_out(enabled=False).select([(isro, 0.4), (geo, 0.4)]) == [isro]
+        assert fan_out.select([]) == []
+
+    def test_merged_answer_takes_the_shortest_ttl(self):
+        """Test that a fan-out including a live-data agent is cached for that agent's TTL, not the lead's"""
+        ttls = AnswerCache(settings={'enabled': True, 'ttl_seconds': {'isro_geospatial': 259200, 'nasa_live': 3600}})
+        isro, live = FakeAgent("isro", "isro_geospatial", ""), FakeAgent("live", "nasa_live", "")
+
+        assert AgentFanOut.cache_type([isro, live], ttls.ttl_for) == 'nasa_live'
+        assert AgentFanOut.cache_type([isro], ttls.ttl_for) == 'isro_geospatial'
+
+    def test_agents_run_concurrently_in_stable_order(self):
+        """Test that the answer takes as long as the slowest agent and keeps routing order"""
+        slow = FakeAgent("ISRO Expert", "isro_geospatial", "Bhuvan maps India.", delay=0.3)
+        fast = FakeAgent("NASA Live", "nasa_live", "Solar activity is moderate.", delay=0.05)
+        fan_out = make_fan_out()
+
+        start = time.perf_counter()
+        sections = fan_out.dispatch("query", [slow, fast])
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.45
+        assert [s.name for s in sections] == ["ISRO Expert", "NASA Live"]
+        assert [s.status for s in sections] == ['complete', 'complete']
+        merged = fan_out.merge(sections)
+        assert merged.index("**ISRO Expert**") < merged.index("**NASA Live**")
+        assert "Bhuvan maps India." in merged and "Solar activity is moderate." in merged
+
+    def test_late_and_failing_agents_are_marked(self):
+        """Test that an agent past its deadline is partial and a failing one is reported, without blocking"""
+        late = FakeAgent("Slow", "nasa_live", "late answer", delay=0.5)
+        broken = FakeAgent("Broken", "geospatial_expert", "", error="provider down")
+        ok = FakeAgent("Quick", "isro_geospatial", "quick answer")
+        fan_out = make_fan_out(deadline_seconds=0.1, deadlines={'isro_geospatial': 1.0})
+
+        start = time.perf_counter()
+        sections = fan_out.dispatch("query", [ok, late, broken])
+
+        assert time.perf_counter() - start < 0.3
+        assert [s.status for s in sections] == ['complete', 'partial', 'failed']
+        merged = fan_out.merge(sections)
+        assert "**Slow** ⏳ *partial" in merged and "late answer" not in merged
+        assert "provider down" in merged
+        assert fan_out.deadline_for(ok) == 1.0 and fan_out.deadline_for(late) == 0.1
+
+    def test_merge_drops_repeated_context(self):
+        """Test that a paragraph already given by an earlier agent is not repeated"""
+        shared = "ISRO's Bhuvan portal hosts satellite imagery of India."
+        first = FakeAgent("ISRO Expert", "isro_geospatial", f"{shared}\n\nOCM observes ocean colour.")
+        second = FakeAgent("Geo Expert", "geospatial_expert", "isro's bhuvan portal hosts satellite imagery of india\n\nNDVI tracks crops.")
+        fan_out = make_fan_out()
+
+        merged = fan_out.merge(fan_out.dispatch("query", [first, second]))
+
+        assert merged.lower().count("bhuvan portal") == 1
+        assert "NDVI tracks crops." in merged and "OCM observes ocean colour." in merged
+
+    def test_agents_run_in_the_callers_context(self):
+        """Test that agent spans join the request's trace"""
+        class NullExporter:
+            def export(self, trace):
+                pass
+
+        tracer = Tracer({'enabled': True, 'sample_rate': 0.0}, exporter=NullExporter())
+        agent = FakeAgent("ISRO Expert", "isro_geospatial", "answer")
+        seen = []
+
+        def run(agent, query):
+            with tracer.span("agent.process", agent=agent.name) as span:
+                seen.append((threading.current_thread().name, span))
+            return agent.process(query)
+
+        with tracer.span("process_query") as root:
+            make_fan_out().dispatch("query", [agent], run)
+
+        thread_name, span = seen[0]
+        assert thread_name.startswith("agent-fan-out")
+        assert span.trace_id == root.trace_id and span.parent_id == root.span_id
@@ -0,0 +1,224 @@
+import pytest
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.cache.tool_memo import tool_memo
+from astrogeo.crew_checkpoint import RunCheckpoint
+from astrogeo.crew_dag import DagExecutor, run_crew
+from astrogeo.db.repository import CheckpointRepository, JobRepository
+from astrogeo.db.session import DatabaseManager
+from astrogeo.jobs.manager import JobManager, _naive_utc
+
+@pytest.fixture
+def database(tmp_path):
+    manager = DatabaseManager({'url': f"sqlite:///{tmp_path / 'jobs.db'}"})
+    asyncio.run(manager.create_all())
+    yield manager
+    asyncio.run(manager.dispose())
+
+def make_runner(database, fail=False):
+    """Stand-in for run_query_job that records progress through the given database"""
+    def runner(job_id, inputs):
+        with database.session() as db:
+            JobRepository(db).mark_running(job_id)
+            JobRepository(db).append_partial_output(job_id, f"researched {inputs['topic']}")
+        time.sleep(0.05)
+        if fail:
+            raise RuntimeError("crew exploded")
+        with database.session() as db:
+            JobRepository(db).finish_job(job_id, 'succeeded', result=f"answer to {inputs['topic']}")
+        return f"answer to {inputs['topic']}"
+    return runner
+
+class TestJobManager:
+    """Test queued crew runs, polling and result expiry"""
+
+    def test_job_runs_in_pool_and_reports_progress(self, database):
+        """Test that submit returns at once and polling sees partial then final output"""
+        completed = []
+
+        async def run():
+            manager = JobManager(max_workers=1, runner=make_runner(database), database=database,
+                                 executor_factory=lambda: ThreadPoolExecutor(max_workers=1))
+            job = await manager.submit("Mars rovers", "astronomy", {"topic": "Mars rovers"}, username="demo",
+                                       on_success=lambda job_id, result: completed.append((job_id, result)))
+            assert job.status == "queued"
+
+            while manager.active_jobs:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.01)
+            assert not manager._callbacks
+            return job.id, await manager.get(job.id)
+
+        job_id, job = asyncio.run(run())
+        assert job.status == "succeeded"
+        assert job.partial_output == ["researched Mars rovers"]
+        assert job.result == "answer to Mars rovers"
+        assert completed == [(job_id, "answer to Mars rovers")]
+
+    def test_failed_job_is_recorded(self, database):
+        """Test that a crew exception leaves the job failed with its error"""
+        async def run():
+            manager = JobManager(max_workers=1, runner=make_runner(database, fail=True), database=database,
+                                 executor_factory=lambda: ThreadPoolExecutor(max_workers=1))
+            job = await manager.submit("ISRO", "astronomy", {"topic": "ISRO"})
+            while manager.active_jobs:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.01)
+            return await manager.get(job.id)
+
+        job = asyncio.run(run())
+        assert job.status == "failed"
+        assert "crew exploded" in job.error_message
+
+    def test_expired_jobs_hidden_and_purged(self, database):
+        """Test that jobs past their TTL are not returned and are deleted on the next submit"""
+        async def run():
+            manager = JobManager(max_workers=1, result_ttl=timedelta(seconds=-1), runner=lambda *args: "",
+                                 database=database, executor_factory=lambda: ThreadPoolExecutor(max_workers=1))
+            old = await manager.submit("old", "astronomy", {"topic": "old"})
+            assert await manager.get(old.id) is None
+            await manager.submit("new", "astronomy", {"topic": "new"})
+            with database.session() as db:
+                return JobRepository(db).get_job(old.id)
+
+        assert asyncio.run(run()) is None
+
+    def test_expiry_compares_aware_timestamps_in_utc(self):
+        """Test that a timezone-aware expires_at is converted to UTC, not just stripped"""
+        ist = timezone(timedelta(hours=5, minutes=30))
+        assert _naive_utc(datetime(2026, 1, 1, 12, 0, tzinfo=ist)) == datetime(2026, 1, 1, 6, 30)
+        assert _naive_utc(datetime(2026, 1, 1, 12, 0)) == datetime(2026, 1, 1, 12, 0)
+
+    def test_crashed_job_is_retried_automatically(self, database):
+        """Test that a job whose pool process died is requeued under the same id on a fresh pool"""
+        calls, pools = [], []
+        succeed = make_runner(database)
+
+        def crashing_runner(job_id, inputs):
+            calls.append(job_id)
+            if len(calls) == 1:
+                with database.session() as db:
+                    JobRepository(db).append_partial_output(job_id, f"researched {inputs['topic']}")
+                raise BrokenProcessPool("worker died")
+            return succeed(job_id, inputs)
+
+        def new_pool():
+            pools.append(ThreadPoolExecutor(max_workers=1))
+            return pools[-1]
+
+        async def run():
+            manager = JobManager(max_workers=1, runner=crashing_runner, database=database, executor_factory=new_pool)
+            job = await manager.submit("Comets", "astronomy", {"topic": "Comets"})
+            for _ in range(200):
+                current = await manager.get(job.id)
+                if current.status == "succeeded":
+                    return current
+                await asyncio.sleep(0.01)
+            return current
+
+        job = asyncio.run(run())
+        assert job.status == "succeeded"
+        assert job.attempts == 1
+        assert calls == [job.id, job.id]
+        assert len(pools) == 2
+        # The first attempt's progress is cleared rather than repeated
+        assert job.partial_output == ["researched Comets"]
+
+    def test_manual_retry_only_for_failed_jobs(self, database):
+        """Test that retry requeues a failed job and refuses one that succeeded"""
+        async def run():
+            manager = JobManager(max_workers=1, runner=make_runner(database, fail=True), database=database,
+                                 executor_factory=lambda: ThreadPoolExecutor(max_workers=1))
+            job = await manager.submit("Eclipses", "astronomy", {"topic": "Eclipses"})
+            while manager.active_jobs:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.01)
+
+            manager.runner = make_runner(database)
+            retried = await manager.retry(job.id)
+            while manager.active_jobs:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.01)
+            return retried, await manager.get(job.id), await manager.retry(job.id)
+
+        retried, job, again = asyncio.run(run())
+        assert retried.status == "queued"
+        assert job.status == "succeeded" and job.attempts == 1
+        assert again is None
+
+class FakeTask:
+    """Stand-in for crewai.Task with a name and agent"""
+
+    def __init__(self, name):
+        self.name = name
+        self.agent = object()
+        self.context = None
+
+    def execute_sync(self, agent=None, context=None):
+        return f"{self.name} output"
+
+class FakeCrew:
+    def __init__(self, tasks):
+        self.tasks = tasks
+
+class TestRunCheckpoint:
+    """Test that interrupted crew runs resume from their checkpointed tasks"""
+
+    def test_resume_skips_completed_tasks(self, database):
+        """Test that a retry runs only the unfinished tasks and sees earlier outputs as context"""
+        ran, contexts, failures = [], {}, []
+
+        def run_task(task, context):
+            ran.append(task.name)
+            contexts[task.name] = context
+            if task.name == "synthesis" and not failures:
+                failures.append(task.name)
+                raise RuntimeError("provider timeout")
+            tool_memo.call("apod", {"date": "today"}, lambda: f"apod for {task.name}")
+            return f"{task.name} output"
+
+        def crew():
+            return FakeCrew([FakeTask("astronomy"), FakeTask("geospatial"), FakeTask("synthesis")])
+
+        checkpoint = RunCheckpoint("job1", database=database)
+        executor = lambda: DagExecutor(run_task=run_task, chain=True)
+        with pytest.raises(RuntimeError):
+            with tool_memo.run_scope():
+                executor().run(crew(), {"topic": "Mars"}, checkpoint)
+        assert set(checkpoint.completed({"topic": "Mars"})) == {"astronomy", "geospatial"}
+
+        ran.clear()
+        reported = []
+        resumed_crew = crew()
+        resumed_crew.task_callback = reported.append
+        with tool_memo.run_scope() as memo:
+            result = executor().run(resumed_crew, {"topic": "Mars"}, checkpoint)
+        assert ran == ["synthesis"]
+        assert reported == ["astronomy output", "geospatial output", "synthesis output"]
+        assert result.resumed == ["astronomy", "geospatial"]
+        assert result.raw == "synthesis output"
+        assert "## geospatial\ngeospatial output" in contexts["synthesis"]
+        # The tool result the astronomy task fetched is reused rather than fetched again
+        assert memo.hits == 1
+
+    def test_changed_inputs_start_over_and_clear(self, database):
+        """Test that checkpoints for other inputs are ignored and clear() removes them"""
+        checkpoint = RunCheckpoint("job2", database=database)
+        checkpoint.save("astronomy", 0, "old output", {"topic": "Mars"})
+        assert checkpoint.completed({"topic": "Venus"}) == {}
+
+        result = run_crew(FakeCrew([FakeTask("astronomy")]), {"topic": "Venus"}, {'execution_mode': 'sequential'},
+                          checkpoint)
+        assert result.resumed == []
+        assert checkpoint.completed({"topic": "Venus"})["astronomy"].output == "astronomy output"
+        checkpoint.clear()
+        with database.session() as db:
+            assert CheckpointRepository(db).get_checkpoints("job2") == []
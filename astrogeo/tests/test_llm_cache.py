@@ -0,0 +1,102 @@
+import pytest
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.cache.llm_cache import (LLMCompletionCache, bypass, completion_key, enable_crew_llm_cache,
+                                      enable_llm_cache, task_scope)
+
+class FakeLLM:
+    """Stand-in for crewai.LLM counting real completions"""
+
+    def __init__(self, model="hf/test-model", temperature=0.0):
+        self.model = model
+        self.temperature = temperature
+        self.calls = 0
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        self.calls += 1
+        return f"completion {self.calls} for {messages[-1]['content']}"
+
+class FakeAgent:
+    def __init__(self, llm):
+        self.llm = llm
+
+class FakeCrew:
+    def __init__(self, agents):
+        self.agents = agents
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMCompletionCache({'enabled': True, 'path': str(tmp_path / "llm.sqlite"), 'max_size_mb': 1,
+                               'ttl_seconds': 0, 'skip_tasks': ['anomaly_detection_task']})
+
+PROMPT = [{'role': 'user', 'content': 'Summarise the Perseids'}]
+
+class TestLLMCache:
+    """Test completion caching, key composition, opt-outs and size-bounded eviction"""
+
+    def test_repeat_prompt_served_from_disk(self, cache, tmp_path):
+        """Test that an identical call is answered without the model and survives a new cache instance"""
+        llm = enable_llm_cache(FakeLLM(), cache)
+        first = llm.call(PROMPT)
+        assert llm.call(PROMPT) == first
+        assert llm.calls == 1
+        assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+        reopened = LLMCompletionCache(dict(cache.settings))
+        assert enable_llm_cache(FakeLLM(), reopened).call(PROMPT) == first
+
+    def test_key_covers_model_and_decoding_params(self, cache):
+        """Test that a different model, temperature or prompt misses"""
+        base = completion_key("m", PROMPT, {'temperature': 0.0})
+        assert base != completion_key("other", PROMPT, {'temperature': 0.0})
+        assert base != completion_key("m", PROMPT, {'temperature': 0.7})
+        assert base != completion_key("m", [{'role': 'user', 'content': 'x'}], {'temperature': 0.0})
+
+        enable_llm_cache(FakeLLM(temperature=0.0), cache).call(PROMPT)
+        warm = enable_llm_cache(FakeLLM(temperature=0.7), cache)
+        warm.call(PROMPT)
+        assert warm.calls == 1
+
+    def test_task_opt_out_and_bypass(self, cache):
+        """Test that opted-out tasks and bypassed blocks always reach the model"""
+        llm = enable_llm_cache(FakeLLM(), cache)
+        with task_scope('anomaly_detection_task'):
+            llm.call(PROMPT)
+            llm.call(PROMPT)
+        with bypass():
+            llm.call(PROMPT)
+        assert llm.calls == 3
+        assert cache.stats()['entries'] == 0
+
+    def test_function_calls_not_cached(self, cache):
+        """Test that calls executing tools are never replayed from the cache"""
+        llm = enable_llm_cache(FakeLLM(), cache)
+        llm.call(PROMPT, available_functions={'search': print})
+        llm.call(PROMPT, available_functions={'search': print})
+        assert llm.calls == 2
+
+    def test_lru_eviction_by_size(self, tmp_path):
+        """Test that least recently used completions go first once the size cap is hit"""
+        cache = LLMCompletionCache({'path': str(tmp_path / "small.sqlite"), 'max_size_mb': 0.0008})
+        cache.put("a", "m", "x" * 300)
+        cache.put("b", "m", "x" * 300)
+        cache.get("a")
+        cache.put("c", "m", "x" * 300)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_crew_agents_share_one_wrapper(self, cache):
+        """Test that enabling a crew wraps each distinct LLM once"""
+        shared = FakeLLM()
+        crew = enable_crew_llm_cache(FakeCrew([FakeAgent(shared), FakeAgent(shared), FakeAgent(None)]), cache)
+        wrapper = crew.agents[0].llm.call
+        enable_crew_llm_cache(crew, cache)
+        assert crew.agents[1].llm.call is wrapper
+        crew.agents[0].llm.call(PROMPT)
+        crew.agents[1].llm.call(PROMPT)
+        assert shared.calls == 1
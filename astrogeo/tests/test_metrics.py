@@ -0,0 +1,95 @@
+import pytest
+import asyncio
+import os
+import subprocess
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from prometheus_client import CollectorRegistry, multiprocess
+
+from astrogeo.monitoring.metrics import AGENT_DURATION, AGENT_REQUESTS, metrics
+
+PACKAGE_ROOT = str(Path(__file__).parent.parent.parent)
+GUNICORN_CONF = str(Path(__file__).parent.parent / "gunicorn.conf.py")
+
+def sample(metric, suffix, **labels):
+    for family in metric.collect():
+        for s in family.samples:
+            if s.name.endswith(suffix) and all(s.labels.get(k) == v for k, v in labels.items()):
+                return s.value
+    return 0.0
+
+class TestMetrics:
+    """Test async-aware agent timing and multiprocess aggregation"""
+
+    def test_decorator_times_coroutines_and_errors(self):
+        """Test that async functions are awaited inside the timer and failures counted"""
+        @metrics.track_agent_performance("async_agent")
+        async def answer():
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        @metrics.track_agent_performance("async_agent")
+        async def fail():
+            raise RuntimeError("boom")
+
+        assert asyncio.run(answer()) == "ok"
+        with pytest.raises(RuntimeError):
+            asyncio.run(fail())
+
+        assert sample(AGENT_REQUESTS, "_total", agent_name="async_agent", status="success") == 1
+        assert sample(AGENT_REQUESTS, "_total", agent_name="async_agent", status="error") == 1
+        assert sample(AGENT_DURATION, "_sum", agent_name="async_agent") >= 0.01
+
+    def test_context_manager_sync_and_async(self):
+        """Test that time_agent works with both with and async with"""
+        with metrics.time_agent("ctx_agent"):
+            pass
+
+        async def run():
+            async with metrics.time_agent("ctx_agent"):
+                await asyncio.sleep(0)
+
+        asyncio.run(run())
+        assert sample(AGENT_REQUESTS, "_total", agent_name="ctx_agent", status="success") == 2
+
+    def test_workers_aggregate_through_shared_directory(self, tmp_path):
+        """Test that counts from separate worker processes are summed"""
+        script = ("from astrogeo.monitoring.metrics import metrics\n"
+                  "with metrics.time_agent('worker_agent'):\n"
+                  "    pass\n")
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path), PYTHONPATH=PACKAGE_ROOT)
+        for _ in range(3):
+            subprocess.run([sys.executable, "-c", script], env=env, check=True, cwd=str(tmp_path))
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+        value = registry.get_sample_value("astrogeo_agent_requests_total",
+                                          {"agent_name": "worker_agent", "status": "success"})
+        assert value == 3
+
+    def test_gunicorn_conf_sets_directory_before_metrics_import(self, tmp_path):
+        """Test that loading gunicorn.conf.py prepares the directory without importing prometheus_client,
+        so workers importing metrics afterwards write samples that are summed"""
+        directory = tmp_path / "metrics"
+        directory.mkdir()
+        (directory / "counter_999.db").write_bytes(b"stale")
+        (tmp_path / "worker.py").write_text("from astrogeo.monitoring.metrics import metrics\n"
+                                            "with metrics.time_agent('conf_agent'):\n"
+                                            "    pass\n")
+        (tmp_path / "master.py").write_text("import runpy, subprocess, sys\n"
+                                            f"runpy.run_path({GUNICORN_CONF!r})\n"
+                                            "assert 'prometheus_client' not in sys.modules\n"
+                                            "for _ in range(2):\n"
+                                            "    subprocess.run([sys.executable, 'worker.py'], check=True)\n")
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(directory), PYTHONPATH=PACKAGE_ROOT)
+        subprocess.run([sys.executable, "master.py"], env=env, check=True, cwd=str(tmp_path))
+
+        assert not (directory / "counter_999.db").exists()
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=str(directory))
+        value = registry.get_sample_value("astrogeo_agent_requests_total",
+                                          {"agent_name": "conf_agent", "status": "success"})
+        assert value == 2
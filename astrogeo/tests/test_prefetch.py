@@ -0,0 +1,107 @@
+import json
+import time
+from pathlib import Path
+import sys
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.monitoring.http_instrumentation import InstrumentedAdapter, ResponseCache, response_cache_key
+from astrogeo.monitoring.prefetch import SpeculativePrefetcher, nasa_fetches, weather_fetches
+
+class _SlowTransport(HTTPAdapter):
+    """Answers every request with a JSON echo of its URL after a delay, counting calls"""
+
+    def __init__(self, delay=0.0, **kwargs):
+        self.delay = delay
+        self.urls = []
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        time.sleep(self.delay)
+        self.urls.append(request.url)
+        response = requests.Response()
+        response.status_code = 200
+        response.request = request
+        response.url = request.url
+        if "/geo/" in request.url:
+            response._content = json.dumps([{'name': 'Mumbai', 'country': 'IN'}]).encode()
+        else:
+            response._content = json.dumps({'url': request.url}).encode()
+        return response
+
+class _Adapter(InstrumentedAdapter, _SlowTransport):
+    pass
+
+def make_session(cache, delay=0.0):
+    adapter = _Adapter(cache=cache, delay=delay)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    return session, adapter
+
+class TestSpeculativePrefetch:
+    """Test that routed queries warm provider responses the agent then reuses"""
+
+    def test_agent_request_reuses_prefetched_response(self):
+        """Test that a request matching a finished prefetch is not sent again, regardless of param order"""
+        cache = ResponseCache(ttl_seconds=60)
+        session, adapter = make_session(cache)
+        prefetcher = SpeculativePrefetcher(session, {'enabled': True, 'max_workers': 2})
+
+        for future in prefetcher.prefetch(nasa_fetches("Current solar flare activity", api_key="KEY")):
+            future.result()
+        response = session.get("https://api.nasa.gov/DONKI/FLR", params={"api_key": "KEY"}, timeout=10)
+
+        assert len(adapter.urls) == 1
+        assert response.from_cache
+        assert response.json() == {'url': "https://api.nasa.gov/DONKI/FLR?api_key=KEY"}
+        assert cache.stats()['hits'] == 1
+        assert response_cache_key("https://x.org/p?b=2&a=1") == response_cache_key("https://x.org/p?a=1&b=2")
+
+    def test_request_joins_inflight_prefetch(self):
+        """Test that a request made while the prefetch is running waits for it instead of duplicating it"""
+        cache = ResponseCache(ttl_seconds=60)
+        session, adapter = make_session(cache, delay=0.2)
+        prefetcher = SpeculativePrefetcher(session, {'enabled': True, 'max_workers': 2})
+
+        start = time.perf_counter()
+        prefetcher.prefetch(nasa_fetches("Show me the asteroid list", api_key="KEY"))
+        time.sleep(0.05)
+        session.get("https://api.nasa.gov/neo/rest/v1/feed", params={"api_key": "KEY"}, timeout=10)
+
+        assert time.perf_counter() - start < 0.35
+        assert len(adapter.urls) == 1
+        assert cache.stats()['joined'] == 1
+
+    def test_prefetch_is_used_once_and_ordinary_requests_are_not_cached(self):
+        """Test that only speculative responses are kept, and each is handed out once"""
+        cache = ResponseCache(ttl_seconds=60)
+        session, adapter = make_session(cache)
+        prefetcher = SpeculativePrefetcher(session, {'enabled': True, 'max_workers': 1})
+
+        for future in prefetcher.prefetch(nasa_fetches("today's apod picture", api_key="KEY")):
+            future.result()
+        first = session.get("https://api.nasa.gov/planetary/apod", params={"api_key": "KEY"}, timeout=10)
+        second = session.get("https://api.nasa.gov/planetary/apod", params={"api_key": "KEY"}, timeout=10)
+        session.get("https://api.nasa.gov/planetary/apod", params={"api_key": "KEY"}, timeout=10)
+
+        assert first.from_cache and not getattr(second, 'from_cache', False)
+        assert len(adapter.urls) == 3
+        assert cache.stats()['entries'] == 0
+
+    def test_weather_chain_and_disabled_plans(self):
+        """Test that weather prefetch geocodes then warms weather and forecast, and is skipped without a key"""
+        cache = ResponseCache(ttl_seconds=60)
+        session, adapter = make_session(cache)
+        prefetcher = SpeculativePrefetcher(session, {'enabled': True, 'max_workers': 1})
+
+        for future in prefetcher.prefetch(weather_fetches("Mumbai", api_key="OWM")):
+            future.result()
+
+        assert [url.split('?')[0].rsplit('/', 1)[-1] for url in adapter.urls] == ['direct', 'weather', 'forecast']
+        assert cache.stats()['entries'] == 3
+        assert weather_fetches("Mumbai", api_key="DEMO_KEY") == []
+        assert nasa_fetches("Tell me about ISRO") == []
+        assert SpeculativePrefetcher(session, {'enabled': False}).prefetch(nasa_fetches("solar")) == []
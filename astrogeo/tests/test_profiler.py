@@ -0,0 +1,82 @@
+import pytest
+import threading
+import time
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from astrogeo.monitoring.profiler import (
+    AllocationTracker, SamplingProfiler, create_profiling_router, to_collapsed, to_speedscope
+)
+from astrogeo.security import auth
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,), name="busy worker", daemon=True)
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+class TestProfiler:
+    """Test the sampling profiler, allocation diffs and admin gating"""
+
+    def test_sampler_finds_hot_function_in_other_thread(self, busy_thread):
+        """Test that a busy thread's function shows up in collapsed and speedscope output"""
+        profile = SamplingProfiler(interval=0.001).sample(0.2)
+
+        collapsed = to_collapsed(profile)
+        assert "thread:busy_worker" in collapsed
+        assert "busy_loop" in collapsed
+
+        speedscope = to_speedscope(profile)
+        assert "busy_loop" in {frame["name"] for frame in speedscope["shared"]["frames"]}
+        assert any(p["name"] == "busy worker" for p in speedscope["profiles"])
+
+    def test_only_one_profile_at_a_time(self):
+        """Test that a second concurrent profile is refused"""
+        profiler = SamplingProfiler()
+        profiler._lock.acquire()
+        try:
+            with pytest.raises(RuntimeError):
+                profiler.sample(0.01)
+        finally:
+            profiler._lock.release()
+
+    def test_allocation_diff_reports_growth(self):
+        """Test that memory allocated during the window is attributed to its line"""
+        retained = []
+
+        def allocate():
+            time.sleep(0.02)
+            retained.append(bytearray(2_000_000))
+
+        thread = threading.Thread(target=allocate)
+        thread.start()
+        report = AllocationTracker().diff(0.1, top=5)
+        thread.join()
+
+        assert report["top"][0]["size_diff_bytes"] >= 2_000_000
+        assert "test_profiler.py" in report["top"][0]["location"][0]
+
+    def test_endpoints_require_admin(self, monkeypatch):
+        """Test that the router rejects callers without the admin token"""
+        monkeypatch.setattr(auth, "ADMIN_TOKEN", "s3cret")
+        app = FastAPI()
+        app.include_router(create_profiling_router(auth.require_admin_token))
+        client = TestClient(app)
+
+        assert client.get("/admin/profile/cpu?seconds=0.05").status_code == 403
+        response = client.get("/admin/profile/cpu?seconds=0.05&format=speedscope",
+                              headers={"X-Admin-Token": "s3cret"})
+        assert response.status_code == 200
+        assert response.json()["$schema"].startswith("https://www.speedscope.app")
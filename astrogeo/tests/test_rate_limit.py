@@ -0,0 +1,195 @@
+import pytest
+import asyncio
+import threading
+from datetime import timedelta
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+
+from astrogeo.security.auth import create_access_token
+from astrogeo.security.rate_limit import (
+    AdmissionController, AdmissionRejected, DEFAULT_RATE_LIMIT_SETTINGS, InMemoryBackend, RateLimitMiddleware
+)
+
+def make_settings(**overrides):
+    settings = dict(DEFAULT_RATE_LIMIT_SETTINGS)
+    settings.update(overrides)
+    return settings
+
+def make_app(settings):
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, settings=settings, backend=InMemoryBackend())
+
+    @app.post("/query")
+    async def query():
+        return {"result": "ok"}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return TestClient(app)
+
+class ThreadRecordingBackend(InMemoryBackend):
+    """In-memory backend that claims to block and records which threads it ran on"""
+
+    blocking = True
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def hit_many(self, *args, **kwargs):
+        self.threads.add(threading.get_ident())
+        return super().hit_many(*args, **kwargs)
+
+class TestRateLimiting:
+    """Test sliding-window limits, route costs and admission control"""
+
+    def test_window_rejects_with_retry_after(self):
+        """Test that the backend reports when the oldest cost leaves the window"""
+        backend = InMemoryBackend()
+        assert backend.hit("ip:1", limit=3, window=60, cost=2)[0]
+        assert backend.hit("ip:1", limit=3, window=60, cost=1)[0]
+        allowed, retry_after = backend.hit("ip:1", limit=3, window=60, cost=1)
+        assert not allowed
+        assert 59 < retry_after <= 60
+        assert backend.hit("ip:2", limit=3, window=60, cost=1)[0]
+
+    def test_rejected_hits_charge_no_window(self):
+        """Test that a cost one window refuses is not recorded in the windows that had room"""
+        backend = InMemoryBackend()
+        assert backend.hit_many([("ip:1", 10, 60, 2), ("user:bob", 2, 60, 2)])[0]
+        for _ in range(3):
+            allowed, retry_after = backend.hit_many([("ip:1", 10, 60, 2), ("user:bob", 2, 60, 2)])
+            assert not allowed and retry_after > 59
+        assert backend.hit("ip:1", 10, 60, 8)[0]
+        assert not backend.hit("ip:1", 10, 60, 1)[0]
+
+    def test_retries_over_the_user_limit_leave_the_ip_window(self):
+        """Test that a user retrying past their limit does not use up the budget of others on the same IP"""
+        client = make_app(make_settings(per_ip={'limit': 4, 'window_seconds': 60},
+                                        per_user={'limit': 1, 'window_seconds': 60}))
+        token = create_access_token({"sub": "astronaut"}, timedelta(minutes=5))
+        headers = {"Authorization": f"Bearer {token}"}
+
+        assert client.get("/health", headers=headers).status_code == 200
+        assert all(client.get("/health", headers=headers).status_code == 429 for _ in range(5))
+        assert all(client.get("/health").status_code == 200 for _ in range(3))
+
+    def test_route_costs_drain_the_ip_window(self):
+        """Test that expensive routes use up the shared budget faster than cheap ones"""
+        client = make_app(make_settings(per_ip={'limit': 10, 'window_seconds': 60},
+                                        route_costs={'/query': 5}))
+
+        assert client.post("/query").status_code == 200
+        assert client.post("/query").status_code == 200
+        response = client.get("/health")
+
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+
+    def test_disabled_limiter_passes_everything(self):
+        """Test that api.rate_limiting: false turns the middleware off"""
+        client = make_app(make_settings(enabled=False, per_ip={'limit': 1, 'window_seconds': 60}))
+        assert all(client.get("/health").status_code == 200 for _ in range(3))
+
+    def test_admission_queue_is_bounded(self):
+        """Test that callers beyond the concurrency cap wait, and beyond the queue are rejected"""
+        async def run():
+            admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+            await admission.acquire()
+            waiter = asyncio.create_task(admission.acquire())
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejected):
+                await admission.acquire()
+            admission.release()
+            await waiter
+            admission.release()
+            await admission.acquire()
+            with pytest.raises(AdmissionRejected):
+                await admission.acquire()
+
+        asyncio.run(run())
+
+    def test_endpoint_paces_fanned_out_work(self):
+        """Test that an endpoint can charge extra units through request.state and wait for the window"""
+        app = FastAPI()
+        app.add_middleware(RateLimitMiddleware, backend=InMemoryBackend(),
+                           settings=make_settings(per_ip={'limit': 4, 'window_seconds': 0.2}))
+
+        @app.post("/query/batch")
+        async def batch(request: Request):
+            start = asyncio.get_running_loop().time()
+            for _ in range(3):
+                await request.state.rate_limiter.pace(request, 2)
+            return {"waited": asyncio.get_running_loop().time() - start}
+
+        waited = TestClient(app).post("/query/batch").json()["waited"]
+        # 1 unit for the route plus 6 paced units cannot fit one 4-unit window
+        assert waited >= 0.1
+
+    def test_patient_slot_waits_instead_of_rejecting(self):
+        """Test that batch items queue for admission past the normal queue limit"""
+        async def run():
+            admission = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=0.01)
+            await admission.acquire()
+            asyncio.get_running_loop().call_later(0.05, admission.release)
+            async with admission.slot(patient=True):
+                assert admission.semaphore.locked()
+            assert not admission.semaphore.locked()
+
+        asyncio.run(run())
+
+    def test_only_failed_logins_are_charged(self):
+        """Test that successful logins leave the login bucket alone and failures fill it"""
+        app = FastAPI()
+        app.add_middleware(RateLimitMiddleware, backend=InMemoryBackend(),
+                           settings=make_settings(login={'limit': 2, 'window_seconds': 60}))
+
+        @app.post("/auth/login")
+        async def login(request: Request):
+            if request.query_params.get("password") != "right":
+                raise HTTPException(status_code=401, detail="Incorrect username or password")
+            return {"access_token": "token"}
+
+        client = TestClient(app)
+        assert all(client.post("/auth/login?password=right").status_code == 200 for _ in range(4))
+        assert client.post("/auth/login?password=wrong").status_code == 401
+        assert client.post("/auth/login?password=wrong").status_code == 401
+        assert client.post("/auth/login?password=right").status_code == 429
+
+    def test_blocking_backend_runs_off_the_event_loop(self):
+        """Test that a network backend is called from a worker thread, not the serving loop"""
+        backend = ThreadRecordingBackend()
+        app = FastAPI()
+        app.add_middleware(RateLimitMiddleware, backend=backend, settings=make_settings())
+
+        @app.get("/health")
+        async def health():
+            return {"thread": threading.get_ident()}
+
+        loop_thread = TestClient(app).get("/health").json()["thread"]
+        assert backend.threads and loop_thread not in backend.threads
+
+    def test_rejections_carry_cors_headers(self):
+        """Test that CORS added after the limiter wraps it, so browsers can read 429s"""
+        app = FastAPI()
+        app.add_middleware(RateLimitMiddleware, backend=InMemoryBackend(),
+                           settings=make_settings(per_ip={'limit': 1, 'window_seconds': 60}))
+        app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+        @app.get("/health")
+        async def health():
+            return {"status": "healthy"}
+
+        client = TestClient(app)
+        client.get("/health", headers={"Origin": "https://example.org"})
+        response = client.get("/health", headers={"Origin": "https://example.org"})
+        assert response.status_code == 429
+        assert response.headers["access-control-allow-origin"] == "*"
@@ -0,0 +1,97 @@
+import pytest
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from astrogeo.db.models import Base
+from astrogeo.db.pagination import encode_cursor, decode_cursor
+from astrogeo.db import fulltext  # registers the FTS5 table on create_all
+from astrogeo.db.repository import QueryLogRepository, FeedbackRepository
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+class TestRepositoryPagination:
+    """Test keyset pagination and column projections in repository list methods"""
+
+    def test_cursor_round_trip(self):
+        """Test that continuation tokens decode to the position they encode"""
+        created_at = datetime(2024, 5, 1, 12, 30)
+        assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+    def test_invalid_cursor_rejected(self):
+        """Test that a malformed token raises ValueError"""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_pages_cover_history_without_gaps(self, session):
+        """Test that walking every page returns each row exactly once, newest first"""
+        repo = QueryLogRepository(session)
+        start = datetime(2024, 1, 1)
+        for i in range(7):
+            # Pairs of rows share a timestamp so the id tie-breaker is exercised
+            repo.create_query_log({"user_id": 1, "query_text": f"q{i}",
+                                   "created_at": start + timedelta(minutes=i // 2)})
+        repo.create_query_log({"user_id": 2, "query_text": "other user"})
+
+        seen, cursor = [], None
+        while True:
+            page = repo.get_user_query_logs(1, limit=3, cursor=cursor)
+            seen.extend(log.query_text for log in page)
+            if not page.has_more:
+                break
+            cursor = page.next_cursor
+
+        assert seen == [f"q{i}" for i in reversed(range(7))]
+
+    def test_column_projection_returns_lightweight_records(self, session):
+        """Test that projections return tuples with only the requested fields"""
+        repo = QueryLogRepository(session)
+        repo.create_query_log({"user_id": 1, "query_text": "What is Bhuvan?", "query_type": "geospatial"})
+
+        page = repo.get_query_logs_by_type("geospatial", columns=["id", "query_text"])
+
+        assert page[0].query_text == "What is Bhuvan?"
+        assert page[0]._fields == ("id", "query_text")
+
+    def test_unknown_projection_column_rejected(self, session):
+        """Test that projecting a column the model lacks raises ValueError"""
+        with pytest.raises(ValueError):
+            FeedbackRepository(session).get_unresolved_feedback(columns=["no_such_column"])
+
+class TestQueryLogSearch:
+    """Test full-text search over query logs"""
+
+    def test_search_requires_every_term_and_honours_time_filter(self, session):
+        """Test that search matches all terms and filters by date"""
+        repo = QueryLogRepository(session)
+        repo.create_query_log({"query_text": "Chandrayaan-3 landing site", "created_at": datetime(2024, 3, 1)})
+        repo.create_query_log({"query_text": "ISRO Chandrayaan mission status", "created_at": datetime(2024, 4, 1)})
+        repo.create_query_log({"query_text": "solar flare today", "created_at": datetime(2024, 4, 2)})
+
+        hits = repo.search_query_logs("chandrayaan mission")
+        assert [log.query_text for log, _ in hits] == ["ISRO Chandrayaan mission status"]
+
+        recent = repo.search_query_logs("chandrayaan", start_date=datetime(2024, 3, 15))
+        assert [log.query_text for log, _ in recent] == ["ISRO Chandrayaan mission status"]
+
+    def test_similar_queries_ranked_by_overlap(self, session):
+        """Test that similar-query lookup ranks the closest past query first"""
+        repo = QueryLogRepository(session)
+        repo.create_query_log({"query_text": "What is the weather in Mumbai"})
+        repo.create_query_log({"query_text": "What is Bhuvan platform"})
+        repo.create_query_log({"query_text": "Bhuvan"})
+
+        similar = repo.find_similar_queries("what is bhuvan")
+
+        assert similar[0][0].query_text == "What is Bhuvan platform"
+        assert "What is the weather in Mumbai" in [log.query_text for log, _ in similar]
@@ -0,0 +1,205 @@
+import pytest
+from pathlib import Path
+import sys
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.bench.run_routing_benchmark import run_benchmark
+from astrogeo.routing.keyword_router import KeywordRouter, load_routing_rules, trie_pattern
+from astrogeo.routing.semantic_router import SemanticRouter, load_semantic_settings
+
+ASTROGEO_DIR = Path(__file__).parent.parent
+
+RULES = {
+    'profiles': {
+        'agents': {
+            'intents': {
+                'live': {'keywords': {'nasa': 1, 'apod': 2}, 'requires': [['today', 'latest']]},
+                'weather': {'keywords': {'space weather': 3, 'solar wind': 3, 'sun': 1}},
+                'mars': {'keywords': {'mars': 2, 'rover': 1}, 'excludes': ['chocolate']},
+            },
+        },
+        'tasks': {
+            'fallback': 'general',
+            'fallback_meta': {'data_source': 'knowledge_base'},
+            'intents': {
+                'isro': {'keywords': ['isro', 'ocm'], 'data_source': 'vector_db'},
+                'solar': {'keywords': ['solar'], 'min_score': 2},
+            },
+        },
+    },
+}
+
+class TestKeywordRouter:
+    """Test the compiled keyword router"""
+
+    def test_scan_finds_contained_keywords_at_word_starts(self):
+        """Test that one scan reports overlapping keywords and ignores matches inside words"""
+        router = KeywordRouter(RULES)
+
+        assert router.scan("Solar wind and the Mars rover") == {'solar', 'solar wind', 'mars', 'rover'}
+        assert router.scan("Sunspots today") == {'sun', 'today'}
+        assert router.scan("tsunami documents") == frozenset()
+        assert router.scan("") == frozenset()
+
+    def test_trie_pattern_prefers_longest_word(self):
+        """Test that the prefix-factored pattern matches the longest keyword at a position"""
+        import re
+        pattern = re.compile(trie_pattern(['solar', 'solar wind', 'sol']))
+
+        assert pattern.match("solar wind").group(0) == "solar wind"
+        assert pattern.match("solar flare").group(0) == "solar"
+        assert pattern.match("sol 1000").group(0) == "sol"
+
+    def test_multi_intent_scores_and_confidence(self):
+        """Test that every matching intent is reported, best first, with normalised confidence"""
+        router = KeywordRouter(RULES)
+        result = router.route("Latest NASA APOD and Mars rover photos", 'agents')
+
+        assert result.labels == ['live', 'mars']
+        assert result.score('live') == 4 and result.score('mars') == 3
+        assert result.confidence == pytest.approx(4 / (4 + 3 + 1))
+        assert result.intents[0].matched == ['apod', 'latest', 'nasa']
+
+    def test_requires_excludes_and_min_score(self):
+        """Test that requires groups, excludes and min_score gate an intent"""
+        router = KeywordRouter(RULES)
+
+        assert router.route("NASA APOD archive", 'agents').score('live') == 0
+        assert router.route("Mars chocolate bars", 'agents').labels == []
+        assert router.route("solar panels", 'tasks').top == 'general'
+
+    def test_fallback_meta_and_unknown_profile(self):
+        """Test that rule metadata comes back with the intent and the fallback's when nothing matched"""
+        router = KeywordRouter(RULES)
+
+        assert router.route("ISRO OCM data", 'tasks').meta == {'data_source': 'vector_db'}
+        nothing = router.route("Best pizza in town", 'tasks')
+        assert nothing.top == 'general' and nothing.confidence == 0.0
+        assert nothing.meta == {'data_source': 'knowledge_base'}
+        assert router.route("Best pizza in town", 'agents').top is None
+        with pytest.raises(KeyError):
+            router.route("anything", 'missing')
+
+    def test_shipped_rules_route_like_the_replaced_routers(self):
+        """Test a few representative queries against config/routing.yaml"""
+        router = KeywordRouter(load_routing_rules(str(ASTROGEO_DIR / "config" / "routing.yaml")))
+
+        assert router.route("Tell me about Chandrayaan-3", 'intelligent').top == 'isro_geospatial'
+        assert router.route("Show me today's NASA picture", 'intelligent').top == 'nasa_live'
+        assert router.route("Current solar flare activity", 'intelligent').top == 'space_weather'
+        assert router.route("Weather in Mumbai", 'domains').top == 'weather/climate'
+        assert router.route("What is rainfall like in Kerala", 'crew_tasks').top == 'geospatial_analysis'
+        assert router.route("Recipe for pasta", 'domains').top == 'food/dining'
+
+# Words standing for the same concept share a dimension, so paraphrases embed alike
+CONCEPTS = [
+    {'sun', 'solar', 'flare', 'flares', 'storm', 'storms', 'aurora', 'geomagnetic', 'behaving'},
+    {'mars', 'rover', 'rovers', 'red', 'planet'},
+    {'nasa', 'apod', 'picture', 'today', 'latest'},
+]
+
+class ConceptEmbedder:
+    """Deterministic stand-in for the sentence transformer that counts its calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        words = [set(text.lower().replace('?', ' ').replace("'s", ' ').split()) for text in texts]
+        return np.array([[len(w & concept) for concept in CONCEPTS] + [0.1] for w in words], dtype=np.float32)
+
+def semantic_settings(tmp_path, **overrides):
+    settings = {
+        'enabled': True,
+        'model_name': 'concepts',
+        'threshold': 0.5,
+        'margin': 0.05,
+        'centroid_path': str(tmp_path / "centroids.npz"),
+        'examples': {'agents': {'weather': ["How is the Sun behaving"], 'mars': ["Where is the red planet"]}},
+    }
+    settings.update(overrides)
+    return settings
+
+class TestSemanticRouter:
+    """Test routing by intent centroids with the keyword router as fallback"""
+
+    def test_paraphrase_routes_without_keywords(self, tmp_path):
+        """Test that a paraphrase with no keyword is routed by its nearest centroid"""
+        keywords = KeywordRouter(RULES)
+        router = SemanticRouter(ConceptEmbedder(), semantic_settings(tmp_path), fallback=keywords)
+        router.fit('agents', {'weather': ["Solar flares and geomagnetic storms"], 'mars': ["Mars rovers"],
+                              'live': ["NASA picture of the day"]})
+
+        assert keywords.route("Is the aurora going to be good?", 'agents').top is None
+        result = router.route("Is the aurora going to be good?", 'agents')
+        assert result.top == 'weather' and result.method == 'semantic'
+        assert result.confidence > 0.9
+
+    def test_ambiguous_or_unfitted_queries_use_keyword_rules(self, tmp_path):
+        """Test the keyword fallback for ties, weak matches, unknown profiles and a missing model"""
+        keywords = KeywordRouter(RULES)
+        router = SemanticRouter(ConceptEmbedder(), semantic_settings(tmp_path), fallback=keywords)
+        router.fit('agents', {'weather': ["solar storms"], 'mars': ["mars rover"]})
+
+        tie = router.route("solar wind near mars", 'agents')
+        assert tie.method == 'keywords' and tie.labels == ['weather', 'mars']
+        assert router.route("best pizza in town", 'agents').method == 'keywords'
+        assert router.route("ISRO OCM data", 'tasks').top == 'isro'
+        unfitted = SemanticRouter(None, semantic_settings(tmp_path), fallback=keywords)
+        assert not unfitted.fit('agents', {'weather': ["solar storms"]})
+        assert unfitted.route("Is the aurora going to be good?", 'agents').top is None
+
+    def test_only_strong_secondary_intents_are_reported(self, tmp_path):
+        """Test that intents past the threshold but below multi_intent_threshold are not reported with the top one"""
+        descriptions = {'weather': ["solar storms"], 'mars': ["mars rover"], 'live': ["nasa picture"]}
+        query = "Solar flare storms near the mars rover"
+        strict = SemanticRouter(ConceptEmbedder(), semantic_settings(tmp_path, multi_intent_threshold=0.6))
+        loose = SemanticRouter(ConceptEmbedder(), semantic_settings(tmp_path, multi_intent_threshold=0.5))
+        strict.fit('agents', descriptions)
+        loose.fit('agents', descriptions)
+
+        assert strict.route(query, 'agents').labels == ['weather']
+        assert loose.route(query, 'agents').labels == ['weather', 'mars']
+        assert strict.route(query, 'agents').method == 'semantic'
+
+    def test_shipped_settings_leave_semantic_routing_off(self):
+        """Test that routing.yaml keeps the keyword rules in charge until the model is benchmarked"""
+        router = SemanticRouter(ConceptEmbedder(), load_semantic_settings(str(ASTROGEO_DIR / "config" / "routing.yaml")))
+
+        assert not router.ready
+        assert router.multi_intent_threshold > router.threshold
+
+    def test_centroids_are_persisted_and_refreshed(self, tmp_path):
+        """Test that fitting again loads saved centroids and recomputes them when the texts change"""
+        descriptions = {'weather': ["solar storms"], 'mars': ["mars rover"]}
+        SemanticRouter(ConceptEmbedder(), semantic_settings(tmp_path)).fit('agents', descriptions)
+
+        embedder = ConceptEmbedder()
+        router = SemanticRouter(embedder, semantic_settings(tmp_path))
+        assert router.fit('agents', descriptions)
+        assert embedder.calls == 0
+        assert router.route("solar flare today", 'agents', frozenset()).top == 'weather'
+
+        changed = SemanticRouter(embedder, semantic_settings(tmp_path, examples={}))
+        assert changed.fit('agents', descriptions)
+        assert embedder.calls == 2
+
+class TestRoutingBenchmark:
+    """Test the routing benchmark harness"""
+
+    def test_benchmark_reports_accuracy_and_latency(self):
+        """Test that the harness runs the labelled corpus through both routers and both baselines"""
+        report = run_benchmark(str(ASTROGEO_DIR / "bench" / "fixtures" / "routing_queries.jsonl"), repeat=1,
+                               rules_path=str(ASTROGEO_DIR / "config" / "routing.yaml"),
+                               embed_fn=ConceptEmbedder())
+
+        assert report['queries'] >= 50
+        assert report['compiled']['accuracy']['top1'] >= report['naive_first_match']['accuracy']['top1']
+        assert report['compiled']['multi_intent_recall'] > 0.5
+        for name in ('compiled', 'naive_all_intents', 'naive_first_match', 'semantic'):
+            assert report[name]['latency']['median_us'] > 0
+        assert 0 <= report['semantic']['multi_intent_recall'] <= 1
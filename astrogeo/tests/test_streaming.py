@@ -0,0 +1,124 @@
+import pytest
+import asyncio
+import json
+import subprocess
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from astrogeo.api.streaming import crew_callbacks, emit_progress, sse_events, stream_progress
+
+ASTROGEO_DIR = Path(__file__).parent.parent
+
+# Runs api_server_v2 with the multi-agent system, a canned vector store and NASA response, printing the streamed events
+CHAT_SCRIPT = """
+import json, sys
+sys.path.insert(0, '.')
+import multi_agent_astrogeo as system
+
+class Store:
+    def search_vector_db(self, query, k=3):
+        return [{'content': 'Bhuvan is the ISRO geoportal for satellite imagery', 'score': 0.9}]
+
+class Response:
+    status_code = 200
+    def raise_for_status(self):
+        pass
+    def json(self):
+        return {'title': 'Pillars of Creation', 'explanation': 'Star formation', 'url': 'https://apod.nasa.gov'}
+
+class Session:
+    def get(self, url, params=None, timeout=None):
+        return Response()
+
+system.IntelligentAstroGeoSystem._initialize_vector_db = lambda self: Store()
+system.http_session = Session()
+system.prefetcher.prefetch = lambda fetches: None
+
+from fastapi.testclient import TestClient
+import api_server_v2
+client = TestClient(api_server_v2.app)
+print(json.dumps([client.post('/api/chat/stream', json={'message': message}).text
+                  for message in ['What is Bhuvan?', "Show me today's NASA picture"]]))
+"""
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+class TestStreaming:
+    """Test progress events streamed over SSE from tasks and worker threads"""
+
+    def test_events_from_threads_arrive_in_order(self):
+        """Test that events emitted inside to_thread work reach the stream, then done"""
+        class Step:
+            tool = "nasa_apod"
+            tool_input = "{}"
+            result = "Astronomy picture of the day"
+
+        def crew_run():
+            callbacks = crew_callbacks()
+            callbacks["step_callback"](Step())
+            callbacks["task_callback"]("Analysis complete")
+            return "final"
+
+        async def produce():
+            emit_progress("routing", agent="astronomical_agent")
+            result = await asyncio.to_thread(crew_run)
+            emit_progress("answer", result=result)
+
+        async def collect():
+            return [item async for item in stream_progress(produce)]
+
+        events = [item["event"] for item in asyncio.run(collect())]
+        assert events == ["routing", "tool_result", "task_output", "answer", "done"]
+
+    def test_no_stream_means_no_op(self):
+        """Test that emitting outside a streamed request is harmless"""
+        emit_progress("routing", agent="none")
+        assert crew_callbacks() == {}
+
+    def test_sse_endpoint_reports_errors(self):
+        """Test that a failing producer yields an error event instead of a broken response"""
+        app = FastAPI()
+
+        @app.get("/stream")
+        async def stream():
+            async def produce():
+                emit_progress("routing", agent="weather_agent")
+                raise RuntimeError("provider down")
+            return StreamingResponse(sse_events(produce), media_type="text/event-stream")
+
+        response = TestClient(app).get("/stream")
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.text)
+        assert [name for name, _ in events] == ["routing", "error", "done"]
+        assert events[1][1]["detail"] == "provider down"
+
+    def test_chat_stream_reports_routing_documents_and_provider_calls(self):
+        """Test that the multi-agent system behind /api/chat/stream emits its own routing, search and NASA calls"""
+        for module in ("gradio", "chromadb", "sentence_transformers", "uvicorn"):
+            pytest.importorskip(module)
+        output = subprocess.run([sys.executable, "-c", CHAT_SCRIPT], check=True, capture_output=True, text=True,
+                                cwd=str(ASTROGEO_DIR)).stdout
+        bhuvan, apod = [parse_sse(body) for body in json.loads(output.strip().splitlines()[-1])]
+
+        assert [name for name, _ in bhuvan] == ["routing", "documents", "answer", "done"]
+        routing = bhuvan[0][1]
+        assert routing["agent"] == "ISRO Geospatial Expert" and routing["confidence"] > 0
+        assert bhuvan[1][1]["documents"][0]["score"] == 0.9
+        assert "Bhuvan is the ISRO geoportal" in bhuvan[2][1]["response"]
+
+        assert [name for name, _ in apod] == ["routing", "provider_call", "answer", "done"]
+        assert apod[0][1]["agent"] == "NASA Live Data Specialist"
+        call = apod[1][1]
+        assert call["url"] == "https://api.nasa.gov/planetary/apod" and call["status"] == 200
+        assert "Pillars of Creation" in apod[2][1]["response"]
@@ -0,0 +1,125 @@
+import contextvars
+import pytest
+import threading
+import time
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.cache.llm_cache import task_scope
+from astrogeo.cache.tool_memo import ToolFailure, ToolMemo, memoized_tool, tool_memo
+
+class FakeNasaTool:
+    """Stand-in for a crewai BaseTool whose _run hits a provider"""
+    name = "NASA Mars Rover Tool"
+
+    def __init__(self):
+        self.calls = 0
+
+    @memoized_tool
+    def _run(self, sol: int = 1000, camera: str = "NAVCAM") -> str:
+        self.calls += 1
+        time.sleep(0.05)
+        return f"photos for sol {sol} {camera}"
+
+@pytest.fixture
+def memo():
+    return ToolMemo({'enabled': True, 'ttl_seconds': {'NASA APOD Tool': 60}, 'max_entries': 10})
+
+class TestToolMemo:
+    """Test run-scoped tool memoization, cross-run TTL and the blackboard"""
+
+    def test_repeat_calls_within_a_run_execute_once(self):
+        """Test that positional, keyword and defaulted forms of one call share a key"""
+        tool = FakeNasaTool()
+        with tool_memo.run_scope() as run:
+            tool._run(1000)
+            tool._run(sol=1000)
+            tool._run(1000, camera="NAVCAM")
+            tool._run(2000)
+        assert tool.calls == 2
+        assert run.hits == 2 and run.misses == 2
+
+    def test_results_do_not_leak_between_runs(self):
+        """Test that a new run without a TTL calls the tool again"""
+        tool = FakeNasaTool()
+        with tool_memo.run_scope():
+            tool._run(1000)
+        with tool_memo.run_scope():
+            tool._run(1000)
+        tool._run(1000)
+        assert tool.calls == 3
+
+    def test_concurrent_identical_calls_wait_for_the_first(self):
+        """Test that parallel tasks issuing the same call trigger one outbound request"""
+        tool = FakeNasaTool()
+        with tool_memo.run_scope():
+            # Same as DagExecutor: each task thread runs in a copy of the caller's context
+            threads = [threading.Thread(target=contextvars.copy_context().run, args=(tool._run, 7))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert tool.calls == 1
+
+    def test_cross_run_ttl(self, memo):
+        """Test that tools with a TTL are reused across runs and others are not"""
+        calls = []
+        def fetch():
+            calls.append(1)
+            return "apod"
+
+        with memo.run_scope():
+            memo.call("NASA APOD Tool", {}, fetch)
+        with memo.run_scope():
+            assert memo.call("NASA APOD Tool", {}, fetch) == "apod"
+        assert memo.call("NASA APOD Tool", {}, fetch) == "apod"
+        assert len(calls) == 1
+
+        memo.call("ESA API Tool", {}, fetch)
+        memo.call("ESA API Tool", {}, fetch)
+        assert len(calls) == 3
+
+    def test_failed_calls_are_not_memoized(self, memo):
+        """Test that an error result is returned but kept out of the memo, so the next call retries"""
+        responses = [ToolFailure("Error fetching APOD: 503 Server Error"), "apod"]
+        def fetch():
+            return responses.pop(0)
+
+        with memo.run_scope() as run:
+            first = memo.call("NASA APOD Tool", {}, fetch)
+            assert first == "Error fetching APOD: 503 Server Error" and isinstance(first, str)
+            assert run.read() == []
+            assert memo.call("NASA APOD Tool", {}, fetch) == "apod"
+            assert [entry.result for entry in run.read()] == ["apod"]
+        assert memo.call("NASA APOD Tool", {}, fetch) == "apod"
+        assert responses == []
+
+        outside = [ToolFailure("timeout"), "apod"]
+        assert memo.call("NASA APOD Tool", {'date': 'x'}, lambda: outside.pop(0)) == "timeout"
+        assert memo.call("NASA APOD Tool", {'date': 'x'}, lambda: outside.pop(0)) == "apod"
+
+    def test_blackboard_records_results_and_notes(self, memo):
+        """Test that later tasks can read earlier tool results and posted values"""
+        with memo.run_scope() as run:
+            with task_scope("data_harvesting_task"):
+                memo.call("Bhuvan API Tool", {'endpoint': 'lulc'}, lambda: "land use grid")
+            run.post("region", "Western Ghats")
+
+            entries = run.read("Bhuvan API Tool")
+            assert entries[0].result == "land use grid"
+            assert entries[0].task == "data_harvesting_task"
+            summary = run.summary()
+            assert "region: Western Ghats" in summary
+            assert 'lulc' in summary
+
+    def test_disabled_memo_always_runs(self):
+        """Test that disabling the memo passes every call through"""
+        memo = ToolMemo({'enabled': False})
+        calls = []
+        with memo.run_scope():
+            memo.call("t", {}, lambda: calls.append(1))
+            memo.call("t", {}, lambda: calls.append(1))
+        assert len(calls) == 2
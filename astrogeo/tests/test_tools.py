@@ -0,0 +1,100 @@
+import pytest
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.monitoring import http_instrumentation
+from astrogeo.monitoring.http_instrumentation import (
+    EndpointTemplater, create_http_session, provider_for_host
+)
+from astrogeo.monitoring.metrics import PROVIDER_REQUEST_DURATION
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-RateLimit-Remaining', '42')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    server = HTTPServer(('127.0.0.1', 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+class TestHttpInstrumentation:
+    """Test provider HTTP instrumentation"""
+
+    def test_provider_mapping(self):
+        """Test that known hosts map to provider labels"""
+        assert provider_for_host('api.nasa.gov') == 'NASA'
+        assert provider_for_host('bhuvan-app1.nrsc.gov.in') == 'Bhuvan'
+        assert provider_for_host('example.com') == 'other'
+
+    def test_endpoint_templates_are_bounded(self):
+        """Test that ids collapse and unseen templates stop growing past the cap"""
+        templater = EndpointTemplater(max_templates=2)
+        assert templater.template('NASA', '/mars-photos/api/v1/rovers/curiosity/photos') == \
+            '/mars-photos/api/v1/rovers/{rover}/photos'
+        assert templater.template('NASA', '/neo/rest/v1/neo/3542519') == '/neo/rest/v1/neo/{asteroid_id}'
+        assert templater.template('ESA', '/odata/v1/Products/2b17b57d-fff4-4645-b539-91f305c27c69') == \
+            '/odata/v1/Products/{id}'
+        assert templater.template('NASA', '/DONKI/FLR') == '{other}'
+
+    def test_request_emits_metrics_and_sampled_usage(self, stub_server):
+        """Test that a call records latency and is handed to the ApiUsage sink without secrets"""
+        recorded = []
+        done = threading.Event()
+
+        def sink(usage):
+            recorded.append(usage)
+            done.set()
+
+        http_instrumentation.configure_api_usage_sink(sink, sample_rate=1.0)
+        try:
+            response = create_http_session(provider_retries={}).get(
+                f"{stub_server}/planetary/apod", params={"api_key": "secret", "date": "2024-01-01"})
+        finally:
+            http_instrumentation._recorder = None
+
+        assert response.json() == {"ok": True}
+        assert done.wait(2)
+        usage = recorded[0]
+        assert usage['endpoint'] == '/planetary/apod'
+        assert usage['response_status'] == 200
+        assert usage['rate_limit_remaining'] == 42
+        assert usage['request_params'] == {"date": "2024-01-01"}
+        sample = PROVIDER_REQUEST_DURATION.labels(provider='other', endpoint='/planetary/apod', status='200')
+        assert sample._sum.get() > 0
+
+    def test_reconfiguring_sink_reuses_recorder_thread(self):
+        """Test that configuring the sink again swaps the sink without starting another thread"""
+        first, second = [], []
+        try:
+            http_instrumentation.configure_api_usage_sink(first.append, sample_rate=1.0)
+            recorder = http_instrumentation._recorder
+            recorder.record({'response_status': 500})
+            thread = recorder._thread
+            http_instrumentation.configure_api_usage_sink(second.append, sample_rate=1.0)
+            recorder.record({'response_status': 503})
+            assert http_instrumentation._recorder is recorder and recorder._thread is thread
+        finally:
+            http_instrumentation._recorder = None
+
+    def test_retries_are_opt_in_per_provider(self):
+        """Test that only providers listed in provider_retries get a retrying adapter"""
+        session = create_http_session(provider_retries={'NASA': 2})
+
+        assert session.get_adapter('https://api.nasa.gov/planetary/apod').max_retries.total == 2
+        assert session.get_adapter('https://api.openweathermap.org/data').max_retries.total == 0
+        assert create_http_session(provider_retries={}).get_adapter('https://api.nasa.gov/x').max_retries.total == 0
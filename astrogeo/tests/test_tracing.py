@@ -0,0 +1,81 @@
+import pytest
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from astrogeo.monitoring.tracing import Tracer, propagate
+
+class ListExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append(trace)
+
+def make_tracer(**overrides):
+    settings = {'enabled': True, 'sample_rate': 0.0, 'latency_threshold_seconds': 60}
+    settings.update(overrides)
+    exporter = ListExporter()
+    tracer = Tracer(settings, exporter=exporter)
+    # Export inline so tests can assert on the result immediately
+    tracer._finish = lambda trace: exporter.export(trace) if tracer._should_export(trace) else None
+    return tracer, exporter
+
+class TestTracing:
+    """Test span nesting, context propagation, sampling and Server-Timing output"""
+
+    def test_spans_nest_across_threads_and_tasks(self):
+        """Test that children opened in worker threads and asyncio tasks share the root trace"""
+        tracer, _ = make_tracer()
+
+        def tool_call():
+            with tracer.span("http.NASA"):
+                pass
+
+        async def vector_search():
+            with tracer.span("vector.search"):
+                await asyncio.sleep(0)
+
+        with tracer.span("POST /query") as root:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                pool.submit(propagate(tool_call)).result()
+            asyncio.run(vector_search())
+            trace = tracer.current_trace()
+
+        children = [span for span in trace.spans if span is not root]
+        assert {span.name for span in children} == {"http.NASA", "vector.search"}
+        assert all(span.parent_id == root.span_id for span in children)
+        assert all(span.trace_id == root.trace_id for span in children)
+
+    def test_server_timing_reports_each_stage(self):
+        """Test that the header lists the slowest stage first and ends with the total"""
+        tracer, _ = make_tracer()
+
+        with tracer.span("request"):
+            with tracer.span("router.route_query"):
+                pass
+            with tracer.span("crew.kickoff"):
+                time.sleep(0.02)
+            header = tracer.current_trace().server_timing()
+
+        names = [part.split(";")[0] for part in header.split(", ")]
+        assert names == ["crew.kickoff", "router.route_query", "total"]
+
+    def test_only_slow_or_failed_traces_exported_at_zero_rate(self):
+        """Test that latency threshold and errors force export when sampling is off"""
+        tracer, exporter = make_tracer(latency_threshold_seconds=0.01)
+
+        with tracer.span("fast"):
+            pass
+        with tracer.span("slow"):
+            time.sleep(0.02)
+        with pytest.raises(RuntimeError):
+            with tracer.span("failed"):
+                raise RuntimeError("provider down")
+
+        assert [trace.root.name for trace in exporter.traces] == ["slow", "failed"]
+        assert exporter.traces[1].root.error == "RuntimeError: provider down"
@@ -4,6 +4,9 @@ import os
 from typing import Dict, Any, Optional
 from loguru import logger
 
+from ..cache.tool_memo import ToolFailure, memoized_tool
+from ..monitoring.http_instrumentation import http_session
+
 class BhuvanApiTool(BaseTool):
     name: str = "Bhuvan API Tool" 
     description: str = "Access ISRO's Bhuvan geospatial platform for Indian satellite data"
@@ -12,6 +15,7 @@ class BhuvanApiTool(BaseTool):
         super().__init__()
         self.base_url = "https://bhuvan-app1.nrsc.gov.in/api"
         
+    @memoized_tool
     def _run(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
         """Execute Bhuvan API call"""
         if params is None:
@@ -19,7 +23,7 @@ class BhuvanApiTool(BaseTool):
             
         try:
             url = f"{self.base_url}/{endpoint.lstrip('/')}"
-            response = requests.get(url, params=params, timeout=45)
+            response = http_session.get(url, params=params, timeout=45)
             response.raise_for_status()
             
             logger.info(f"Successfully fetched data from Bhuvan API: {endpoint}")
@@ -28,6 +32,6 @@ class BhuvanApiTool(BaseTool):
         except requests.exceptions.RequestException as e:
             error_msg = f"Bhuvan API request failed for {endpoint}: {str(e)}"
             logger.error(error_msg)
-            return error_msg
+            return ToolFailure(error_msg)
 
 bhuvan_api_tool = BhuvanApiTool()
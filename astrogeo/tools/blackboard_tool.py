@@ -0,0 +1,23 @@
+from crewai_tools import BaseTool
+from typing import Optional
+
+from ..cache.tool_memo import tool_memo
+
+class BlackboardTool(BaseTool):
+    name: str = "Run Blackboard Tool"
+    description: str = ("Read data other agents already fetched during this analysis (NASA, ESA, Bhuvan, weather "
+                        "and other tool results) instead of calling those APIs again. Optionally pass a tool name.")
+
+    def _run(self, tool_name: Optional[str] = None) -> str:
+        """Summarise tool results recorded so far in the current crew run"""
+        memo = tool_memo.current()
+        if memo is None:
+            return "No crew run is active, so there is nothing on the blackboard."
+        if tool_name:
+            entries = memo.read(tool_name)
+            if not entries:
+                return f"{tool_name} has not been called in this run yet."
+            return "\n".join(f"[{tool_name}] {entry.result}" for entry in entries)
+        return memo.summary()
+
+blackboard_tool = BlackboardTool()
@@ -4,6 +4,8 @@ import os
 from typing import Optional
 from loguru import logger
 
+from ..cache.tool_memo import ToolFailure, memoized_tool
+
 class DallETool(BaseTool):
     name: str = "DALL-E Image Generation Tool"
     description: str = "Generate space-themed images using OpenAI's DALL-E for visualization"
@@ -12,6 +14,7 @@ class DallETool(BaseTool):
         super().__init__()
         self.client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
         
+    @memoized_tool
     def _run(self, prompt: str, size: Optional[str] = "1024x1024") -> str:
         """Generate image using DALL-E"""
         try:
@@ -34,6 +37,6 @@ class DallETool(BaseTool):
         except Exception as e:
             error_msg = f"DALL-E image generation failed: {str(e)}"
             logger.error(error_msg)
-            return error_msg
+            return ToolFailure(error_msg)
 
 dall_e_tool = DallETool()
@@ -4,6 +4,9 @@ import os
 from typing import Dict, Any, Optional
 from loguru import logger
 
+from ..cache.tool_memo import ToolFailure, memoized_tool
+from ..monitoring.http_instrumentation import http_session
+
 class EsaApiTool(BaseTool):
     name: str = "ESA API Tool"
     description: str = "Access ESA's Copernicus and Earth observation data services"
@@ -13,6 +16,7 @@ class EsaApiTool(BaseTool):
         self.api_key = os.getenv('ESA_API_KEY', '')
         self.base_url = "https://scihub.copernicus.eu/apihub"
         
+    @memoized_tool
     def _run(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
         """Execute ESA API call"""
         if params is None:
@@ -22,7 +26,7 @@ class EsaApiTool(BaseTool):
             url = f"{self.base_url}/{endpoint.lstrip('/')}"
             auth = (self.api_key, self.api_key) if self.api_key else None
             
-            response = requests.get(url, params=params, auth=auth, timeout=60)
+            response = http_session.get(url, params=params, auth=auth, timeout=60)
             response.raise_for_status()
             
             logger.info(f"Successfully fetched data from ESA API: {endpoint}")
@@ -31,6 +35,6 @@ class EsaApiTool(BaseTool):
         except requests.exceptions.RequestException as e:
             error_msg = f"ESA API request failed for {endpoint}: {str(e)}"
             logger.error(error_msg)
-            return error_msg
+            return ToolFailure(error_msg)
 
 esa_api_tool = EsaApiTool()
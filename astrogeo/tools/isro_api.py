@@ -4,6 +4,9 @@ import os
 from typing import Dict, Any, Optional
 from loguru import logger
 
+from ..cache.tool_memo import ToolFailure, memoized_tool
+from ..monitoring.http_instrumentation import http_session
+
 class IsroApiTool(BaseTool):
     name: str = "ISRO API Tool"
     description: str = "Access ISRO's Bhuvan platform and satellite data services"
@@ -13,6 +16,7 @@ class IsroApiTool(BaseTool):
         self.api_key = os.getenv('ISRO_API_KEY', '')
         self.base_url = "https://bhuvan.nrsc.gov.in/api"
         
+    @memoized_tool
     def _run(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
         """Execute ISRO/Bhuvan API call"""
         if params is None:
@@ -22,7 +26,7 @@ class IsroApiTool(BaseTool):
             url = f"{self.base_url}/{endpoint.lstrip('/')}"
             headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
             
-            response = requests.get(url, params=params, headers=headers, timeout=45)
+            response = http_session.get(url, params=params, headers=headers, timeout=45)
             response.raise_for_status()
             
             # Handle different response types
@@ -35,6 +39,6 @@ class IsroApiTool(BaseTool):
         except requests.exceptions.RequestException as e:
             error_msg = f"ISRO API request failed for {endpoint}: {str(e)}"
             logger.error(error_msg)
-            return error_msg
+            return ToolFailure(error_msg)
 
 isro_api_tool = IsroApiTool()
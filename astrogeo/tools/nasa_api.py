@@ -1,9 +1,11 @@
 from crewai_tools import BaseTool
-import requests
 import os
 from typing import Dict, Any, Optional
 from loguru import logger
 
+from ..cache.tool_memo import ToolFailure, memoized_tool
+from ..monitoring.http_instrumentation import http_session
+
 class NasaApodTool(BaseTool):
     name: str = "NASA APOD Tool"
     description: str = "Get NASA's Astronomy Picture of the Day with title, explanation and image URL"
@@ -12,10 +14,11 @@ class NasaApodTool(BaseTool):
         super().__init__()
         self.api_key = os.getenv('NASA_API_KEY', 'DEMO_KEY')
         
+    @memoized_tool
     def _run(self) -> str:
         """Get today's NASA APOD"""
         try:
-            r = requests.get(
+            r = http_session.get(
                 "https://api.nasa.gov/planetary/apod",
                 params={"api_key": self.api_key},
                 timeout=10
@@ -24,7 +27,7 @@ class NasaApodTool(BaseTool):
             d = r.json()
             return f"Today's NASA APOD is titled '{d.get('title')}' ({d.get('date')}). {d.get('explanation')} Image URL: {d.get('url')}"
         except Exception as e:
-            return f"Error fetching APOD: {e}"
+            return ToolFailure(f"Error fetching APOD: {e}")
 
 class NasaMarsRoverTool(BaseTool):
     name: str = "NASA Mars Rover Tool"
@@ -34,10 +37,11 @@ class NasaMarsRoverTool(BaseTool):
         super().__init__()
         self.api_key = os.getenv('NASA_API_KEY', 'DEMO_KEY')
         
+    @memoized_tool
     def _run(self, sol: int = 1000) -> str:
         """Get Mars rover photos for specified sol (Mars day)"""
         try:
-            r = requests.get(
+            r = http_session.get(
                 "https://api.nasa.gov/mars-photos/api/v1/rovers/curiosity/photos",
                 params={"sol": sol, "api_key": self.api_key},
                 timeout=10
@@ -52,7 +56,7 @@ class NasaMarsRoverTool(BaseTool):
                 text += f"- {p['earth_date']} {p['camera']['full_name']}: {p['img_src']}\n"
             return text
         except Exception as e:
-            return f"Error fetching Mars photos: {e}"
+            return ToolFailure(f"Error fetching Mars photos: {e}")
 
 class NasaAsteroidTool(BaseTool):
     name: str = "NASA Near-Earth Asteroid Tool"
@@ -62,10 +66,11 @@ class NasaAsteroidTool(BaseTool):
         super().__init__()
         self.api_key = os.getenv('NASA_API_KEY', 'DEMO_KEY')
         
+    @memoized_tool
     def _run(self) -> str:
         """Get near-Earth asteroid data"""
         try:
-            r = requests.get(
+            r = http_session.get(
                 "https://api.nasa.gov/neo/rest/v1/feed",
                 params={"api_key": self.api_key},
                 timeout=10
@@ -78,7 +83,7 @@ class NasaAsteroidTool(BaseTool):
                     items.append(f"{a['name']} (Potentially Hazardous: {a['is_potentially_hazardous_asteroid']})")
             return "The recent near-Earth asteroids are:\n" + "\n".join(items)
         except Exception as e:
-            return f"Error fetching asteroid data: {e}"
+            return ToolFailure(f"Error fetching asteroid data: {e}")
 
 class NasaSolarActivityTool(BaseTool):
     name: str = "NASA Solar Activity Tool"  
@@ -88,11 +93,12 @@ class NasaSolarActivityTool(BaseTool):
         super().__init__()
         self.api_key = os.getenv('NASA_API_KEY', 'DEMO_KEY')
         
+    @memoized_tool
     def _run(self) -> str:
         """Get solar activity data"""
         try:
             url = "https://api.nasa.gov/DONKI/FLR"
-            r = requests.get(url, params={"api_key": self.api_key}, timeout=10)
+            r = http_session.get(url, params={"api_key": self.api_key}, timeout=10)
             r.raise_for_status()
             arr = r.json()
             if not arr:
@@ -100,7 +106,7 @@ class NasaSolarActivityTool(BaseTool):
             flare = arr[0]
             return f"Recent solar activity: Solar flare of class {flare.get('classType')} peaked at {flare.get('peakTime')}."
         except Exception as e:
-            return f"Error fetching solar activity: {e}"
+            return ToolFailure(f"Error fetching solar activity: {e}")
 
 # Create tool instances
 nasa_apod_tool = NasaApodTool()
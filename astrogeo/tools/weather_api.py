@@ -1,5 +1,4 @@
 from crewai_tools import BaseTool
-import requests
 import os
 import re
 from typing import Dict, Any, Optional
@@ -7,6 +6,9 @@ from datetime import datetime
 import json
 from loguru import logger
 
+from ..cache.tool_memo import ToolFailure, memoized_tool
+from ..monitoring.http_instrumentation import http_session
+
 class IntelligentWeatherTool(BaseTool):
     name: str = "Intelligent Weather Analysis Tool"
     description: str = "Professional weather analysis with intelligent location detection and validation for ANY city worldwide using OpenWeatherMap API"
@@ -15,6 +17,7 @@ class IntelligentWeatherTool(BaseTool):
         super().__init__()
         self.api_key = os.getenv('OPENWEATHERMAP_KEY', 'DEMO_KEY')
         
+    @memoized_tool
     def _run(self, query: str) -> str:
         """
         Intelligent weather analysis for any location mentioned in natural language query
@@ -26,7 +29,7 @@ class IntelligentWeatherTool(BaseTool):
             location = self._extract_and_validate_location(query)
             
             if not location:
-                return f"""❌ **INTELLIGENT WEATHER ANALYSIS FAILED**
+                return ToolFailure(f"""❌ **INTELLIGENT WEATHER ANALYSIS FAILED**
                 
 **Query**: {query}
 **Issue**: Could not identify or validate any location
@@ -36,7 +39,7 @@ class IntelligentWeatherTool(BaseTool):
 • Try adding country: "CityName, Country"
 • Use major nearby city if small town not found
 
-**Supported**: Any of 200,000+ cities worldwide in OpenWeatherMap database"""
+**Supported**: Any of 200,000+ cities worldwide in OpenWeatherMap database""")
             
             # STEP 2: Get comprehensive weather data
             weather_data = self._get_comprehensive_weather_data(location)
@@ -45,7 +48,7 @@ class IntelligentWeatherTool(BaseTool):
             
         except Exception as e:
             logger.error(f"Intelligent Weather Tool error: {e}")
-            return f"Weather analysis system error: {str(e)}"
+            return ToolFailure(f"Weather analysis system error: {str(e)}")
     
     def _extract_and_validate_location(self, query: str) -> Optional[str]:
         """Extract location from query and validate with OpenWeatherMap API"""
@@ -95,7 +98,7 @@ class IntelligentWeatherTool(BaseTool):
             geo_url = "https://api.openweathermap.org/geo/1.0/direct"
             params = {"q": location_clean, "limit": 3, "appid": self.api_key}
             
-            response = requests.get(geo_url, params=params, timeout=8)
+            response = http_session.get(geo_url, params=params, timeout=8)
             response.raise_for_status()
             locations = response.json()
             
@@ -113,7 +116,7 @@ class IntelligentWeatherTool(BaseTool):
             # Try with ", India" suffix for Indian context
             if not locations and not "," in location_clean:
                 params_india = {"q": f"{location_clean}, India", "limit": 2, "appid": self.api_key}
-                response_india = requests.get(geo_url, params=params_india, timeout=8)
+                response_india = http_session.get(geo_url, params=params_india, timeout=8)
                 
                 if response_india.status_code == 200:
                     locations_india = response_india.json()
@@ -133,14 +136,14 @@ class IntelligentWeatherTool(BaseTool):
             # Current weather
             current_url = "https://api.openweathermap.org/data/2.5/weather"
             current_params = {"q": location, "appid": self.api_key, "units": "metric"}
-            current_response = requests.get(current_url, params=current_params, timeout=10)
+            current_response = http_session.get(current_url, params=current_params, timeout=10)
             current_response.raise_for_status()
             current_data = current_response.json()
             
             # Forecast
             forecast_url = "https://api.openweathermap.org/data/2.5/forecast"
             forecast_params = {"q": location, "appid": self.api_key, "units": "metric"}
-            forecast_response = requests.get(forecast_url, params=forecast_params, timeout=10)
+            forecast_response = http_session.get(forecast_url, params=forecast_params, timeout=10)
             forecast_response.raise_for_status()
             forecast_data = forecast_response.json()
             
@@ -175,7 +178,7 @@ class IntelligentWeatherTool(BaseTool):
 📡 **Data Source**: OpenWeatherMap API - Real-time meteorological data"""
             
         except Exception as e:
-            return f"Weather data retrieval failed for {location}: {str(e)}"
+            return ToolFailure(f"Weather data retrieval failed for {location}: {str(e)}")
     
     def _generate_weather_analysis(self, temp: float, humidity: int, wind_speed: float, rainfall: float, country: str) -> str:
         """Generate professional weather impact analysis"""
@@ -223,6 +226,7 @@ class IntelligentAirQualityTool(BaseTool):
         super().__init__()
         self.api_key = os.getenv('OPENWEATHERMAP_KEY', 'DEMO_KEY')
     
+    @memoized_tool
     def _run(self, query: str) -> str:
         """
         Intelligent air quality analysis for any location in natural language query
@@ -234,13 +238,13 @@ class IntelligentAirQualityTool(BaseTool):
             location = self._extract_location_from_query(query)
             
             if not location:
-                return f"""❌ **AIR QUALITY ANALYSIS FAILED**
+                return ToolFailure(f"""❌ **AIR QUALITY ANALYSIS FAILED**
                 
 **Query**: {query}
 **Issue**: Could not identify valid location for air quality monitoring
 **Required**: Clear city name in query
 **Examples**: "Air quality in Delhi", "Mumbai pollution levels", "AQI for Tokyo"
-**Coverage**: Global air quality monitoring for any major city"""
+**Coverage**: Global air quality monitoring for any major city""")
             
             # Get air quality data
             aqi_data = self._get_air_quality_data(location)
@@ -248,7 +252,7 @@ class IntelligentAirQualityTool(BaseTool):
             
         except Exception as e:
             logger.error(f"Air Quality Tool error: {e}")
-            return f"Air quality analysis error: {str(e)}"
+            return ToolFailure(f"Air quality analysis error: {str(e)}")
     
     def _extract_location_from_query(self, query: str) -> Optional[str]:
         """Extract and validate location for air quality analysis"""
@@ -262,12 +266,12 @@ class IntelligentAirQualityTool(BaseTool):
             # Get coordinates
             geo_url = "https://api.openweathermap.org/geo/1.0/direct"
             geo_params = {"q": location, "limit": 1, "appid": self.api_key}
-            geo_response = requests.get(geo_url, params=geo_params, timeout=10)
+            geo_response = http_session.get(geo_url, params=geo_params, timeout=10)
             geo_response.raise_for_status()
             geo_data = geo_response.json()
             
             if not geo_data:
-                return f"Air quality coordinates not found for {location}"
+                return ToolFailure(f"Air quality coordinates not found for {location}")
             
             lat, lon = geo_data[0]["lat"], geo_data[0]["lon"]
             city_name = geo_data[0]["name"]
@@ -276,7 +280,7 @@ class IntelligentAirQualityTool(BaseTool):
             # Air pollution API
             air_url = "https://api.openweathermap.org/data/2.5/air_pollution"
             air_params = {"lat": lat, "lon": lon, "appid": self.api_key}
-            air_response = requests.get(air_url, params=air_params, timeout=10)
+            air_response = http_session.get(air_url, params=air_params, timeout=10)
             air_response.raise_for_status()
             air_data = air_response.json()
             
@@ -310,7 +314,7 @@ class IntelligentAirQualityTool(BaseTool):
 📡 **Source**: OpenWeatherMap Air Pollution API"""
             
         except Exception as e:
-            return f"Air quality data retrieval failed for {location}: {str(e)}"
+            return ToolFailure(f"Air quality data retrieval failed for {location}: {str(e)}")
     
     def _analyze_health_impacts(self, aqi: int, components: dict) -> str:
         """Analyze health impacts based on AQI and pollutant levels"""